@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BackEnd.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after setup; streams stay open, so they are served outside Django's request cycle.
+# Events are published in-process only (core.pubsub), so this app must run as a single worker.
+from lecturer.live import attendance_stream  # noqa: E402
+
+LIVE_ATTENDANCE_PATH = '/api/lecturer/live/attendance'
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].rstrip('/') == LIVE_ATTENDANCE_PATH:
+        return await attendance_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,212 @@
+"""
+Approve and reject teacher applications.
+
+Approving creates the User, TeacherProfile and lecturer UserRole in one
+transaction. The profile points at the application's stored photo, CV and
+certificate files by name; both models upload to the same directories, so
+nothing is re-uploaded or copied.
+"""
+import re
+import secrets
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from admins.models import AuditLog, Major
+from users.models import User, Role, UserRole
+from .models import TeacherApplication, TeacherProfile
+
+LECTURER_ROLE = 'lecturer'
+
+
+class ApprovalError(ValueError):
+    pass
+
+
+def parse_hire_date(value):
+    """The hire date a reviewer sent, as a date; it is required and must be valid."""
+    if not value:
+        raise ApprovalError('hire_date is required')
+    try:
+        hire_date = parse_date(str(value))
+    except ValueError:
+        hire_date = None
+    if hire_date is None:
+        raise ApprovalError('Invalid hire_date')
+    return hire_date
+
+
+def _reviewer_profile(user):
+    return getattr(user, 'staff_profile', None) if user.is_authenticated else None
+
+
+def _email_taken(email):
+    return User.objects.filter(email__iexact=email).exists()
+
+
+def _unique_username(email, taken):
+    base = re.sub(r'[^\w.@+-]', '', email.split('@')[0]) or 'teacher'
+    username, suffix = base, 1
+    while username in taken or User.objects.filter(username=username).exists():
+        suffix += 1
+        username = f"{base}{suffix}"
+    taken.add(username)
+    return username
+
+
+def resolve_major(application, major_id=None, majors_by_name=None):
+    """Pick the Major given explicitly, or the one whose name matches the application."""
+    if major_id:
+        major = Major.objects.select_related('department').filter(pk=major_id).first()
+        if major is None:
+            raise ApprovalError('Unknown major')
+        return major
+    name = (application.major_name or '').strip().lower()
+    if majors_by_name is not None:
+        major = majors_by_name.get(name)
+    else:
+        major = Major.objects.select_related('department').filter(name__iexact=name).first() if name else None
+    if major is None:
+        raise ApprovalError('No major matches this application; pass "major" explicitly')
+    return major
+
+
+def approve_application(application, reviewer, major, hire_date, comment='', password=None,
+                        taken_usernames=None):
+    """
+    Promote a pending application to a teacher account.
+    Returns (teacher_profile, password); the password is only known at this point.
+    """
+    if application.status != 'pending':
+        raise ApprovalError(f'Application is already {application.status}')
+    if _email_taken(application.email):
+        raise ApprovalError('A user with this email already exists')
+
+    password = password or secrets.token_urlsafe(9)
+    if taken_usernames is None:
+        taken_usernames = set()
+    first_name, _, last_name = application.full_name.partition(' ')
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=_unique_username(application.email, taken_usernames),
+                email=application.email,
+                password=password,
+                first_name=first_name,
+                last_name=last_name,
+                phone=application.phone,
+                gender=application.gender,
+                date_of_birth=application.date_of_birth,
+            )
+            role, _ = Role.objects.get_or_create(name=LECTURER_ROLE)
+            UserRole.objects.create(user=user, role=role)
+
+            profile = TeacherProfile.objects.create(
+                user=user,
+                full_name=application.full_name,
+                gender=application.gender,
+                date_of_birth=application.date_of_birth,
+                nationality=application.nationality,
+                place_of_birth=application.place_of_birth,
+                degree=application.degree,
+                major_name=application.major_name,
+                institution=application.institution,
+                phone=application.phone,
+                email=application.email,
+                experience=application.experience,
+                # Same storage paths as the application: reference, don't copy
+                photo=application.photo.name,
+                cv=application.cv.name,
+                certificate=application.certificate.name,
+                department=major.department,
+                major=major,
+                hire_date=hire_date,
+                address='',
+                emergency_contact='',
+            )
+
+            _mark_reviewed(application, 'approved', reviewer, comment)
+            _audit(reviewer, 'approve', application)
+    except IntegrityError:
+        # Another approval may have created this user between the check above and the insert
+        if _email_taken(application.email):
+            raise ApprovalError('A user with this email already exists') from None
+        raise
+    return profile, password
+
+
+def reject_application(application, reviewer, comment=''):
+    if application.status != 'pending':
+        raise ApprovalError(f'Application is already {application.status}')
+    with transaction.atomic():
+        _mark_reviewed(application, 'rejected', reviewer, comment)
+        _audit(reviewer, 'reject', application)
+
+
+def bulk_approve(application_ids, reviewer, hire_date, major_id=None, comment=''):
+    """
+    Approve several applications; each one commits or fails on its own.
+    Returns {'approved': [...], 'failed': [...]}.
+    """
+    applications = TeacherApplication.objects.filter(pk__in=application_ids).defer('resume_text')
+    found = {application.pk: application for application in applications}
+    fixed_major, majors_by_name = None, None
+    if major_id:
+        fixed_major = resolve_major(None, major_id)
+    else:
+        names = {(a.major_name or '').strip().lower() for a in found.values()} - {''}
+        majors_by_name = {}
+        for major in Major.objects.select_related('department').filter(is_active=True):
+            key = major.name.strip().lower()
+            if key in names:
+                majors_by_name.setdefault(key, major)
+
+    approved, failed = [], []
+    taken = set()
+    for application_id in application_ids:
+        application = found.get(application_id)
+        if application is None:
+            failed.append({'id': application_id, 'error': 'Not found'})
+            continue
+        try:
+            major = fixed_major or resolve_major(application, majors_by_name=majors_by_name)
+            profile, password = approve_application(
+                application, reviewer, major, hire_date=hire_date, comment=comment,
+                taken_usernames=taken,
+            )
+        except ApprovalError as exc:
+            failed.append({'id': application_id, 'error': str(exc)})
+            continue
+        approved.append({
+            'id': application_id,
+            'teacher_profile': profile.pk,
+            'username': profile.user.username,
+            'temporary_password': password,
+        })
+    return {'approved': approved, 'failed': failed}
+
+
+def _mark_reviewed(application, new_status, reviewer, comment):
+    # Conditional UPDATE so two reviewers acting at once cannot both succeed
+    now = timezone.now()
+    reviewed_by = _reviewer_profile(reviewer)
+    updated = TeacherApplication.objects.filter(pk=application.pk, status='pending').update(
+        status=new_status, reviewed_by=reviewed_by, review_comment=comment, updated_at=now
+    )
+    if not updated:
+        raise ApprovalError('Application has already been reviewed')
+    application.status = new_status
+    application.reviewed_by = reviewed_by
+    application.review_comment = comment
+    application.updated_at = now
+
+
+def _audit(user, action, application):
+    AuditLog.objects.create(
+        user=user,
+        action=action,
+        model_name='TeacherApplication',
+        object_id=str(application.pk),
+        details=f"Application of {application.full_name} {application.status}",
+    )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LecturerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lecturer'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,106 @@
+"""
+Class attendance sheet: students in rows, sessions of one subject in columns.
+
+The sheet is read in two queries: the roster (students of the class plus
+anyone with attendance in these sessions who has since left it) and the
+sessions LEFT JOINed to their attendance rows, so sessions nobody attended
+yet still get a column. Cells are kept as one status code per byte in a
+bytearray of students x sessions; each JSON row is a string with one
+character per session.
+"""
+from django.db.models import Q
+
+from student.models import StudentAttendance, StudentProfile
+from .models import Schedule
+
+CODES = {'present': 'P', 'late': 'L', 'absent': 'A'}
+NO_RECORD = '-'
+TOTAL_FIELDS = ('present', 'late', 'absent')
+
+
+class AttendanceSheet:
+    def __init__(self, sessions, students, cells):
+        self.sessions = sessions  # (id, date, start_time) in column order
+        self.students = students  # (id, national_id, full_name) in row order
+        self.cells = cells
+
+    def row(self, index):
+        width = len(self.sessions)
+        return self.cells[index * width:(index + 1) * width].decode('ascii')
+
+    @staticmethod
+    def _totals(codes):
+        present, late, absent = (codes.count(CODES[field]) for field in TOTAL_FIELDS)
+        sessions = present + late + absent
+        return {
+            'present': present, 'late': late, 'absent': absent,
+            'rate': round((present + late) * 100 / sessions, 1) if sessions else None,
+        }
+
+    def row_totals(self, index):
+        return self._totals(self.row(index))
+
+    def column_totals(self, index):
+        return self._totals(self.cells[index::len(self.sessions)].decode('ascii'))
+
+    def as_json(self):
+        return {
+            'codes': {code: status for status, code in CODES.items()} | {NO_RECORD: None},
+            'sessions': [
+                {'id': pk, 'date': day, 'start': start_time.strftime('%H:%M'), **self.column_totals(i)}
+                for i, (pk, day, start_time) in enumerate(self.sessions)
+            ],
+            'students': [
+                {'id': pk, 'national_id': national_id, 'full_name': name, 'row': self.row(i),
+                 **self.row_totals(i)}
+                for i, (pk, national_id, name) in enumerate(self.students)
+            ],
+        }
+
+    def header(self):
+        return ['Student ID', 'National ID', 'Name'] + [
+            f"{day.isoformat()} {start_time.strftime('%H:%M')}" for _, day, start_time in self.sessions
+        ] + ['Present', 'Late', 'Absent', 'Rate %']
+
+    def export_rows(self):
+        """Rows for CSV/XLSX: one per student, then one per status with column totals."""
+        for i, (pk, national_id, name) in enumerate(self.students):
+            totals = self.row_totals(i)
+            yield [pk, national_id, name, *self.row(i), *(totals[field] for field in TOTAL_FIELDS),
+                   totals['rate']]
+        columns = [self.column_totals(i) for i in range(len(self.sessions))]
+        for field in TOTAL_FIELDS:
+            yield ['', '', f'Total {field}', *(column[field] for column in columns)]
+
+
+def build_sheet(class_id, subject_id, semester_id=None, start=None, end=None):
+    schedules = Schedule.objects.filter(class_obj_id=class_id, subject_id=subject_id)
+    if semester_id:
+        schedules = schedules.filter(semester_id=semester_id)
+    if start:
+        schedules = schedules.filter(date__gte=start)
+    if end:
+        schedules = schedules.filter(date__lte=end)
+
+    students = list(StudentProfile.objects.filter(
+        Q(class_obj_id=class_id)
+        | Q(id__in=StudentAttendance.objects.filter(schedule__in=schedules).values('student_id'))
+    ).order_by('full_name', 'id').values_list('id', 'national_id', 'full_name'))
+
+    sessions, columns, marks = [], {}, []
+    for pk, day, start_time, student_id, state in schedules.order_by('date', 'start_time', 'id').values_list(
+        'id', 'date', 'start_time', 'studentattendance__student_id', 'studentattendance__status',
+    ):
+        if pk not in columns:
+            columns[pk] = len(sessions)
+            sessions.append((pk, day, start_time))
+        if student_id is not None:
+            marks.append((student_id, columns[pk], CODES.get(state, NO_RECORD)))
+
+    width = len(sessions)
+    positions = {student[0]: i for i, student in enumerate(students)}
+    cells = bytearray(NO_RECORD.encode() * (width * len(students)))
+    for student_id, column, code in marks:
+        if student_id in positions:
+            cells[positions[student_id] * width + column] = ord(code)
+    return AttendanceSheet(sessions, students, cells)
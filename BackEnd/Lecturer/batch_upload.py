@@ -0,0 +1,225 @@
+"""
+Batch upload of scan events recorded by lecturer devices while offline.
+
+Each event carries a device-generated idempotency key and an HMAC-SHA256
+signature computed over
+
+    idempotency_key|type|action|schedule|student|client_time
+
+(student is empty for teacher events, client_time is the string as sent).
+The signing key belongs to the uploading lecturer and device: a device asks
+for it with device_key() while online and keeps it for offline use. It is
+derived from SECRET_KEY, so it never leaves the server otherwise and cannot
+be worked out from anything a student sees, such as the QR token.
+A whole upload is validated with a fixed number of lookups and written with
+bulk statements in one transaction, however many events it contains.
+"""
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from student.attendance_writer import upsert_attendance
+from student.models import StudentProfile, StudentAttendance
+from .live import publish_attendance
+from .models import (
+    Schedule, TeacherAttendance, TeacherProfile, OfflineScan,
+    CHECKIN_OPENS_BEFORE, CHECKOUT_CLOSES_AFTER,
+)
+from .rollups import refresh_teacher_rollups
+from .serializers import ScanEventSerializer
+
+MAX_BATCH_EVENTS = 500
+# How far ahead of the server clock a device timestamp may be
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def device_key(user_id, device_id):
+    """Signing key for the events a lecturer's device uploads."""
+    return salted_hmac(
+        'lecturer.batch_upload.device_key', f'{user_id}:{device_id}', algorithm='sha256'
+    ).hexdigest()
+
+
+def sign_event(key, idempotency_key, kind, action, schedule_id, student_id, client_time):
+    message = '|'.join(str(part) for part in (
+        idempotency_key, kind, action, schedule_id,
+        '' if student_id is None else student_id, client_time,
+    ))
+    return hmac.new(key.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def process_batch(events, user, device_id=''):
+    """
+    Validate and store a list of raw scan events.
+    Returns the idempotency keys that were accepted, already seen, or rejected.
+    """
+    accepted, duplicates, rejected = [], [], []
+
+    parsed = []
+    seen = set()
+    for raw in events:
+        serializer = ScanEventSerializer(data=raw)
+        if not serializer.is_valid():
+            key = raw.get('idempotency_key') if isinstance(raw, dict) else None
+            rejected.append({'idempotency_key': key, 'error': serializer.errors})
+            continue
+        event = serializer.validated_data
+        if event['idempotency_key'] in seen:
+            duplicates.append(event['idempotency_key'])
+            continue
+        seen.add(event['idempotency_key'])
+        parsed.append((raw, event))
+
+    if not parsed:
+        return {'accepted': accepted, 'duplicates': duplicates, 'rejected': rejected}
+
+    existing_keys = set(OfflineScan.objects.filter(
+        idempotency_key__in=seen
+    ).values_list('idempotency_key', flat=True))
+    schedules = Schedule.objects.in_bulk(
+        {event['schedule'] for _, event in parsed}
+    )
+    student_classes = dict(StudentProfile.objects.filter(
+        id__in={event['student'] for _, event in parsed if event['type'] == 'student'}
+    ).values_list('id', 'class_obj_id'))
+    teacher_rows = {}
+    for row in TeacherAttendance.objects.filter(schedule_id__in=schedules.keys()).order_by('-id'):
+        teacher_rows[row.schedule_id] = row  # earliest row per schedule wins
+    signing_key = device_key(user.pk, device_id)
+    own_teacher_id = None
+    if not user.is_staff:
+        own_teacher_id = TeacherProfile.objects.filter(user=user).values_list('id', flat=True).first()
+
+    now = timezone.now()
+    valid = []
+    for raw, event in parsed:
+        key = event['idempotency_key']
+
+        def reject(error):
+            rejected.append({'idempotency_key': key, 'error': error})
+
+        if key in existing_keys:
+            duplicates.append(key)
+            continue
+        schedule = schedules.get(event['schedule'])
+        if schedule is None:
+            reject('Unknown schedule')
+            continue
+        if not user.is_staff and schedule.teacher_id != own_teacher_id:
+            reject('Schedule does not belong to you')
+            continue
+        expected = sign_event(
+            signing_key, key, event['type'], event['action'], event['schedule'],
+            event.get('student'), raw.get('client_time'),
+        )
+        if not hmac.compare_digest(expected, str(event['signature'])):
+            reject('Invalid signature')
+            continue
+        client_time = event['client_time']
+        if client_time > now + MAX_CLOCK_SKEW:
+            reject('Timestamp is in the future')
+            continue
+        if client_time < schedule.start_datetime - CHECKIN_OPENS_BEFORE:
+            reject('Scan is before the session window')
+            continue
+        closes = schedule.end_datetime
+        if event['action'] == 'checkout':
+            closes += CHECKOUT_CLOSES_AFTER
+        if client_time > closes:
+            reject('Scan is after the session window')
+            continue
+        if event['type'] == 'student' and student_classes.get(event['student']) != schedule.class_obj_id:
+            reject('Student is not enrolled in this class')
+            continue
+        valid.append((schedule, event))
+
+    with transaction.atomic():
+        new_teacher_rows, changed_teacher_rows = [], {}
+        teacher_events = sorted(
+            (item for item in valid if item[1]['type'] == 'teacher'),
+            key=lambda item: item[1]['client_time'],
+        )
+        for schedule, event in teacher_events:
+            row = teacher_rows.get(schedule.id)
+            client_time = event['client_time']
+            if event['action'] == 'checkin':
+                if row is None:
+                    row = TeacherAttendance(
+                        teacher_id=schedule.teacher_id,
+                        schedule_id=schedule.id,
+                        location=event['location'],
+                    )
+                    teacher_rows[schedule.id] = row
+                    new_teacher_rows.append(row)
+                elif row.pk is not None:
+                    changed_teacher_rows[row.pk] = row
+                if row.checkin_time is None or client_time < row.checkin_time:
+                    row.checkin_time = client_time
+                    row.status = schedule.checkin_status(client_time)
+            else:
+                if row is None or row.checkin_time is None:
+                    rejected.append({'idempotency_key': event['idempotency_key'],
+                                     'error': 'Check-out without a check-in'})
+                    continue
+                if row.checkout_time is None or client_time > row.checkout_time:
+                    row.checkout_time = client_time
+                if row.pk is not None:
+                    changed_teacher_rows[row.pk] = row
+            if row.checkout_time is not None:
+                row.duration = row.checkout_time - row.checkin_time
+            accepted.append(event['idempotency_key'])
+
+        if new_teacher_rows:
+            TeacherAttendance.objects.bulk_create(new_teacher_rows)
+        if changed_teacher_rows:
+            for row in changed_teacher_rows.values():
+                row.updated_at = now
+            TeacherAttendance.objects.bulk_update(
+                list(changed_teacher_rows.values()),
+                ['checkin_time', 'checkout_time', 'duration', 'status', 'updated_at'],
+            )
+        # bulk writes skip the post_save signals that maintain the daily rollups and the live feed
+        refresh_teacher_rollups(
+            (row.teacher_id, schedules[row.schedule_id].date)
+            for row in new_teacher_rows + list(changed_teacher_rows.values())
+        )
+        publish_attendance('teacher', new_teacher_rows + list(changed_teacher_rows.values()))
+
+        student_rows = {}
+        for schedule, event in valid:
+            if event['type'] != 'student':
+                continue
+            pair = (event['student'], schedule.id)
+            if pair not in student_rows or event['client_time'] < student_rows[pair].checkin_time:
+                teacher_row = teacher_rows.get(schedule.id)
+                student_rows[pair] = StudentAttendance(
+                    student_id=event['student'],
+                    schedule_id=schedule.id,
+                    teacher_attendance_id=teacher_row.pk if teacher_row else None,
+                    checkin_time=event['client_time'],
+                    status=schedule.checkin_status(event['client_time']),
+                    location=event['location'],
+                )
+            accepted.append(event['idempotency_key'])
+        if student_rows:
+            upsert_attendance(list(student_rows.values()))
+
+        accepted_keys = set(accepted)
+        OfflineScan.objects.bulk_create([
+            OfflineScan(
+                idempotency_key=event['idempotency_key'],
+                device_id=device_id,
+                kind=event['type'],
+                action=event['action'],
+                schedule_id=schedule.id,
+                client_time=event['client_time'],
+                uploaded_by=user,
+            )
+            for schedule, event in valid if event['idempotency_key'] in accepted_keys
+        ], ignore_conflicts=True)
+
+    return {'accepted': accepted, 'duplicates': duplicates, 'rejected': rejected}
@@ -0,0 +1,152 @@
+"""
+iCalendar feeds of Schedule rows for a teacher, a class or a room.
+
+Calendar apps poll feeds often and cannot send a JWT, so each feed URL
+carries a signed token instead. Rendered feeds are cached together with
+their ETag under a version read from the database: the row count and
+latest updated_at of the feed's schedules and of the subjects, teachers and
+classes they show. Any worker sees a change on its next poll, whichever
+process made it, and an unchanged feed costs one aggregate query.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from admins.models import Class
+from .models import Schedule, TeacherProfile
+
+FEED_KINDS = {
+    'teacher': 'teacher_id',
+    'class': 'class_obj_id',
+    'room': 'room',
+}
+PAST_DAYS = 30
+FUTURE_DAYS = 180
+CACHE_TIMEOUT = 60 * 60 * 24
+SIGNING_SALT = 'lecturer.calendar-feed'
+PRODID = '-//UMS CUMT//Timetable//EN'
+
+
+def feed_token(kind, key):
+    return signing.Signer(salt=SIGNING_SALT).sign(f'{kind}:{key}').rsplit(':', 1)[1]
+
+
+def check_token(kind, key, token):
+    try:
+        signing.Signer(salt=SIGNING_SALT).unsign(f'{kind}:{key}:{token}')
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def feed_name(kind, key):
+    """Calendar title for a feed, or None when the teacher/class/room does not exist."""
+    if kind == 'teacher':
+        name = TeacherProfile.objects.filter(pk=key).values_list('full_name', flat=True).first()
+    elif kind == 'class':
+        name = Class.objects.filter(pk=key).values_list('name', flat=True).first()
+    elif kind == 'room':
+        name = key if Schedule.objects.filter(room=key).exists() else None
+    else:
+        return None
+    return name and f'{name} timetable'
+
+
+def feed_links(user):
+    """(kind, key) pairs of the feeds a user is entitled to: their own timetable."""
+    links = [('teacher', pk) for pk in TeacherProfile.objects.filter(user=user).values_list('id', flat=True)]
+    student = getattr(user, 'studentprofile', None)
+    if student is not None:
+        links.append(('class', student.class_obj_id))
+    return links
+
+
+def _feed_schedules(kind, key, today):
+    return Schedule.objects.filter(
+        **{FEED_KINDS[kind]: key},
+        date__range=(today - timedelta(days=PAST_DAYS), today + timedelta(days=FUTURE_DAYS)),
+    )
+
+
+def feed_version(kind, key, name, today):
+    """A digest of everything the feed shows; it changes whenever the rendered feed would."""
+    stamp = _feed_schedules(kind, key, today).order_by().aggregate(
+        rows=Count('pk'),
+        schedules=Max('updated_at'),
+        subjects=Max('subject__updated_at'),
+        teachers=Max('teacher__updated_at'),
+        classes=Max('class_obj__updated_at'),
+    )
+    parts = [name, today.isoformat()] + [str(stamp[field]) for field in sorted(stamp)]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _fold(line):
+    # RFC 5545: lines longer than 75 octets continue on lines starting with a space
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, current = [], b''
+    for char in line:
+        encoded = char.encode()
+        if len(current) + len(encoded) > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b''
+        current += encoded
+    parts.append(current.decode())
+    return '\r\n '.join(parts)
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_feed(kind, key, name, today=None):
+    schedules = _feed_schedules(kind, key, today or timezone.localdate()).select_related('subject', 'teacher', 'class_obj').only(
+        'id', 'date', 'start_time', 'end_time', 'room', 'status', 'updated_at',
+        'subject__name', 'subject__code', 'teacher__full_name', 'class_obj__name',
+    ).order_by('date', 'start_time')
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for schedule in schedules.iterator(chunk_size=500):
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:schedule-{schedule.pk}@ums-cumt',
+            f'DTSTAMP:{_utc(schedule.updated_at)}',
+            f'DTSTART:{_utc(schedule.start_datetime)}',
+            f'DTEND:{_utc(schedule.end_datetime)}',
+            f'SUMMARY:{_escape(f"{schedule.subject.code} {schedule.subject.name}")}',
+            f'LOCATION:{_escape(schedule.room)}',
+            f'DESCRIPTION:{_escape(f"{schedule.teacher.full_name} - {schedule.class_obj.name}")}',
+            'STATUS:CONFIRMED',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(_fold(line) for line in lines) + '\r\n').encode()
+
+
+def get_feed(kind, key, name):
+    """Return (ics_bytes, etag), rendering only when the cached copy is stale."""
+    today = timezone.localdate()
+    cache_key = f'ics:{kind}:{key}:{feed_version(kind, key, name, today)}'
+    cached = cache.get(cache_key)
+    if cached is None:
+        body = render_feed(kind, key, name, today)
+        cached = (body, '"%s"' % hashlib.md5(body).hexdigest())
+        cache.set(cache_key, cached, CACHE_TIMEOUT)
+    return cached
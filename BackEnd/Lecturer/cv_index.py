@@ -0,0 +1,213 @@
+"""
+Text extraction and keyword search for teacher applications.
+
+Reading a PDF or DOCX is CPU-bound and slow, so it never happens inside the
+upload request. Saved applications are handed to a process pool once the
+transaction commits; the extracted text is written to resume_text and split
+into ApplicationIndexTerm rows. Searching is then a lookup on the term index
+instead of opening every CV.
+
+The pool starts its workers with `spawn`: forking the threaded web or ASGI
+process could copy locks held by other threads into the children. The
+text is written back from the pool's callback thread, which gets fresh
+database connections before the write and closes them after it.
+
+PDF support needs the optional `pypdf` package; DOCX and plain text are
+read with the standard library. Without pypdf a PDF is skipped and the
+application keeps indexed_at NULL, so `manage.py index_applications` picks
+it up again once the package is installed.
+"""
+import logging
+import math
+import multiprocessing
+import re
+import zipfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+POOL_WORKERS = 2
+MAX_TERM_WEIGHT = 50
+# Structured fields count for more than a passing mention in the CV body
+FIELD_WEIGHTS = {
+    'degree': 10,
+    'institution': 8,
+    'major_name': 6,
+    'experience': 2,
+    'resume_text': 1,
+}
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it of on or that the to was were with'.split()
+)
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_pool = None
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall((text or '').lower())
+        if token not in STOPWORDS and len(token) <= 64
+    ]
+
+
+def _read_pdf(path):
+    if PdfReader is None:
+        logger.warning('pypdf is not installed; skipping %s', path)
+        return None
+    return '\n'.join(page.extract_text() or '' for page in PdfReader(path).pages)
+
+
+def _read_docx(path):
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in root.iter(f'{WORD_NS}p'):
+        paragraphs.append(''.join(node.text or '' for node in paragraph.iter(f'{WORD_NS}t')))
+    return '\n'.join(paragraphs)
+
+
+def extract_text(path):
+    """
+    Return the text of a PDF, DOCX or plain-text file, or '' if it cannot be
+    read. Returns None when the file was skipped for want of pypdf.
+    """
+    lower = path.lower()
+    try:
+        if lower.endswith('.pdf'):
+            return _read_pdf(path)
+        if lower.endswith('.docx'):
+            return _read_docx(path)
+        if lower.endswith('.txt'):
+            with open(path, encoding='utf-8', errors='ignore') as handle:
+                return handle.read()
+    except Exception:
+        logger.exception('Could not extract text from %s', path)
+    return ''
+
+
+def extract_documents(paths):
+    """
+    Runs in a pool worker: extract and join the text of several files.
+    Returns (text, complete); complete is False if any file was skipped.
+    """
+    texts = [extract_text(path) for path in paths]
+    return '\n\n'.join(text for text in texts if text), None not in texts
+
+
+def _document_paths(application):
+    paths = []
+    for document in (application.cv, application.certificate):
+        if document:
+            try:
+                paths.append(document.path)
+            except NotImplementedError:
+                pass  # storage without local paths
+    return paths
+
+
+def build_terms(application, resume_text):
+    weights = Counter()
+    for field, field_weight in FIELD_WEIGHTS.items():
+        text = resume_text if field == 'resume_text' else getattr(application, field)
+        for token in tokenize(text):
+            weights[token] += field_weight
+    return {term: min(weight, MAX_TERM_WEIGHT) for term, weight in weights.items()}
+
+
+def store_index(application, resume_text, complete=True):
+    """
+    Save the extracted text and its terms. An incomplete extraction is still
+    searchable but leaves indexed_at NULL so the application is retried.
+    """
+    from .models import TeacherApplication, ApplicationIndexTerm
+
+    terms = build_terms(application, resume_text)
+    with transaction.atomic():
+        # update() rather than save() so the post_save hook does not fire again
+        TeacherApplication.objects.filter(pk=application.pk).update(
+            resume_text=resume_text, indexed_at=timezone.now() if complete else None
+        )
+        ApplicationIndexTerm.objects.filter(application_id=application.pk).delete()
+        ApplicationIndexTerm.objects.bulk_create([
+            ApplicationIndexTerm(application_id=application.pk, term=term, weight=weight)
+            for term, weight in terms.items()
+        ])
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def schedule_indexing(application):
+    """Extract and index an application's documents in the background."""
+    paths = _document_paths(application)
+    future = _get_pool().submit(extract_documents, paths)
+
+    def done(future):
+        # Runs on the pool's callback thread, not the one that saved the application
+        close_old_connections()
+        try:
+            store_index(application, *future.result())
+        except Exception:
+            logger.exception('Indexing application %s failed', application.pk)
+        finally:
+            close_old_connections()
+
+    future.add_done_callback(done)
+    return future
+
+
+def index_applications(applications, chunksize=8):
+    """Extract and index many applications using the pool; returns how many were fully indexed."""
+    applications = list(applications)
+    texts = _get_pool().map(
+        extract_documents, [_document_paths(app) for app in applications], chunksize=chunksize
+    )
+    count = 0
+    for application, (text, complete) in zip(applications, texts):
+        store_index(application, text, complete)
+        count += complete
+    return count
+
+
+def search_applications(query, queryset):
+    """
+    Rank applications in `queryset` by tf-idf over the term index.
+    Returns a list of (application_id, score), best first.
+    """
+    from .models import ApplicationIndexTerm
+
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+
+    postings = ApplicationIndexTerm.objects.filter(
+        term__in=terms, application__in=queryset.values('pk')
+    ).values_list('application_id', 'term', 'weight')
+
+    by_term = defaultdict(list)
+    for application_id, term, weight in postings:
+        by_term[term].append((application_id, weight))
+
+    total = queryset.count() or 1
+    scores = defaultdict(float)
+    for term, entries in by_term.items():
+        idf = math.log(1 + total / len(entries))
+        for application_id, weight in entries:
+            scores[application_id] += weight * idf
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
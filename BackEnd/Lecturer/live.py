@@ -0,0 +1,190 @@
+"""
+Live attendance stream over Server-Sent Events.
+
+Writers of StudentAttendance and TeacherAttendance call publish_attendance()
+with the rows they wrote; once the transaction commits, a small event per
+row is published on core.pubsub to the topics `schedule:<id>` and
+`department:<id>` (the department of the session's class). Events carry
+only ids, status and times taken from the rows already in memory, so
+watchers cost no queries at all: the department of a batch is looked up
+once, and only while someone watches a department.
+
+attendance_stream is a bare ASGI app mounted in BackEnd/asgi.py at
+/api/lecturer/live/attendance?schedule=<id> (or ?department=<id>). It
+authenticates the access token from ?token= (EventSource cannot send
+headers) or the Authorization header, checks permission once, then holds
+the connection open. A client whose queue overflowed gets an `overflow`
+event and should refetch the full state.
+
+Delivery is limited to one process (see core.pubsub): a check-in written
+by another worker is not streamed, so deployments that run several
+workers must route this path and the attendance writes to a single ASGI
+process, and clients should refetch the full state whenever they
+reconnect.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.pubsub import broker
+from .models import Schedule, TeacherProfile
+
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+RETRY_MS = 3000
+
+
+def publish_attendance(kind, rows):
+    """Publish `kind` ('student' or 'teacher') events for attendance rows after commit."""
+    if not broker.has_subscribers():
+        return
+    person = 'student_id' if kind == 'student' else 'teacher_id'
+    events = [
+        {
+            'type': kind,
+            'schedule': row.schedule_id,
+            kind: getattr(row, person),
+            'status': row.status,
+            'checkin_time': row.checkin_time,
+            'checkout_time': row.checkout_time,
+        }
+        for row in rows
+    ]
+    if events:
+        transaction.on_commit(lambda: _publish(events))
+
+
+def _publish(events):
+    departments = {}
+    if broker.has_subscribers('department:'):
+        departments = dict(Schedule.objects.filter(
+            id__in={event['schedule'] for event in events}
+        ).values_list('id', 'class_obj__major__department_id'))
+    for event in events:
+        data = json.dumps(event, cls=DjangoJSONEncoder)
+        broker.publish(f"schedule:{event['schedule']}", data)
+        department_id = departments.get(event['schedule'])
+        if department_id is not None:
+            broker.publish(f"department:{department_id}", data)
+
+
+def _authorize(raw_token, schedule_id, department_id):
+    """The topic to subscribe to, or (status, error) when the request is refused."""
+    # Not a Django request, so the connection housekeeping of request_started/finished is ours
+    close_old_connections()
+    try:
+        return _check(raw_token, schedule_id, department_id)
+    finally:
+        close_old_connections()
+
+
+def _check(raw_token, schedule_id, department_id):
+    try:
+        auth = JWTAuthentication()
+        user = auth.get_user(auth.get_validated_token(raw_token))
+    except AuthenticationFailed:
+        return None, (401, 'Invalid or expired token')
+
+    teacher = TeacherProfile.objects.filter(user=user).values_list('id', 'department_id').first()
+    if schedule_id is not None:
+        schedule = Schedule.objects.filter(pk=schedule_id).values_list(
+            'teacher_id', 'class_obj__major__department_id'
+        ).first()
+        if schedule is None:
+            return None, (404, 'Schedule not found')
+        allowed = user.is_staff or (teacher is not None and teacher[0] == schedule[0]) or (
+            teacher is not None and teacher[1] is not None and teacher[1] == schedule[1]
+        )
+        topic = f"schedule:{schedule_id}"
+    else:
+        allowed = user.is_staff or (teacher is not None and teacher[1] == department_id)
+        topic = f"department:{department_id}"
+    if not allowed:
+        return None, (403, 'You cannot watch this attendance')
+    return topic, None
+
+
+async def _send_json(send, status, body, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers + [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+
+async def attendance_stream(scope, receive, send):
+    headers = dict(scope.get('headers') or [])
+    cors = []
+    origin = headers.get(b'origin', b'').decode('latin-1')
+    if origin in settings.CORS_ALLOWED_ORIGINS:
+        cors = [(b'access-control-allow-origin', origin.encode('latin-1')),
+                (b'access-control-allow-credentials', b'true')]
+
+    params = parse_qs(scope.get('query_string', b'').decode())
+    raw_token = (params.get('token') or [''])[0]
+    authorization = headers.get(b'authorization', b'').decode('latin-1')
+    if not raw_token and authorization.startswith('Bearer '):
+        raw_token = authorization[len('Bearer '):]
+    if not raw_token:
+        return await _send_json(send, 401, {'error': 'Authentication credentials were not provided'}, cors)
+    try:
+        schedule_id = int(params['schedule'][0]) if 'schedule' in params else None
+        department_id = int(params['department'][0]) if 'department' in params else None
+    except ValueError:
+        return await _send_json(send, 400, {'error': 'schedule and department must be integers'}, cors)
+    if (schedule_id is None) == (department_id is None):
+        return await _send_json(send, 400, {'error': 'Pass exactly one of schedule or department'}, cors)
+
+    topic, refused = await sync_to_async(_authorize)(raw_token, schedule_id, department_id)
+    if refused:
+        return await _send_json(send, refused[0], {'error': refused[1]}, cors)
+
+    subscription = broker.subscribe([topic])
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': cors + [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await _send_chunk(send, f"retry: {RETRY_MS}\n: watching {topic}\n\n")
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {next_event, disconnected}, timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if next_event not in done:
+                next_event.cancel()
+                if not done:
+                    await _send_chunk(send, ": keep-alive\n\n")
+                continue
+            chunk = ''
+            dropped = subscription.take_dropped()
+            if dropped:
+                chunk += f"event: overflow\ndata: {json.dumps({'dropped': dropped})}\n\n"
+            chunk += f"event: attendance\ndata: {next_event.result()}\n\n"
+            await _send_chunk(send, chunk)
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+async def _send_chunk(send, text):
+    await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from lecturer.cv_index import index_applications
+from lecturer.models import TeacherApplication
+
+
+class Command(BaseCommand):
+    help = "Extract CV/certificate text into resume_text and rebuild the application search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Re-index every application, not only those never indexed")
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        applications = TeacherApplication.objects.order_by('pk')
+        if not options['all']:
+            applications = applications.filter(indexed_at__isnull=True)
+
+        total = 0
+        last_pk = 0
+        while True:
+            # Walk by primary key so rows indexed along the way do not shift the batches
+            batch = list(applications.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            total += index_applications(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Indexed {total} application(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {total} application(s) indexed"))
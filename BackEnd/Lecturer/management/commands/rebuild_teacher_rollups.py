@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lecturer.rollups import rebuild_teacher_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute daily per-teacher attendance rollups from TeacherAttendance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First schedule date to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--end', help="Last schedule date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError:
+            raise CommandError("Dates must be in YYYY-MM-DD format")
+
+        count = rebuild_teacher_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} teacher-day rollup(s)"))
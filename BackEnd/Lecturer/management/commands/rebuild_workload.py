@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lecturer.workload import rebuild_workload
+
+
+class Command(BaseCommand):
+    help = "Recompute the teacher workload ledger from all schedules"
+
+    def handle(self, *args, **options):
+        rows = rebuild_workload()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt workload ledger with {rows} row(s)"))
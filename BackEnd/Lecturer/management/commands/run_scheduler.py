@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from lecturer.scheduler import SchedulerWorker, DEFAULT_INTERVAL
+
+
+class Command(BaseCommand):
+    help = "Expire QR sessions, advance schedule status and finalize attendance on a timer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL,
+                            help="Seconds between ticks")
+        parser.add_argument('--once', action='store_true',
+                            help="Run a single tick and exit")
+
+    def handle(self, *args, **options):
+        def report(counts):
+            if any(counts.values()):
+                self.stdout.write(', '.join(f"{name}={value}" for name, value in counts.items()))
+
+        worker = SchedulerWorker(interval=options['interval'], report=report)
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        signal.signal(signal.SIGINT, lambda *_: worker.stop())
+
+        self.stdout.write(f"Scheduler {worker.owner} started (interval {worker.interval}s)")
+        worker.run(once=options['once'])
+        self.stdout.write("Scheduler stopped")
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfflineScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=64, unique=True)),
+                ('device_id', models.CharField(blank=True, max_length=100)),
+                ('kind', models.CharField(choices=[('student', 'Student'), ('teacher', 'Teacher')], max_length=10)),
+                ('action', models.CharField(choices=[('checkin', 'Check-in'), ('checkout', 'Check-out')], default='checkin', max_length=10)),
+                ('client_time', models.DateTimeField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offline_scans', to='lecturer.schedule')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0003_offlinescan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
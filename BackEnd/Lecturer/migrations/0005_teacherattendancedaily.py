@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:20
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0004_schedule_finalized_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherAttendanceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('total_duration', models.DurationField(default=datetime.timedelta)),
+                ('late_minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_days', to='lecturer.teacherprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='lecturer_tad_date_idx')],
+                'unique_together': {('teacher', 'date')},
+            },
+        ),
+    ]
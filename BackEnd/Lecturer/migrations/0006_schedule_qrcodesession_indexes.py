@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0005_teacherattendancedaily'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['date', 'end_time'], name='lecturer_sched_date_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qrcodesession',
+            index=models.Index(fields=['expiration_time'], name='lecturer_qr_expiration_idx'),
+        ),
+    ]
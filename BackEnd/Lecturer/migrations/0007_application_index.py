@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0006_schedule_qrcodesession_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherapplication',
+            name='indexed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ApplicationIndexTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='index_terms', to='lecturer.teacherapplication')),
+            ],
+            options={
+                'unique_together': {('term', 'application')},
+            },
+        ),
+    ]
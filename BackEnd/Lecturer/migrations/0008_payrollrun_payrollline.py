@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0007_application_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total_net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('teacher_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-year', '-month', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PayrollLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contract_type', models.CharField(max_length=50)),
+                ('salary', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('prorate', models.DecimalField(decimal_places=4, default=1, max_digits=5)),
+                ('hours_taught', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('late_minutes', models.PositiveIntegerField(default=0)),
+                ('absent_sessions', models.PositiveIntegerField(default=0)),
+                ('base_pay', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('late_deduction', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('absence_deduction', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('net_pay', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('contract', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='lecturer.contract')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='lecturer.payrollrun')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lecturer.teacherprofile')),
+            ],
+        ),
+    ]
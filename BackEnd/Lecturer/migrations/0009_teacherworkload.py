@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_schedulerlock'),
+        ('lecturer', '0008_payrollrun_payrollline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherWorkload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iso_year', models.PositiveIntegerField()),
+                ('iso_week', models.PositiveSmallIntegerField()),
+                ('minutes', models.IntegerField(default=0)),
+                ('sessions', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('semester', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.semester')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workload', to='lecturer.teacherprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['iso_year', 'iso_week'], name='lecturer_workload_week_idx'), models.Index(fields=['semester', 'teacher'], name='lecturer_workload_sem_idx')],
+                'unique_together': {('teacher', 'iso_year', 'iso_week', 'semester')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0009_teacherworkload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['class_obj', 'date', 'start_time'], name='lecturer_sched_class_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['teacher', 'date', 'start_time'], name='lecturer_sched_tchr_date_idx'),
+        ),
+    ]
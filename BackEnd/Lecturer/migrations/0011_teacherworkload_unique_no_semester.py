@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_jobwatermark'),
+        ('lecturer', '0010_schedule_timetable_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='teacherworkload',
+            constraint=models.UniqueConstraint(condition=models.Q(('semester__isnull', True)), fields=('teacher', 'iso_year', 'iso_week'), name='lecturer_workload_unique_no_sem'),
+        ),
+    ]
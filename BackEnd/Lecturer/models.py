@@ -1,6 +1,14 @@
+from datetime import datetime, timedelta
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
+# Check-ins later than start_time + this grace period are marked late
+LATE_GRACE_PERIOD = timedelta(minutes=15)
+# Scans are accepted from this long before start_time until this long after end_time
+CHECKIN_OPENS_BEFORE = timedelta(minutes=30)
+CHECKOUT_CLOSES_AFTER = timedelta(minutes=30)
+
 class TeacherApplication(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -29,6 +37,7 @@ class TeacherApplication(models.Model):
     review_comment = models.TextField(blank=True)
     expected_salary = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     resume_text = models.TextField(blank=True)
+    indexed_at = models.DateTimeField(null=True, blank=True)  # Set when CV text has been extracted and indexed
 
     def __str__(self):
         return f"{self.full_name} - {self.status}"
@@ -96,10 +105,29 @@ class Schedule(models.Model):
     semester = models.ForeignKey('core.Semester', on_delete=models.SET_NULL, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, choices=[('Planned', 'Planned'), ('Ongoing', 'Ongoing'), ('Completed', 'Completed')])
+    finalized_at = models.DateTimeField(null=True, blank=True)  # Set once absent rows have been created
 
     def __str__(self):
         return f"{self.teacher.full_name} - {self.subject} - {self.date}"
 
+    @property
+    def start_datetime(self):
+        return timezone.make_aware(datetime.combine(self.date, self.start_time))
+
+    @property
+    def end_datetime(self):
+        return timezone.make_aware(datetime.combine(self.date, self.end_time))
+
+    def checkin_status(self, at):
+        return 'late' if at > self.start_datetime + LATE_GRACE_PERIOD else 'present'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'end_time'], name='lecturer_sched_date_end_idx'),
+            models.Index(fields=['class_obj', 'date', 'start_time'], name='lecturer_sched_class_date_idx'),
+            models.Index(fields=['teacher', 'date', 'start_time'], name='lecturer_sched_tchr_date_idx'),
+        ]
+
 class QRCodeSession(models.Model):
     schedule = models.OneToOneField(Schedule, on_delete=models.CASCADE)
     token = models.CharField(max_length=255, unique=True)
@@ -113,6 +141,11 @@ class QRCodeSession(models.Model):
     def __str__(self):
         return f"QR Session for {self.schedule}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expiration_time'], name='lecturer_qr_expiration_idx'),
+        ]
+
 class TeacherAttendance(models.Model):
     teacher = models.ForeignKey(TeacherProfile, on_delete=models.CASCADE)
     schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE)
@@ -132,3 +165,119 @@ class TeacherAttendance(models.Model):
 
     def __str__(self):
         return f"{self.teacher.full_name} - {self.schedule.date} - {self.status}"
+
+class OfflineScan(models.Model):
+    """Idempotency record for scan events uploaded in batches by offline devices."""
+    KIND_CHOICES = [
+        ('student', 'Student'),
+        ('teacher', 'Teacher'),
+    ]
+    ACTION_CHOICES = [
+        ('checkin', 'Check-in'),
+        ('checkout', 'Check-out'),
+    ]
+
+    idempotency_key = models.CharField(max_length=64, unique=True)
+    device_id = models.CharField(max_length=100, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='checkin')
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='offline_scans')
+    client_time = models.DateTimeField()
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.idempotency_key} - {self.kind} {self.action}"
+
+class TeacherAttendanceDaily(models.Model):
+    """Per-teacher, per-day totals of TeacherAttendance, kept current by signals."""
+    teacher = models.ForeignKey(TeacherProfile, on_delete=models.CASCADE, related_name='attendance_days')
+    date = models.DateField()
+    sessions = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    total_duration = models.DurationField(default=timedelta)
+    late_minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.teacher.full_name} - {self.date}"
+
+    class Meta:
+        unique_together = ('teacher', 'date')  # also serves (teacher, date) range lookups
+        indexes = [
+            models.Index(fields=['date'], name='lecturer_tad_date_idx'),
+        ]
+
+class ApplicationIndexTerm(models.Model):
+    """Inverted index entry: how strongly a term is associated with an application."""
+    application = models.ForeignKey(TeacherApplication, on_delete=models.CASCADE, related_name='index_terms')
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.term} -> {self.application_id} ({self.weight})"
+
+    class Meta:
+        unique_together = ('term', 'application')  # term-first so lookups by term use the index
+
+class PayrollRun(models.Model):
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total_net_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    teacher_count = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Payroll {self.year}-{self.month:02d} (#{self.pk})"
+
+    class Meta:
+        ordering = ['-year', '-month', '-created_at']
+
+
+class PayrollLine(models.Model):
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name='lines')
+    teacher = models.ForeignKey(TeacherProfile, on_delete=models.CASCADE)
+    contract = models.ForeignKey(Contract, on_delete=models.SET_NULL, null=True)
+    contract_type = models.CharField(max_length=50)
+    salary = models.DecimalField(max_digits=10, decimal_places=2)
+    prorate = models.DecimalField(max_digits=5, decimal_places=4, default=1)
+    hours_taught = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    late_minutes = models.PositiveIntegerField(default=0)
+    absent_sessions = models.PositiveIntegerField(default=0)
+    base_pay = models.DecimalField(max_digits=12, decimal_places=2)
+    late_deduction = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    absence_deduction = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    net_pay = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.run} - {self.teacher.full_name}: {self.net_pay}"
+
+class TeacherWorkload(models.Model):
+    """Scheduled teaching per teacher and ISO week, kept current by Schedule signals."""
+    teacher = models.ForeignKey(TeacherProfile, on_delete=models.CASCADE, related_name='workload')
+    iso_year = models.PositiveIntegerField()
+    iso_week = models.PositiveSmallIntegerField()
+    semester = models.ForeignKey('core.Semester', on_delete=models.CASCADE, null=True, blank=True)
+    minutes = models.IntegerField(default=0)
+    sessions = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.teacher.full_name} - {self.iso_year}-W{self.iso_week:02d}: {self.minutes} min"
+
+    class Meta:
+        unique_together = ('teacher', 'iso_year', 'iso_week', 'semester')
+        constraints = [
+            # unique_together treats NULL semesters as distinct
+            models.UniqueConstraint(
+                fields=['teacher', 'iso_year', 'iso_week'], condition=models.Q(semester__isnull=True),
+                name='lecturer_workload_unique_no_sem',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['iso_year', 'iso_week'], name='lecturer_workload_week_idx'),
+            models.Index(fields=['semester', 'teacher'], name='lecturer_workload_sem_idx'),
+        ]
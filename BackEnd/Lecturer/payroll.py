@@ -0,0 +1,200 @@
+"""
+Monthly payroll from contracts and teacher attendance.
+
+One month of active contracts and TeacherAttendance rows is loaded into
+NumPy arrays and every contract is priced in a single vectorized pass:
+
+* Full-time: `salary` is monthly, prorated by the share of the contract's
+  working days in the month that fall inside the contract period. Lateness
+  and absences are deducted at the equivalent hourly rate.
+* Part-time: `salary` is an hourly rate, paid on the hours recorded in
+  TeacherAttendance.duration for the contract's subject.
+
+Requires NumPy.
+"""
+import calendar
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.exports import stream_csv
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .models import Contract, TeacherAttendance, PayrollRun, PayrollLine
+
+HOURS_PER_WORKING_DAY = 8
+WEEKDAYS = {name.lower(): index for index, name in enumerate(calendar.day_name)}
+WEEKDAYS.update({name.lower(): index for index, name in enumerate(calendar.day_abbr)})
+STATUS_CODES = {'present': 0, 'late': 1, 'absent': 2}
+REPORT_COLUMNS = [
+    'teacher', 'teacher_name', 'contract', 'contract_type', 'salary', 'prorate',
+    'hours_taught', 'late_minutes', 'absent_sessions', 'base_pay',
+    'late_deduction', 'absence_deduction', 'net_pay',
+]
+
+
+class PayrollError(Exception):
+    pass
+
+
+def _weekday_mask(working_days):
+    """7-element boolean mask (Monday first) from a contract's working_days list."""
+    mask = [False] * 7
+    for day in working_days or []:
+        if isinstance(day, int) and 0 <= day < 7:
+            mask[day] = True
+        elif isinstance(day, str) and day.strip().lower() in WEEKDAYS:
+            mask[WEEKDAYS[day.strip().lower()]] = True
+    return mask
+
+
+def _naive(value):
+    return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+
+
+def compute_payroll(year, month):
+    """
+    Price every contract active during the month.
+    Returns (contracts, results) where results maps column name to a NumPy array.
+    """
+    if np is None:
+        raise PayrollError('NumPy is required for payroll computation')
+    month_start = date(year, month, 1)
+    month_end = date(year, month, calendar.monthrange(year, month)[1])
+
+    contracts = list(Contract.objects.filter(
+        status__in=['Active', 'Ended'],
+        contract_start__lte=month_end,
+        contract_end__gte=month_start,
+    ).select_related('teacher').only(
+        'id', 'teacher_id', 'teacher__full_name', 'subject_id', 'salary',
+        'contract_type', 'contract_start', 'contract_end', 'working_days',
+    ).order_by('teacher_id', 'id'))
+    n = len(contracts)
+    if n == 0:
+        return contracts, {}
+
+    salary = np.array([float(c.salary) for c in contracts])
+    full_time = np.array([c.contract_type == 'Full-time' for c in contracts])
+    starts = np.array([c.contract_start for c in contracts], dtype='datetime64[D]')
+    ends = np.array([c.contract_end for c in contracts], dtype='datetime64[D]')
+    pattern = np.array([_weekday_mask(c.working_days) for c in contracts], dtype=bool)
+
+    # Working days of the month, per contract, inside and outside the contract period
+    days = np.arange(np.datetime64(month_start), np.datetime64(month_end) + 1)
+    weekday = (days.astype('int64') + 3) % 7  # 1970-01-01 was a Thursday
+    on_pattern = pattern[:, weekday]
+    in_period = (days >= starts[:, None]) & (days <= ends[:, None])
+    scheduled_days = on_pattern.sum(axis=1)
+    covered_days = (on_pattern & in_period).sum(axis=1)
+    calendar_share = in_period.sum(axis=1) / len(days)
+    prorate = np.where(scheduled_days > 0, covered_days / np.maximum(scheduled_days, 1), calendar_share)
+
+    # Attendance rows of the month, mapped onto the contract for (teacher, subject)
+    contract_index = {}
+    for index, contract in enumerate(contracts):
+        contract_index.setdefault((contract.teacher_id, contract.subject_id), index)
+    rows = list(TeacherAttendance.objects.filter(
+        schedule__date__range=(month_start, month_end),
+        teacher_id__in={c.teacher_id for c in contracts},
+    ).values_list(
+        'teacher_id', 'schedule__subject_id', 'status', 'duration', 'checkin_time',
+        'schedule__date', 'schedule__start_time', 'schedule__end_time',
+    ))
+
+    hours = np.zeros(n)
+    late_minutes = np.zeros(n)
+    absent_sessions = np.zeros(n)
+    absent_hours = np.zeros(n)
+    if rows:
+        owner = np.array([contract_index.get((r[0], r[1]), -1) for r in rows])
+        status = np.array([STATUS_CODES.get(r[2], 2) for r in rows])
+        duration = np.array([r[3].total_seconds() if r[3] else 0.0 for r in rows])
+        checkin = np.array(
+            [_naive(r[4]) if r[4] else None for r in rows], dtype='datetime64[s]'
+        )
+        start = np.array([datetime.combine(r[5], r[6]) for r in rows], dtype='datetime64[s]')
+        end = np.array([datetime.combine(r[5], r[7]) for r in rows], dtype='datetime64[s]')
+
+        lateness = (checkin - start).astype('timedelta64[s]').astype('float64') / 60
+        lateness = np.where((status == 1) & ~np.isnat(checkin), np.maximum(lateness, 0), 0)
+        session_hours = (end - start).astype('timedelta64[s]').astype('float64') / 3600
+
+        matched = owner >= 0
+        owner = owner[matched]
+        hours = np.bincount(owner, weights=duration[matched] / 3600, minlength=n)
+        late_minutes = np.bincount(owner, weights=np.floor(lateness[matched]), minlength=n)
+        is_absent = (status == 2)[matched]
+        absent_sessions = np.bincount(owner, weights=is_absent.astype('float64'), minlength=n)
+        absent_hours = np.bincount(
+            owner, weights=np.where(is_absent, session_hours[matched], 0), minlength=n
+        )
+
+    monthly_hours = np.maximum(scheduled_days, 1) * HOURS_PER_WORKING_DAY
+    hourly_rate = np.where(full_time, salary / monthly_hours, salary)
+    base_pay = np.where(full_time, salary * prorate, hours * salary)
+    late_deduction = np.where(full_time, late_minutes / 60 * hourly_rate, 0)
+    absence_deduction = np.where(full_time, absent_hours * hourly_rate, 0)
+    net_pay = np.maximum(base_pay - late_deduction - absence_deduction, 0)
+
+    return contracts, {
+        'salary': salary,
+        'prorate': np.round(prorate, 4),
+        'hours_taught': np.round(hours, 2),
+        'late_minutes': late_minutes.astype('int64'),
+        'absent_sessions': absent_sessions.astype('int64'),
+        'base_pay': np.round(base_pay, 2),
+        'late_deduction': np.round(late_deduction, 2),
+        'absence_deduction': np.round(absence_deduction, 2),
+        'net_pay': np.round(net_pay, 2),
+    }
+
+
+def _money(value, places='0.01'):
+    return Decimal(str(value)).quantize(Decimal(places))
+
+
+def run_payroll(year, month, user=None):
+    """Compute the month's payroll and persist it as a PayrollRun with one line per contract."""
+    contracts, results = compute_payroll(year, month)
+    with transaction.atomic():
+        run = PayrollRun.objects.create(year=year, month=month, created_by=user)
+        lines = [
+            PayrollLine(
+                run=run,
+                teacher_id=contract.teacher_id,
+                contract=contract,
+                contract_type=contract.contract_type,
+                salary=contract.salary,
+                prorate=_money(results['prorate'][i], '0.0001'),
+                hours_taught=_money(results['hours_taught'][i]),
+                late_minutes=int(results['late_minutes'][i]),
+                absent_sessions=int(results['absent_sessions'][i]),
+                base_pay=_money(results['base_pay'][i]),
+                late_deduction=_money(results['late_deduction'][i]),
+                absence_deduction=_money(results['absence_deduction'][i]),
+                net_pay=_money(results['net_pay'][i]),
+            )
+            for i, contract in enumerate(contracts)
+        ]
+        PayrollLine.objects.bulk_create(lines, batch_size=1000)
+        run.total_net_pay = sum((line.net_pay for line in lines), Decimal('0.00'))
+        run.teacher_count = len({contract.teacher_id for contract in contracts})
+        run.save(update_fields=['total_net_pay', 'teacher_count'])
+    return run
+
+
+def stream_report(run, chunk_size=2000):
+    """The lines of a payroll run as UTF-8 CSV, streamed one row at a time."""
+    lines = run.lines.order_by('teacher__full_name', 'id').values_list(
+        'teacher_id', 'teacher__full_name', 'contract_id', 'contract_type', 'salary',
+        'prorate', 'hours_taught', 'late_minutes', 'absent_sessions', 'base_pay',
+        'late_deduction', 'absence_deduction', 'net_pay',
+    )
+    return stream_csv(REPORT_COLUMNS, lines.iterator(chunk_size=chunk_size))
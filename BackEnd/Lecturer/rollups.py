@@ -0,0 +1,98 @@
+"""
+Daily per-teacher attendance rollups.
+
+The attendance report reads TeacherAttendanceDaily instead of scanning
+every TeacherAttendance row. Whenever attendance for a teacher changes,
+that teacher's rollup for the schedule date is recomputed from the few
+rows it covers.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import TeacherAttendance, TeacherAttendanceDaily, Schedule
+
+
+def _lateness_minutes(row):
+    if row['status'] != 'late' or row['checkin_time'] is None:
+        return 0
+    start = Schedule(date=row['schedule__date'], start_time=row['schedule__start_time']).start_datetime
+    return max(0, int((row['checkin_time'] - start).total_seconds() // 60))
+
+
+def refresh_teacher_rollups(pairs):
+    """Recompute the rollups for an iterable of (teacher_id, date) pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+
+    totals = defaultdict(lambda: {
+        'sessions': 0, 'present': 0, 'late': 0, 'absent': 0,
+        'total_duration': timedelta(), 'late_minutes': 0,
+    })
+    # Match on the teachers and dates separately and keep the exact pairs here:
+    # OR-ing one clause per pair overflows SQLite's expression depth on large batches
+    teacher_ids = {teacher_id for teacher_id, _ in pairs}
+    days = {day for _, day in pairs}
+    rows = TeacherAttendance.objects.filter(
+        teacher_id__in=teacher_ids, schedule__date__in=days
+    ).values(
+        'teacher_id', 'schedule__date', 'schedule__start_time',
+        'status', 'checkin_time', 'duration',
+    )
+    for row in rows:
+        key = (row['teacher_id'], row['schedule__date'])
+        if key not in pairs:
+            continue
+        total = totals[key]
+        total['sessions'] += 1
+        total[row['status']] += 1
+        if row['duration']:
+            total['total_duration'] += row['duration']
+        total['late_minutes'] += _lateness_minutes(row)
+
+    with transaction.atomic():
+        emptied = pairs - totals.keys()
+        if emptied:
+            stale = [
+                pk for pk, teacher_id, day in TeacherAttendanceDaily.objects.filter(
+                    teacher_id__in=teacher_ids, date__in=days
+                ).values_list('id', 'teacher_id', 'date')
+                if (teacher_id, day) in emptied
+            ]
+            TeacherAttendanceDaily.objects.filter(id__in=stale).delete()
+        if totals:
+            TeacherAttendanceDaily.objects.bulk_create(
+                [
+                    TeacherAttendanceDaily(teacher_id=teacher_id, date=day, **total)
+                    for (teacher_id, day), total in totals.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['teacher', 'date'],
+                update_fields=['sessions', 'present', 'late', 'absent',
+                               'total_duration', 'late_minutes', 'updated_at'],
+            )
+
+
+def rebuild_teacher_rollups(start=None, end=None, batch_size=500):
+    """Recompute rollups for every (teacher, date) with attendance, optionally within a date range."""
+    schedules = Schedule.objects.filter(teacherattendance__isnull=False)
+    if start:
+        schedules = schedules.filter(date__gte=start)
+    if end:
+        schedules = schedules.filter(date__lte=end)
+    pairs = schedules.values_list('teacherattendance__teacher_id', 'date').distinct()
+
+    batch = []
+    count = 0
+    for pair in pairs.iterator(chunk_size=batch_size):
+        batch.append(pair)
+        if len(batch) >= batch_size:
+            refresh_teacher_rollups(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        refresh_teacher_rollups(batch)
+        count += len(batch)
+    return count
@@ -0,0 +1,127 @@
+"""
+Periodic maintenance of QR session and schedule state.
+
+QRCodeSession.status and Schedule.status never change on their own, so a
+worker started with `manage.py run_scheduler` moves them forward with
+set-based UPDATEs on every tick and finalizes attendance for sessions that
+have ended, then encodes the finalized sessions as attendance bitmaps.
+Several workers may run; only the one holding the lease in
+core.SchedulerLock does any work. The lease is renewed between the jobs of
+a tick, and a worker that fails to renew it abandons the rest of the tick,
+so a long catch-up tick never overlaps with a new leader's.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.leases import acquire_lease, release_lease, renew_lease
+from student import bitmaps
+from student.finalization import ended_schedules, finalize_schedules
+from .models import Schedule, QRCodeSession
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = 'lecturer-scheduler'
+DEFAULT_INTERVAL = 30  # seconds
+# After the first tick, only schedules this recent are re-examined
+LOOKBACK = timedelta(days=2)
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def expire_qr_sessions(now):
+    return QRCodeSession.objects.filter(
+        status='active', expiration_time__lte=now
+    ).update(status='expired', updated_at=now)
+
+
+def advance_schedules(now, since=None):
+    """Move schedules to Ongoing or Completed based on the clock; returns (started, completed)."""
+    local = timezone.localtime(now)
+    today, current_time = local.date(), local.time()
+
+    ended = Schedule.objects.filter(
+        Q(date__lt=today) | Q(date=today, end_time__lte=current_time)
+    ).exclude(status='Completed')
+    if since is not None:
+        ended = ended.filter(date__gte=since)
+    completed = ended.update(status='Completed', updated_at=now)
+
+    started = Schedule.objects.filter(
+        date=today, start_time__lte=current_time, end_time__gt=current_time
+    ).exclude(status__in=['Ongoing', 'Completed']).update(status='Ongoing', updated_at=now)
+    return started, completed
+
+
+def run_tick(now=None, full=False, checkpoint=None):
+    """
+    Run every periodic task once. `full` re-examines the whole history instead
+    of LOOKBACK; `checkpoint` is called between tasks and may raise to stop.
+    """
+    now = now or timezone.now()
+    checkpoint = checkpoint or (lambda: None)
+    since = None if full else timezone.localdate(now) - LOOKBACK
+    expired = expire_qr_sessions(now)
+    checkpoint()
+    started, completed = advance_schedules(now, since=since)
+    checkpoint()
+    finalized, absent_rows = finalize_schedules(ended_schedules(now, since=since))
+    checkpoint()
+    built = bitmaps.build_bitmaps(bitmaps.pending_sessions(since)) if bitmaps.np is not None else 0
+    return {
+        'expired_sessions': expired,
+        'started_schedules': started,
+        'completed_schedules': completed,
+        'finalized_schedules': finalized,
+        'absent_rows': absent_rows,
+        'attendance_bitmaps': built,
+    }
+
+
+class SchedulerWorker:
+    def __init__(self, interval=DEFAULT_INTERVAL, owner=None, report=None):
+        self.interval = interval
+        self.lease_ttl = timedelta(seconds=interval * 3)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.report = report or (lambda counts: logger.info('Scheduler tick: %s', counts))
+        self._stop = threading.Event()
+
+    def run(self, once=False):
+        caught_up = False
+        try:
+            while not self._stop.is_set():
+                try:
+                    if acquire_lease(LOCK_NAME, self.owner, self.lease_ttl):
+                        self.report(run_tick(full=not caught_up, checkpoint=self._renew))
+                        caught_up = True
+                    else:
+                        # Whoever takes over later must catch up from scratch
+                        caught_up = False
+                except LeaseLost:
+                    logger.warning('Scheduler lease lost during a tick; the rest of it was skipped')
+                    caught_up = False
+                except Exception:
+                    # Keep the loop (and the lease) alive; the next tick retries
+                    logger.exception('Scheduler tick failed')
+                finally:
+                    close_old_connections()
+                if once:
+                    break
+                self._stop.wait(self.interval)
+        finally:
+            release_lease(LOCK_NAME, self.owner)
+
+    def _renew(self):
+        if not renew_lease(LOCK_NAME, self.owner, self.lease_ttl):
+            raise LeaseLost(LOCK_NAME)
+
+    def stop(self):
+        self._stop.set()
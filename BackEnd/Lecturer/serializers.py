@@ -1,32 +1,88 @@
 from rest_framework import serializers
-from .models import TeacherApplication, TeacherProfile, Contract, Schedule, QRCodeSession, TeacherAttendance
+from core.fieldsets import DynamicFieldsModelSerializer
+from .models import (
+    TeacherApplication, TeacherProfile, Contract, Schedule, QRCodeSession, TeacherAttendance,
+    PayrollRun, PayrollLine
+)
 
-class TeacherApplicationSerializer(serializers.ModelSerializer):
+class TeacherApplicationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = TeacherApplication
         fields = '__all__'
 
-class TeacherProfileSerializer(serializers.ModelSerializer):
+class TeacherProfileSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = TeacherProfile
         fields = '__all__'
+        expandable_fields = {
+            'department': 'admins.serializers.DepartmentSerializer',
+            'major': 'admins.serializers.MajorSerializer',
+        }
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Contract
         fields = '__all__'
+        expandable_fields = {
+            'teacher': 'lecturer.serializers.TeacherProfileSerializer',
+            'subject': 'admins.serializers.SubjectSerializer',
+            'department': 'admins.serializers.DepartmentSerializer',
+        }
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Schedule
         fields = '__all__'
+        expandable_fields = {
+            'teacher': 'lecturer.serializers.TeacherProfileSerializer',
+            'subject': 'admins.serializers.SubjectSerializer',
+            'class_obj': 'admins.serializers.ClassSerializer',
+        }
 
-class QRCodeSessionSerializer(serializers.ModelSerializer):
+class QRCodeSessionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = QRCodeSession
         fields = '__all__'
+        expandable_fields = {
+            'schedule': 'lecturer.serializers.ScheduleSerializer',
+        }
 
-class TeacherAttendanceSerializer(serializers.ModelSerializer):
+class TeacherAttendanceSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = TeacherAttendance
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        expandable_fields = {
+            'teacher': 'lecturer.serializers.TeacherProfileSerializer',
+            'schedule': 'lecturer.serializers.ScheduleSerializer',
+        }
+
+class PayrollRunSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = PayrollRun
+        fields = '__all__'
+
+class PayrollLineSerializer(DynamicFieldsModelSerializer):
+    teacher_name = serializers.CharField(source='teacher.full_name', read_only=True)
+
+    class Meta:
+        model = PayrollLine
+        fields = '__all__'
+
+
+class ScanEventSerializer(serializers.Serializer):
+    idempotency_key = serializers.CharField(max_length=64)
+    type = serializers.ChoiceField(choices=['student', 'teacher'])
+    action = serializers.ChoiceField(choices=['checkin', 'checkout'], default='checkin')
+    schedule = serializers.IntegerField()
+    student = serializers.IntegerField(required=False)
+    client_time = serializers.DateTimeField()
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    signature = serializers.CharField()
+
+    def validate(self, data):
+        if data['type'] == 'student':
+            if 'student' not in data:
+                raise serializers.ValidationError({'student': 'This field is required for student scans.'})
+            if data['action'] != 'checkin':
+                raise serializers.ValidationError({'action': 'Students can only check in.'})
+        return data
@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from student.counters import refresh_counters
+from student.models import StudentAttendance
+from .cv_index import schedule_indexing
+from .live import publish_attendance
+from .models import Schedule, TeacherAttendance, TeacherApplication
+from .rollups import refresh_teacher_rollups
+from .workload import contribution, record_change
+
+# Saving only these fields does not change what is indexed for an application
+UNINDEXED_FIELDS = {'status', 'reviewed_by', 'review_comment', 'updated_at', 'resume_text', 'indexed_at'}
+
+
+@receiver(pre_save, sender=TeacherAttendance)
+def remember_teacher_rollup(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = TeacherAttendance.objects.filter(pk=instance.pk).values_list(
+            'teacher_id', 'schedule__date'
+        ).first()
+    instance._previous_rollup = previous
+
+
+@receiver(post_save, sender=TeacherAttendance)
+@receiver(post_delete, sender=TeacherAttendance)
+def update_teacher_rollup(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pairs = []
+    day = Schedule.objects.filter(id=instance.schedule_id).values_list('date', flat=True).first()
+    if day is not None:
+        pairs.append((instance.teacher_id, day))
+    # A row moved to another teacher or session leaves its old day to recount
+    previous = getattr(instance, '_previous_rollup', None)
+    if previous is not None:
+        pairs.append(previous)
+    refresh_teacher_rollups(pairs)
+
+
+@receiver(post_save, sender=TeacherAttendance)
+def publish_teacher_attendance(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publish_attendance('teacher', [instance])
+
+
+@receiver(post_save, sender=TeacherApplication)
+def index_application(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= UNINDEXED_FIELDS:
+        return
+    transaction.on_commit(lambda: schedule_indexing(instance))
+
+
+@receiver(pre_save, sender=Schedule)
+def remember_schedule_state(sender, instance, raw=False, **kwargs):
+    previous, counters, timing = None, None, None
+    if instance.pk and not raw:
+        old = Schedule.objects.filter(pk=instance.pk).only(
+            'teacher_id', 'date', 'semester_id', 'subject_id', 'start_time', 'end_time'
+        ).first()
+        if old is not None:
+            previous = contribution(old)
+            counters = (old.subject_id, old.semester_id)
+            timing = (old.date, old.start_time)
+    instance._previous_workload = previous
+    instance._previous_counters = counters
+    instance._previous_timing = timing
+
+
+@receiver(post_save, sender=Schedule)
+def update_workload_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_change(getattr(instance, '_previous_workload', None), contribution(instance))
+
+
+@receiver(post_delete, sender=Schedule)
+def update_workload_on_delete(sender, instance, **kwargs):
+    record_change(contribution(instance), None)
+
+
+@receiver(post_save, sender=Schedule)
+def move_attendance_counters(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_counters', None)
+    if raw or previous is None or previous == (instance.subject_id, instance.semester_id):
+        return
+    # Attendance of this session now counts towards another subject or semester
+    students = set(StudentAttendance.objects.filter(schedule=instance).values_list('student_id', flat=True))
+    refresh_counters(
+        [(student_id, *previous) for student_id in students]
+        + [(student_id, instance.subject_id, instance.semester_id) for student_id in students]
+    )
+
+
+@receiver(post_save, sender=Schedule)
+def move_teacher_rollups(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_timing', None)
+    if raw or previous is None or previous == (instance.date, instance.start_time):
+        return
+    # Attendance of this session now belongs to another day, or its lateness has changed
+    teachers = set(TeacherAttendance.objects.filter(schedule=instance).values_list('teacher_id', flat=True))
+    refresh_teacher_rollups(
+        [(teacher_id, previous[0]) for teacher_id in teachers]
+        + [(teacher_id, instance.date) for teacher_id in teachers]
+    )
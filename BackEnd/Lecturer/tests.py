@@ -1,3 +1,638 @@
+import asyncio
+import os
+import tempfile
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admins.models import Department, Subject
+from core.leases import acquire_lease
+from core.models import SchedulerLock
+from core.testing import make_campus, make_schedule, make_teacher, make_user
+from student.models import StudentAttendance
+from users.models import User
+from . import cv_index, live, scheduler
+from . import payroll
+from .applications import ApprovalError, approve_application
+from .attendance_sheet import build_sheet
+from .batch_upload import device_key, sign_event
+from .models import (
+    Contract, OfflineScan, QRCodeSession, Schedule, TeacherApplication, TeacherAttendance,
+    TeacherAttendanceDaily, TeacherWorkload,
+)
+from .rollups import rebuild_teacher_rollups
+from .workload import apply_delta, contribution, rebuild_workload
+
+
+def scan_event(key, idempotency_key, schedule, kind, action, at, student=None):
+    client_time = at.isoformat()
+    event = {
+        'idempotency_key': idempotency_key, 'type': kind, 'action': action,
+        'schedule': schedule.id, 'client_time': client_time,
+        'signature': sign_event(key, idempotency_key, kind, action, schedule.id, student, client_time),
+    }
+    if student is not None:
+        event['student'] = student
+    return event
+
+
+class AttendanceBatchTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3, day=timezone.localdate() - timedelta(days=1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.campus.teacher.user)
+        self.key = self.client.post(
+            '/api/lecturer/attendance-batch/key/', {'device_id': 'tablet-1'}, format='json'
+        ).data['key']
+
+    def upload(self, events):
+        return self.client.post(
+            '/api/lecturer/attendance-batch/', {'events': events, 'device_id': 'tablet-1'}, format='json'
+        )
+
+    def test_accepts_signed_events_and_reports_duplicates(self):
+        schedule = self.campus.schedule
+        start = schedule.start_datetime
+        events = [
+            scan_event(self.key, 't-in', schedule, 'teacher', 'checkin', start + timedelta(minutes=20)),
+            scan_event(self.key, 't-out', schedule, 'teacher', 'checkout', start + timedelta(minutes=110)),
+        ] + [
+            scan_event(self.key, f's{student.id}', schedule, 'student', 'checkin', start, student.id)
+            for student in self.campus.students
+        ]
+        response = self.upload(events)
+        self.assertEqual(len(response.data['accepted']), 5, response.data)
+        teacher_row = TeacherAttendance.objects.get()
+        self.assertEqual((teacher_row.status, teacher_row.duration), ('late', timedelta(minutes=90)))
+        self.assertEqual(StudentAttendance.objects.filter(teacher_attendance=teacher_row).count(), 3)
+
+        response = self.upload(events)
+        self.assertEqual((len(response.data['accepted']), len(response.data['duplicates'])), (0, 5))
+        self.assertEqual(OfflineScan.objects.count(), 5)
+
+    def test_rejects_bad_signatures(self):
+        schedule = self.campus.schedule
+        student = self.campus.students[0]
+        tampered = scan_event(self.key, 'a', schedule, 'student', 'checkin', schedule.start_datetime, student.id)
+        tampered['signature'] = '0' * 64
+        # The QR token is shown to every student, so it must not work as a key
+        qr_signed = scan_event(
+            self.campus.session.token, 'b', schedule, 'student', 'checkin', schedule.start_datetime, student.id
+        )
+        other_device = scan_event(
+            device_key(self.campus.teacher.user.pk, 'tablet-2'), 'c', schedule, 'student', 'checkin',
+            schedule.start_datetime, student.id,
+        )
+        response = self.upload([tampered, qr_signed, other_device])
+        self.assertEqual(response.data['accepted'], [])
+        self.assertEqual({item['error'] for item in response.data['rejected']}, {'Invalid signature'})
+        self.assertFalse(StudentAttendance.objects.exists())
+
+    def test_students_cannot_get_a_device_key(self):
+        client = APIClient()
+        client.force_authenticate(self.campus.students[0].user)
+        response = client.post('/api/lecturer/attendance-batch/key/', {'device_id': 'phone'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class TeacherRollupTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=0, day=timezone.localdate() - timedelta(days=1))
+        self.schedule = self.campus.schedule
+
+    def test_rollup_follows_attendance_writes(self):
+        row = TeacherAttendance.objects.create(
+            teacher=self.campus.teacher, schedule=self.schedule, status='late',
+            checkin_time=self.schedule.start_datetime + timedelta(minutes=20), duration=timedelta(minutes=90),
+        )
+        daily = TeacherAttendanceDaily.objects.get()
+        self.assertEqual((daily.sessions, daily.late, daily.late_minutes), (1, 1, 20))
+        row.delete()
+        self.assertFalse(TeacherAttendanceDaily.objects.exists())
+
+    def test_moving_a_row_recounts_the_old_day(self):
+        row = TeacherAttendance.objects.create(teacher=self.campus.teacher, schedule=self.schedule, status='present')
+        other_teacher = make_teacher(self.campus.department, self.campus.major)
+        other = make_schedule(
+            other_teacher, self.campus.subject, self.campus.class_obj, self.schedule.date - timedelta(days=1)
+        )
+        row.teacher, row.schedule = other_teacher, other
+        row.save()
+        self.assertEqual(
+            list(TeacherAttendanceDaily.objects.values_list('teacher_id', 'date', 'present')),
+            [(other_teacher.id, other.date, 1)],
+        )
+        TeacherAttendanceDaily.objects.all().delete()
+        self.assertEqual(rebuild_teacher_rollups(), 1)
+
+    def test_rescheduling_moves_the_rollup(self):
+        TeacherAttendance.objects.create(
+            teacher=self.campus.teacher, schedule=self.schedule, status='late',
+            checkin_time=self.schedule.start_datetime + timedelta(minutes=20),
+        )
+        self.schedule.start_time = time(7, 50)
+        self.schedule.save()
+        self.assertEqual(TeacherAttendanceDaily.objects.get().late_minutes, 30)
+        new_day = self.schedule.date - timedelta(days=2)
+        self.schedule.date = new_day
+        self.schedule.save()
+        self.assertEqual(list(TeacherAttendanceDaily.objects.values_list('date', 'late')), [(new_day, 1)])
+
+    def test_fixture_loads_leave_rollups_alone(self):
+        # Raw saves skip auto_now and auto_now_add, as in loaddata
+        now = timezone.now()
+        row = TeacherAttendance(teacher=self.campus.teacher, schedule=self.schedule, status='present',
+                                created_at=now, updated_at=now)
+        row.save_base(raw=True)
+        self.schedule.date -= timedelta(days=1)
+        self.schedule.save_base(raw=True)
+        self.assertFalse(TeacherAttendanceDaily.objects.exists())
+
+    def test_report_reads_rollups_and_validates_filters(self):
+        TeacherAttendance.objects.create(teacher=self.campus.teacher, schedule=self.schedule, status='present')
+        client = APIClient()
+        client.force_authenticate(self.campus.teacher.user)
+        start = (self.schedule.date - timedelta(days=3)).isoformat()
+        response = client.get('/api/lecturer/attendance-report/', {'start': start})
+        self.assertEqual(response.data['results'][0]['present'], 1)
+        response = client.get('/api/lecturer/attendance-report/', {'start': start, 'teacher': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SchedulerTests(TestCase):
+    def test_tick_expires_sessions_and_completes_schedules(self):
+        campus = make_campus(students=2, day=timezone.localdate() - timedelta(days=1))
+        QRCodeSession.objects.update(expiration_time=timezone.now() - timedelta(minutes=1))
+        counts = scheduler.run_tick(full=True)
+        self.assertEqual((counts['expired_sessions'], counts['completed_schedules']), (1, 1))
+        self.assertEqual((counts['finalized_schedules'], counts['absent_rows']), (1, 2))
+        self.assertEqual(Schedule.objects.get(pk=campus.schedule.pk).status, 'Completed')
+
+    def test_lease_has_one_holder(self):
+        self.assertTrue(acquire_lease('test', 'a', timedelta(seconds=60)))
+        self.assertFalse(acquire_lease('test', 'b', timedelta(seconds=60)))
+        self.assertTrue(acquire_lease('test', 'a', timedelta(seconds=60)))
+
+    def test_failed_tick_does_not_stop_the_worker(self):
+        reports = []
+        worker = scheduler.SchedulerWorker(interval=0, report=reports.append)
+        ticks = [ValueError('boom'), {'expired_sessions': 0}]
+
+        def tick(full=False, checkpoint=None):
+            result = ticks.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            worker.stop()
+            return result
+
+        with mock.patch.object(scheduler, 'run_tick', side_effect=tick), \
+                self.assertLogs('lecturer.scheduler', 'ERROR'):
+            worker.run()
+        self.assertEqual(reports, [{'expired_sessions': 0}])
+        self.assertEqual(SchedulerLock.objects.get(name=scheduler.LOCK_NAME).owner, '')
+
+    def test_tick_stops_when_the_lease_is_taken_over(self):
+        make_campus(students=2, day=timezone.localdate() - timedelta(days=1))
+        reports = []
+        worker = scheduler.SchedulerWorker(interval=0, owner='slow', report=reports.append)
+        advance = scheduler.advance_schedules
+
+        def slow_advance(*args, **kwargs):
+            # The lease runs out mid-tick and another worker takes it
+            SchedulerLock.objects.filter(name=scheduler.LOCK_NAME).update(expires_at=timezone.now())
+            self.assertTrue(acquire_lease(scheduler.LOCK_NAME, 'fast', timedelta(seconds=60)))
+            return advance(*args, **kwargs)
+
+        with mock.patch.object(scheduler, 'advance_schedules', side_effect=slow_advance), \
+                self.assertLogs('lecturer.scheduler', 'WARNING'):
+            worker.run(once=True)
+        self.assertEqual(reports, [])
+        self.assertFalse(StudentAttendance.objects.exists())
+        self.assertEqual(SchedulerLock.objects.get(name=scheduler.LOCK_NAME).owner, 'fast')
+
+
+def make_application(**extra):
+    fields = dict(
+        full_name='Ann Lee', gender='female', date_of_birth=date(1990, 1, 1), nationality='KH',
+        place_of_birth='Phnom Penh', degree='PhD', major_name='Computer Science', institution='MIT',
+        phone='012', email='ann@example.com', experience='machine learning research',
+        photo='photo.jpg', cv='cv.txt', certificate='cert.pdf',
+    )
+    fields.update(extra)
+    return TeacherApplication.objects.create(**fields)
+
+
+class CvIndexTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_docx_text_is_extracted(self):
+        with zipfile.ZipFile(self.path('cv.docx'), 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                '<w:body><w:p><w:r><w:t>Hello</w:t></w:r><w:r><w:t> world</w:t></w:r></w:p></w:body>'
+                '</w:document>'
+            ))
+        self.assertEqual(cv_index.extract_text(self.path('cv.docx')), 'Hello world')
+
+    def test_skipped_pdf_leaves_the_application_unindexed(self):
+        with open(self.path('notes.txt'), 'w') as handle:
+            handle.write('compilers')
+        application = make_application()
+        with mock.patch.object(cv_index, 'PdfReader', None), self.assertLogs('lecturer.cv_index', 'WARNING'):
+            text, complete = cv_index.extract_documents([self.path('notes.txt'), self.path('cv.pdf')])
+        self.assertEqual((text, complete), ('compilers', False))
+        cv_index.store_index(application, text, complete)
+        application.refresh_from_db()
+        self.assertIsNone(application.indexed_at)
+        self.assertEqual(application.resume_text, 'compilers')
+
+        cv_index.store_index(application, 'compilers and pdfs')
+        application.refresh_from_db()
+        self.assertIsNotNone(application.indexed_at)
+
+    def test_pool_workers_are_spawned(self):
+        with open(self.path('cv.txt'), 'w') as handle:
+            handle.write('compilers')
+        application = make_application(cv='cv.txt', certificate='')
+        self.assertEqual(cv_index._get_pool()._mp_context.get_start_method(), 'spawn')
+        with self.settings(MEDIA_ROOT=self.directory.name):
+            self.assertEqual(cv_index.index_applications([application]), 1)
+        application.refresh_from_db()
+        self.assertEqual(application.resume_text, 'compilers')
+
+    def test_search_ranks_by_term_weight(self):
+        ann = make_application()
+        bob = make_application(full_name='Bob', email='bob@example.com', degree='MSc', experience='teaching')
+        cv_index.store_index(ann, 'deep learning and python')
+        cv_index.store_index(bob, 'python python python')
+        ranked = cv_index.search_applications('python', TeacherApplication.objects.all())
+        self.assertEqual([pk for pk, _ in ranked], [bob.pk, ann.pk])
+        ranked = cv_index.search_applications('machine learning', TeacherApplication.objects.all())
+        self.assertEqual(ranked[0][0], ann.pk)
+
+
+class ApplicationReviewTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=0)
+        self.application = make_application(major_name=self.campus.major.name)
+        self.admin = make_user(is_staff=True, is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def approve(self, **data):
+        return self.client.post(f'/api/lecturer/applications/{self.application.pk}/approve/', data, format='json')
+
+    def test_approve_promotes_the_application_once(self):
+        response = self.approve(hire_date='2026-09-01')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'approved')
+        teacher = User.objects.get(email=self.application.email).teacherprofile
+        self.assertEqual((teacher.major, teacher.hire_date, teacher.cv.name), (
+            self.campus.major, date(2026, 9, 1), self.application.cv.name,
+        ))
+        self.assertEqual(self.approve(hire_date='2026-09-01').status_code, 400)
+
+    def test_hire_date_is_required_and_validated(self):
+        for data in ({}, {'hire_date': 'next week'}, {'hire_date': '2026-13-40'}):
+            response = self.approve(**data)
+            self.assertEqual(response.status_code, 400, data)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'pending')
+
+    def test_concurrent_approval_of_the_same_email_is_a_review_error(self):
+        make_user(email=self.application.email)
+        # The other approval commits its user between the existence check and the insert
+        with mock.patch('lecturer.applications._email_taken', side_effect=[False, True]):
+            with self.assertRaisesMessage(ApprovalError, 'already exists'):
+                approve_application(self.application, self.admin, self.campus.major, date(2026, 9, 1))
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'pending')
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        with mock.patch('lecturer.applications._audit', side_effect=IntegrityError('audit log')):
+            with self.assertRaisesMessage(IntegrityError, 'audit log'):
+                approve_application(self.application, self.admin, self.campus.major, date(2026, 9, 1))
+        self.assertFalse(User.objects.filter(email=self.application.email).exists())
+
+
+@skipIf(payroll.np is None, 'payroll needs NumPy')
+class PayrollTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=0, day=date(2026, 9, 16))
+        teacher, department = self.campus.teacher, self.campus.department
+        # Mondays and Wednesdays from 16 September: 5 of the month's 9 such days
+        self.full_time = Contract.objects.create(
+            teacher=teacher, subject=self.campus.subject, department=department, salary=3000,
+            contract_start=date(2026, 9, 16), contract_end=date(2027, 1, 1),
+            working_days=['Monday', 'Wednesday'], contract_type='Full-time', status='Active',
+        )
+        TeacherAttendance.objects.create(
+            teacher=teacher, schedule=self.campus.schedule, status='late', duration=timedelta(hours=1),
+            checkin_time=timezone.make_aware(datetime(2026, 9, 16, 8, 30)),
+        )
+        # A part-time contract is paid by the hour for its own subject
+        databases = Subject.objects.create(name='Databases', code='DB1', department=department, semester_offered='1')
+        self.part_time = Contract.objects.create(
+            teacher=teacher, subject=databases, department=department, salary=20,
+            contract_start=date(2026, 1, 1), contract_end=date(2027, 1, 1),
+            working_days=['Friday'], contract_type='Part-time', status='Active',
+        )
+        evening = make_schedule(teacher, databases, self.campus.class_obj, date(2026, 9, 16),
+                                start=time(18), end=time(20))
+        TeacherAttendance.objects.create(
+            teacher=teacher, schedule=evening, status='present', duration=timedelta(hours=3),
+        )
+
+    def test_contracts_are_priced_from_attendance(self):
+        run = payroll.run_payroll(2026, 9)
+        lines = {line.contract_id: line for line in run.lines.all()}
+        full_time, part_time = lines[self.full_time.pk], lines[self.part_time.pk]
+        self.assertEqual(full_time.prorate, Decimal('0.5556'))
+        self.assertEqual((full_time.base_pay, full_time.late_minutes, full_time.late_deduction),
+                         (Decimal('1666.67'), 30, Decimal('20.83')))
+        self.assertEqual(full_time.net_pay, Decimal('1645.83'))
+        self.assertEqual((part_time.hours_taught, part_time.net_pay), (Decimal('3.00'), Decimal('60.00')))
+        self.assertEqual((run.teacher_count, run.total_net_pay), (1, Decimal('1705.83')))
+
+    def test_compute_and_report_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(make_user(is_staff=True, is_superuser=True))
+        response = client.post('/api/lecturer/payroll-runs/compute/', {'year': 2026, 'month': 13}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = client.post('/api/lecturer/payroll-runs/compute/', {'year': 2026, 'month': 9}, format='json')
+        self.assertEqual(response.status_code, 201)
+        report = client.get(f"/api/lecturer/payroll-runs/{response.data['id']}/report/")
+        self.assertEqual(report['Content-Type'], 'text/csv; charset=utf-8')
+        rows = b''.join(report.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(rows[0].split(',')[:3], ['teacher', 'teacher_name', 'contract'])
+        self.assertEqual(len(rows), 3)
+
+
+class WorkloadTests(TestCase):
+    def setUp(self):
+        # Monday 14 September 2026 is in ISO week 38
+        self.campus = make_campus(students=0, day=date(2026, 9, 14))
+        self.schedule = self.campus.schedule
+
+    def ledger(self):
+        return sorted(TeacherWorkload.objects.values_list('iso_week', 'minutes', 'sessions'))
+
+    def test_ledger_follows_schedule_changes(self):
+        self.assertEqual(self.ledger(), [(38, 120, 1)])
+        make_schedule(self.campus.teacher, self.campus.subject, self.campus.class_obj, date(2026, 9, 15),
+                      start=time(13), end=time(14, 30))
+        self.assertEqual(self.ledger(), [(38, 210, 2)])
+        self.schedule.date = date(2026, 9, 21)
+        self.schedule.save()
+        self.assertEqual(self.ledger(), [(38, 90, 1), (39, 120, 1)])
+        self.schedule.delete()
+        self.assertEqual(self.ledger(), [(38, 90, 1), (39, 0, 0)])
+        self.assertEqual(rebuild_workload(), 1)
+        self.assertEqual(self.ledger(), [(38, 90, 1)])
+
+    def test_weeks_without_a_semester_are_unique(self):
+        self.assertIsNone(self.schedule.semester_id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TeacherWorkload.objects.create(teacher=self.campus.teacher, iso_year=2026, iso_week=38)
+        # A concurrent writer creates the row between the update and the insert
+        key, _ = contribution(self.schedule)
+        lookup = TeacherWorkload.objects.filter
+        calls = []
+
+        def filter_after_race(**kwargs):
+            calls.append(kwargs)
+            return TeacherWorkload.objects.none() if len(calls) == 1 else lookup(**kwargs)
+
+        with mock.patch.object(TeacherWorkload.objects, 'filter', side_effect=filter_after_race):
+            apply_delta(key, 30, 1)
+        self.assertEqual(self.ledger(), [(38, 150, 2)])
+
+    def test_report_flags_underloaded_full_time_teachers(self):
+        Contract.objects.create(
+            teacher=self.campus.teacher, subject=self.campus.subject, department=self.campus.department,
+            salary=3000, contract_start=date(2026, 1, 1), contract_end=date(2027, 1, 1),
+            working_days=['Monday'], contract_type='Full-time', status='Active',
+        )
+        client = APIClient()
+        client.force_authenticate(self.campus.teacher.user)
+        response = client.get('/api/lecturer/workload/', {'week': '2026-W38'})
+        self.assertEqual(response.data['results'][0]['hours'], 2.0)
+        self.assertEqual(response.data['results'][0]['flag'], 'under')
+        self.assertEqual(client.get('/api/lecturer/workload/', {'department': 'x'}).status_code, 400)
+        self.assertEqual(client.get('/api/lecturer/workload/', {'week': 'soon'}).status_code, 400)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.campus.teacher.user)
+        self.url = self.client.get('/api/lecturer/calendar/links/').data[0]['url']
+
+    def fetch(self, **headers):
+        client = APIClient()
+        return client.get(self.url, headers=headers)
+
+    def test_feed_is_signed_and_conditional(self):
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'SUMMARY:' + self.campus.subject.code.encode(), response.content)
+        self.assertEqual(self.fetch(**{'If-None-Match': response['ETag']}).status_code, 304)
+        self.assertEqual(APIClient().get(self.url.split('?')[0] + '?token=forged').status_code, 403)
+
+    def test_compressed_feed_revalidates(self):
+        # Enough sessions to pass the middleware's minimum size
+        for offset in range(1, 15):
+            make_schedule(self.campus.teacher, self.campus.subject, self.campus.class_obj,
+                          self.campus.schedule.date + timedelta(days=offset))
+        response = self.fetch(**{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(self.fetch(**{'If-None-Match': response['ETag']}).status_code, 304)
+        self.assertEqual(self.fetch(**{'If-None-Match': 'W/"stale", ' + response['ETag']}).status_code, 304)
+
+    def test_changes_made_elsewhere_reach_the_feed(self):
+        etag = self.fetch()['ETag']
+        # update() skips signals, like a write handled by another worker process
+        Schedule.objects.update(room='B204', updated_at=timezone.now())
+        response = self.fetch(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'LOCATION:B204', response.content)
+
+        etag = response['ETag']
+        Subject.objects.update(name='Graph Theory', updated_at=timezone.now())
+        response = self.fetch(**{'If-None-Match': etag})
+        self.assertIn(b'Graph Theory', response.content)
+
+
+class TimetableTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=1, day=date(2026, 9, 14))
+        make_schedule(self.campus.teacher, self.campus.subject, self.campus.class_obj, date(2026, 9, 14),
+                      start=time(13), end=time(15))
+        make_schedule(self.campus.teacher, self.campus.subject, self.campus.class_obj, date(2026, 9, 16))
+        self.week = {'start': '2026-09-14', 'end': '2026-09-20'}
+
+    def get(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/lecturer/timetable/', {**self.week, **params})
+
+    def test_sessions_are_grouped_by_day(self):
+        for user in (self.campus.teacher.user, self.campus.students[0].user):
+            days = self.get(user).data['days']
+            self.assertEqual([day['date'] for day in days], [date(2026, 9, 14), date(2026, 9, 16)])
+            self.assertEqual([session['start'] for session in days[0]['sessions']], ['08:00', '13:00'])
+
+    def test_invalid_parameters(self):
+        staff = make_user(is_staff=True)
+        self.assertEqual(self.get(staff, **{'class': 'CS1'}).status_code, 400)
+        self.assertEqual(self.get(staff, end='2027-01-01').status_code, 400)
+        self.assertEqual(len(self.get(staff, **{'class': self.campus.class_obj.pk}).data['days']), 2)
+
+
+class TodaySessionsTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3)
+        schedule = self.campus.schedule
+        StudentAttendance.objects.create(student=self.campus.students[0], schedule=schedule, status='present')
+        StudentAttendance.objects.create(student=self.campus.students[1], schedule=schedule, status='late')
+        self.client = APIClient()
+
+    def test_counts_in_one_query(self):
+        self.client.force_authenticate(self.campus.teacher.user)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/lecturer/today/')
+        session, = response.data
+        self.assertEqual((session['roster'], session['checked_in'], session['late']), (3, 2, 1))
+        self.assertEqual(session['qr_session']['status'], 'active')
+
+    def test_staff_pick_a_teacher(self):
+        self.client.force_authenticate(make_user(is_staff=True))
+        response = self.client.get('/api/lecturer/today/', {'teacher': self.campus.teacher.pk})
+        self.assertEqual([row['schedule'] for row in response.data], [self.campus.schedule.pk])
+        self.assertEqual(self.client.get('/api/lecturer/today/', {'teacher': 'me'}).status_code, 400)
+
+
+class LiveAttendanceTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=2)
+
+    def rows(self):
+        return [
+            StudentAttendance.objects.create(student=student, schedule=self.campus.schedule, status='present')
+            for student in self.campus.students
+        ]
+
+    def test_events_are_published_after_commit(self):
+        rows = self.rows()
+        with mock.patch.object(live.broker, 'has_subscribers', return_value=True), \
+                mock.patch.object(live.broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                live.publish_attendance('student', rows)
+            publish.assert_not_called()
+            with self.assertNumQueries(1):
+                callbacks[0]()
+        topics = [args[0] for args, _ in publish.call_args_list]
+        schedule_topic = f'schedule:{self.campus.schedule.pk}'
+        department_topic = f'department:{self.campus.department.pk}'
+        self.assertEqual(topics, [schedule_topic, department_topic] * 2)
+        self.assertIn(f'"student": {self.campus.students[0].pk}', publish.call_args_list[0].args[1])
+
+    def test_nothing_is_built_without_watchers(self):
+        rows = self.rows()
+        with self.captureOnCommitCallbacks() as callbacks:
+            live.publish_attendance('student', rows)
+        self.assertEqual(callbacks, [])
+
+    def test_watch_permissions(self):
+        schedule = self.campus.schedule
+        other = make_teacher(self.campus.department, self.campus.major)
+        outsider = make_teacher(Department.objects.create(name='Law', code='LAW'), self.campus.major)
+        self.assertEqual(live._check(self.token(self.campus.teacher.user), schedule.pk, None),
+                         (f'schedule:{schedule.pk}', None))
+        self.assertIsNone(live._check(self.token(other.user), schedule.pk, None)[1])
+        self.assertEqual(live._check(self.token(outsider.user), schedule.pk, None)[1][0], 403)
+        self.assertEqual(live._check(self.token(outsider.user), None, outsider.department_id)[1], None)
+        self.assertEqual(live._check(self.token(other.user), schedule.pk + 100, None)[1][0], 404)
+        self.assertEqual(live._check('not-a-token', schedule.pk, None)[1][0], 401)
+
+    def test_stream_rejects_bad_requests_before_subscribing(self):
+        token = self.token(self.campus.teacher.user)
+        for query, expected in ((b'', 401), (f'token={token}&schedule=x'.encode(), 400),
+                                (f'token={token}'.encode(), 400)):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            asyncio.run(live.attendance_stream({'type': 'http', 'query_string': query, 'headers': []},
+                                               None, send))
+            self.assertEqual(sent[0]['status'], expected)
+        self.assertFalse(live.broker.has_subscribers())
+
+    @staticmethod
+    def token(user):
+        return str(AccessToken.for_user(user))
+
+
+class AttendanceSheetTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=2, day=date(2026, 9, 14))
+        c = self.campus
+        self.second = make_schedule(c.teacher, c.subject, c.class_obj, date(2026, 9, 16))
+        self.empty = make_schedule(c.teacher, c.subject, c.class_obj, date(2026, 9, 18))
+        first, second = c.students
+        StudentAttendance.objects.create(student=first, schedule=c.schedule, status='present')
+        StudentAttendance.objects.create(student=first, schedule=self.second, status='late')
+        StudentAttendance.objects.create(student=second, schedule=c.schedule, status='absent')
+        # A student who has since moved to another class keeps their row
+        self.moved = make_campus(students=1).students[0]
+        StudentAttendance.objects.create(student=self.moved, schedule=self.second, status='present')
+
+    def params(self, **extra):
+        return {'class': self.campus.class_obj.pk, 'subject': self.campus.subject.pk, **extra}
+
+    def test_matrix_in_two_queries(self):
+        with self.assertNumQueries(2):
+            sheet = build_sheet(self.campus.class_obj.pk, self.campus.subject.pk)
+        rows = {student[0]: sheet.row(i) for i, student in enumerate(sheet.students)}
+        first, second = self.campus.students
+        self.assertEqual(rows, {first.pk: 'PL-', second.pk: 'A--', self.moved.pk: '-P-'})
+        self.assertEqual([sheet.column_totals(i)['present'] for i in range(3)], [1, 1, 0])
+        rates = {student[0]: sheet.row_totals(i)['rate'] for i, student in enumerate(sheet.students)}
+        self.assertEqual(rates, {first.pk: 100.0, second.pk: 0.0, self.moved.pk: 100.0})
+
+    def test_endpoint_json_and_csv(self):
+        client = APIClient()
+        client.force_authenticate(self.campus.teacher.user)
+        data = client.get('/api/lecturer/attendance-sheet/', self.params(start='2026-09-15')).data
+        self.assertEqual([session['id'] for session in data['sessions']], [self.second.pk, self.empty.pk])
+        response = client.get('/api/lecturer/attendance-sheet/', self.params(export='csv'))
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[3:6], ['2026-09-14 08:00', '2026-09-16 08:00', '2026-09-18 08:00'])
+        self.assertEqual(len(lines), 1 + 3 + 3)
+        self.assertTrue(lines[-1].startswith(',,Total absent,1,0,0'))
 
-# Create your tests here.
+    def test_access_and_validation(self):
+        client = APIClient()
+        client.force_authenticate(make_teacher(self.campus.department, self.campus.major).user)
+        self.assertEqual(client.get('/api/lecturer/attendance-sheet/', self.params()).status_code, 403)
+        client.force_authenticate(make_user(is_staff=True))
+        self.assertEqual(client.get('/api/lecturer/attendance-sheet/', self.params()).status_code, 200)
+        self.assertEqual(client.get('/api/lecturer/attendance-sheet/', self.params(subject='x')).status_code, 400)
+        self.assertEqual(client.get('/api/lecturer/attendance-sheet/', self.params(export='pdf')).status_code, 400)
+        self.assertEqual(client.get('/api/lecturer/attendance-sheet/').status_code, 400)
@@ -4,12 +4,23 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'teacher-applications', views.TeacherApplicationViewSet)
+router.register(r'applications', views.TeacherApplicationViewSet, basename='application')
 router.register(r'teacher-profiles', views.TeacherProfileViewSet)
 router.register(r'contracts', views.ContractViewSet)
 router.register(r'schedules', views.ScheduleViewSet)
 router.register(r'qr-code-sessions', views.QRCodeSessionViewSet)
 router.register(r'teacher-attendances', views.TeacherAttendanceViewSet)
+router.register(r'payroll-runs', views.PayrollRunViewSet)
 
 urlpatterns = [
+    path('attendance-batch/', views.attendance_batch, name='attendance-batch'),
+    path('attendance-batch/key/', views.attendance_batch_key, name='attendance-batch-key'),
+    path('attendance-report/', views.attendance_report, name='attendance-report'),
+    path('workload/', views.workload, name='workload'),
+    path('timetable/', views.timetable, name='timetable'),
+    path('attendance-sheet/', views.attendance_sheet, name='attendance-sheet'),
+    path('today/', views.today_sessions, name='lecturer-today'),
+    path('calendar/links/', views.calendar_links, name='calendar-links'),
+    path('calendar/<str:kind>/<str:key>.ics', views.calendar_feed, name='calendar-feed'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
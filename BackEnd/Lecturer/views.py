@@ -1,30 +1,588 @@
-from rest_framework import viewsets
-from .models import TeacherApplication, TeacherProfile, Contract, Schedule, QRCodeSession, TeacherAttendance
+from datetime import date, timedelta
+
+from django.contrib.auth.decorators import permission_required
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes, renderer_classes
+from rest_framework.response import Response
+from core.conditional import etag_matches
+from core.exports import EXPORT_FORMATS, ExportMixin, export_response, filter_date_range, filter_ids
+from core.fieldsets import SparseFieldsetMixin
+from core.middleware import compression_exempt
+from core.models import Semester
+from core.renderers import CHECKIN_PARSERS, CHECKIN_RENDERERS
+from student.models import StudentProfile
+from .applications import (
+    ApprovalError, approve_application, reject_application, resolve_major, bulk_approve, parse_hire_date
+)
+from . import calendar_feeds
+from .attendance_sheet import build_sheet
+from .batch_upload import device_key, process_batch, MAX_BATCH_EVENTS
+from .cv_index import search_applications
+from .payroll import PayrollError, run_payroll, stream_report
+from .workload import workload_report
+from .models import (
+    TeacherApplication, TeacherProfile, Contract, Schedule, QRCodeSession, TeacherAttendance,
+    TeacherAttendanceDaily, PayrollRun, TeacherWorkload
+)
 from .serializers import (
     TeacherApplicationSerializer, TeacherProfileSerializer, ContractSerializer,
-    ScheduleSerializer, QRCodeSessionSerializer, TeacherAttendanceSerializer
+    ScheduleSerializer, QRCodeSessionSerializer, TeacherAttendanceSerializer,
+    PayrollRunSerializer, PayrollLineSerializer
 )
 
-class TeacherApplicationViewSet(viewsets.ModelViewSet):
+class TeacherApplicationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TeacherApplication.objects.all()
     serializer_class = TeacherApplicationSerializer
 
-class TeacherProfileViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Rank applications by keywords found in their CV, certificate and profile.
+        Query params: q, degree, institution, status, limit (default 50)
+        """
+        applications = self.get_queryset()
+        if request.query_params.get('degree'):
+            applications = applications.filter(degree__icontains=request.query_params['degree'])
+        if request.query_params.get('institution'):
+            applications = applications.filter(institution__icontains=request.query_params['institution'])
+        if request.query_params.get('status'):
+            applications = applications.filter(status=request.query_params['status'])
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = search_applications(request.query_params.get('q', ''), applications)[:limit]
+        found = applications.defer('resume_text', 'experience').in_bulk([pk for pk, _ in ranked])
+        data = []
+        for pk, score in ranked:
+            application = found[pk]
+            data.append({
+                'id': pk,
+                'score': round(score, 3),
+                'full_name': application.full_name,
+                'degree': application.degree,
+                'institution': application.institution,
+                'major_name': application.major_name,
+                'status': application.status,
+            })
+        return Response(data)
+
+    @method_decorator(permission_required('lecturer.change_teacherapplication', raise_exception=True))
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        """
+        Create the teacher account for a pending application.
+        Body: major (optional if major_name matches a Major), hire_date, comment, password
+        """
+        application = self.get_object()
+        try:
+            hire_date = parse_hire_date(request.data.get('hire_date'))
+            major = resolve_major(application, request.data.get('major'))
+            profile, password = approve_application(
+                application, request.user, major,
+                hire_date=hire_date,
+                comment=request.data.get('comment', ''),
+                password=request.data.get('password') or None,
+            )
+        except ApprovalError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': 'Application approved',
+            'teacher_profile': profile.pk,
+            'username': profile.user.username,
+            'temporary_password': password,
+        }, status=status.HTTP_201_CREATED)
+
+    @method_decorator(permission_required('lecturer.change_teacherapplication', raise_exception=True))
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        application = self.get_object()
+        try:
+            reject_application(application, request.user, comment=request.data.get('comment', ''))
+        except ApprovalError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Application rejected'})
+
+    @method_decorator(permission_required('lecturer.change_teacherapplication', raise_exception=True))
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """
+        Approve a selection of applications.
+        Body: ids (list), major, hire_date, comment
+        """
+        ids = request.data.get('ids')
+        try:
+            ids = [int(pk) for pk in ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be a list of numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'error': 'ids must not be empty'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            hire_date = parse_hire_date(request.data.get('hire_date'))
+            result = bulk_approve(
+                ids, request.user, hire_date,
+                major_id=request.data.get('major'),
+                comment=request.data.get('comment', ''),
+            )
+        except ApprovalError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+class TeacherProfileViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TeacherProfile.objects.all()
     serializer_class = TeacherProfileSerializer
+    export_filename = 'teachers'
+    export_columns = (
+        ('ID', 'id'), ('Full name', 'full_name'), ('Gender', 'gender'), ('Date of birth', 'date_of_birth'),
+        ('Nationality', 'nationality'), ('Email', 'email'), ('Phone', 'phone'), ('Degree', 'degree'),
+        ('Institution', 'institution'), ('Department', 'department__name'), ('Major', 'major__name'),
+        ('Hire date', 'hire_date'), ('Active', 'is_active'),
+    )
 
-class ContractViewSet(viewsets.ModelViewSet):
+    def get_export_queryset(self):
+        return filter_ids(self.get_queryset(), self.request.query_params, {'department': 'department_id'})
+
+class ContractViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Contract.objects.all()
     serializer_class = ContractSerializer
+    export_filename = 'contracts'
+    export_columns = (
+        ('ID', 'id'), ('Teacher ID', 'teacher_id'), ('Teacher', 'teacher__full_name'),
+        ('Subject', 'subject__code'), ('Department', 'department__name'), ('Type', 'contract_type'),
+        ('Status', 'status'), ('Salary', 'salary'), ('Start', 'contract_start'), ('End', 'contract_end'),
+        ('Working days', 'working_days'),
+    )
+
+    def get_export_queryset(self):
+        contracts = self.get_queryset()
+        if self.request.query_params.get('status'):
+            contracts = contracts.filter(status=self.request.query_params['status'])
+        return contracts
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
 
-class QRCodeSessionViewSet(viewsets.ModelViewSet):
+class QRCodeSessionViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = QRCodeSession.objects.all()
     serializer_class = QRCodeSessionSerializer
 
-class TeacherAttendanceViewSet(viewsets.ModelViewSet):
+class TeacherAttendanceViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TeacherAttendance.objects.all()
     serializer_class = TeacherAttendanceSerializer
+    export_filename = 'teacher-attendance'
+    export_columns = (
+        ('ID', 'id'), ('Date', 'schedule__date'), ('Start', 'schedule__start_time'),
+        ('Schedule', 'schedule_id'), ('Class', 'schedule__class_obj__name'),
+        ('Subject', 'schedule__subject__code'), ('Teacher ID', 'teacher_id'), ('Teacher', 'teacher__full_name'),
+        ('Status', 'status'), ('Check-in', 'checkin_time'), ('Check-out', 'checkout_time'),
+        ('Duration', 'duration'), ('Location', 'location'),
+    )
+
+    def get_export_queryset(self):
+        return filter_date_range(self.get_queryset(), self.request.query_params, 'schedule__date')
+
+class PayrollRunViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = PayrollRun.objects.all()
+    serializer_class = PayrollRunSerializer
+
+    @method_decorator(permission_required('lecturer.view_payrollrun', raise_exception=True))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(permission_required('lecturer.view_payrollrun', raise_exception=True))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @method_decorator(permission_required('lecturer.add_payrollrun', raise_exception=True))
+    @action(detail=False, methods=['post'])
+    def compute(self, request):
+        """
+        Compute and store the payroll for a month.
+        Body: year, month
+        """
+        try:
+            year = int(request.data.get('year'))
+            month = int(request.data.get('month'))
+            if not 1 <= month <= 12:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response({'error': 'year and month are required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            run = run_payroll(year, month, user=request.user)
+        except PayrollError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(self.get_serializer(run).data, status=status.HTTP_201_CREATED)
+
+    @method_decorator(permission_required('lecturer.view_payrollrun', raise_exception=True))
+    @action(detail=True, methods=['get'])
+    def lines(self, request, pk=None):
+        run = self.get_object()
+        lines = run.lines.select_related('teacher').order_by('teacher__full_name', 'id')
+        page = self.paginate_queryset(lines)
+        if page is not None:
+            return self.get_paginated_response(PayrollLineSerializer(page, many=True).data)
+        return Response(PayrollLineSerializer(lines, many=True).data)
+
+    @method_decorator(permission_required('lecturer.view_payrollrun', raise_exception=True))
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """Stream the payroll run as CSV"""
+        run = self.get_object()
+        response = StreamingHttpResponse(stream_report(run), content_type=EXPORT_FORMATS['csv'])
+        response['Content-Disposition'] = f'attachment; filename="payroll-{run.year}-{run.month:02d}-{run.pk}.csv"'
+        return response
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes(CHECKIN_RENDERERS)
+@parser_classes(CHECKIN_PARSERS)
+def attendance_batch(request):
+    """
+    Upload scan events that a device recorded while offline.
+    Events already uploaded (same idempotency_key) are reported as duplicates.
+    """
+    events = request.data.get('events')
+    if not isinstance(events, list) or not events:
+        return Response({'error': 'events must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > MAX_BATCH_EVENTS:
+        return Response(
+            {'error': f'At most {MAX_BATCH_EVENTS} events can be uploaded at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    result = process_batch(events, request.user, device_id=str(request.data.get('device_id', ''))[:100])
+    return Response(result)
+
+@compression_exempt
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def attendance_batch_key(request):
+    """
+    Issue the key a device signs its offline scan events with.
+    Body: device_id (the same value the device later uploads with)
+    """
+    if not request.user.is_staff and not TeacherProfile.objects.filter(user=request.user).exists():
+        return Response({'error': 'Only lecturers can record offline scans'}, status=status.HTTP_403_FORBIDDEN)
+    device_id = str(request.data.get('device_id', ''))[:100]
+    if not device_id:
+        return Response({'error': 'device_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'device_id': device_id, 'key': device_key(request.user.pk, device_id)})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def attendance_report(request):
+    """
+    Per-teacher attendance totals over a date range, read from the daily rollups.
+    Query params: start, end (YYYY-MM-DD, default this month), teacher, department
+    """
+    today = timezone.localdate()
+    try:
+        start = parse_date(request.query_params.get('start', '')) or today.replace(day=1)
+        end = parse_date(request.query_params.get('end', '')) or today
+    except ValueError:
+        return Response({'error': 'Invalid date'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rollups = TeacherAttendanceDaily.objects.filter(date__range=(start, end))
+    if not request.user.is_staff:
+        rollups = rollups.filter(teacher__user=request.user)
+    try:
+        if request.query_params.get('teacher'):
+            rollups = rollups.filter(teacher_id=int(request.query_params['teacher']))
+        if request.query_params.get('department'):
+            rollups = rollups.filter(teacher__department_id=int(request.query_params['department']))
+    except ValueError:
+        return Response({'error': 'teacher and department must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    totals = rollups.values('teacher_id', 'teacher__full_name').annotate(
+        total_sessions=Sum('sessions'),
+        total_present=Sum('present'),
+        total_late=Sum('late'),
+        total_absent=Sum('absent'),
+        duration=Sum('total_duration'),
+        lateness=Sum('late_minutes'),
+    ).order_by('teacher__full_name')
+
+    data = []
+    for row in totals:
+        attended = row['total_present'] + row['total_late']
+        data.append({
+            'teacher': row['teacher_id'],
+            'teacher_name': row['teacher__full_name'],
+            'sessions': row['total_sessions'],
+            'present': row['total_present'],
+            'late': row['total_late'],
+            'absent': row['total_absent'],
+            'duration_minutes': int(row['duration'].total_seconds() // 60) if row['duration'] else 0,
+            'late_minutes': row['lateness'],
+            'attendance_rate': round(attended * 100 / row['total_sessions'], 1) if row['total_sessions'] else None,
+        })
+    return Response({'start': start, 'end': end, 'results': data})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def workload(request):
+    """
+    Scheduled teaching hours per teacher for an ISO week or a semester,
+    flagged 'over' or 'under' against the load expected for their contract type.
+    Query params: week (YYYY-Www, default this week) or semester (id), department
+    """
+    try:
+        department_id = int(request.query_params.get('department') or 0)
+        semester_id = int(request.query_params.get('semester') or 0)
+    except ValueError:
+        return Response({'error': 'department and semester must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ledger = TeacherWorkload.objects.all()
+    teacher_ids = None
+    if not request.user.is_staff:
+        teacher_ids = list(TeacherProfile.objects.filter(user=request.user).values_list('id', flat=True))
+    if department_id:
+        teacher_ids = list(TeacherProfile.objects.filter(
+            department_id=department_id,
+            **({'id__in': teacher_ids} if teacher_ids is not None else {})
+        ).values_list('id', flat=True))
+    if teacher_ids is not None:
+        ledger = ledger.filter(teacher_id__in=teacher_ids)
+
+    if semester_id:
+        semester = Semester.objects.filter(pk=semester_id).first()
+        if semester is None:
+            return Response({'error': 'Unknown semester'}, status=status.HTTP_404_NOT_FOUND)
+        ledger = ledger.filter(semester=semester)
+        weeks = max(1, ((semester.end_date - semester.start_date).days + 1) / 7)
+        on_date = min(max(timezone.localdate(), semester.start_date), semester.end_date)
+        period = {'semester': semester.pk, 'weeks': round(weeks, 1)}
+    else:
+        today = timezone.localdate()
+        try:
+            if request.query_params.get('week'):
+                year, week = request.query_params['week'].upper().split('-W')
+                on_date = date.fromisocalendar(int(year), int(week), 1)
+            else:
+                on_date = today
+        except ValueError:
+            return Response({'error': 'week must look like 2026-W42'}, status=status.HTTP_400_BAD_REQUEST)
+        iso_year, iso_week, _ = on_date.isocalendar()
+        ledger = ledger.filter(iso_year=iso_year, iso_week=iso_week)
+        weeks = 1
+        period = {'week': f'{iso_year}-W{iso_week:02d}'}
+
+    return Response({**period, 'results': workload_report(ledger, weeks, on_date, teacher_ids)})
+
+TIMETABLE_MAX_DAYS = 92
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def timetable(request):
+    """
+    The caller's sessions between two dates, grouped by day.
+    Teachers get their own schedule, students their class's; staff may pass
+    ?teacher= or ?class=. Query params: start, end (default: this week, Monday to Sunday)
+    """
+    today = timezone.localdate()
+    try:
+        start = parse_date(request.query_params.get('start', ''))
+        end = parse_date(request.query_params.get('end', ''))
+    except ValueError:
+        return Response({'error': 'start and end must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    start = start or today - timedelta(days=today.weekday())
+    end = end or start + timedelta(days=6)
+    if end < start or (end - start).days >= TIMETABLE_MAX_DAYS:
+        return Response({'error': f'end must be on or after start and within {TIMETABLE_MAX_DAYS} days'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if request.user.is_staff and request.query_params.get('teacher'):
+            owner = {'teacher_id': int(request.query_params['teacher'])}
+        elif request.user.is_staff and request.query_params.get('class'):
+            owner = {'class_obj_id': int(request.query_params['class'])}
+        else:
+            owner = None
+    except ValueError:
+        return Response({'error': 'teacher and class must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    if owner is None:
+        teacher_id = TeacherProfile.objects.filter(user=request.user).values_list('id', flat=True).first()
+        class_id = None if teacher_id else StudentProfile.objects.filter(
+            user=request.user).values_list('class_obj_id', flat=True).first()
+        if teacher_id:
+            owner = {'teacher_id': teacher_id}
+        elif class_id:
+            owner = {'class_obj_id': class_id}
+        else:
+            return Response({'error': 'No teacher or student profile for this user'},
+                            status=status.HTTP_404_NOT_FOUND)
+
+    # Served by the (teacher|class_obj, date, start_time) indexes, in index order
+    rows = Schedule.objects.filter(**owner, date__range=(start, end)).order_by('date', 'start_time').values_list(
+        'id', 'date', 'start_time', 'end_time', 'room', 'status',
+        'subject__code', 'subject__name', 'teacher__full_name', 'class_obj__name',
+    )
+    days = []
+    for pk, day, start_time, end_time, room, state, code, subject, teacher, class_name in rows:
+        if not days or days[-1]['date'] != day:
+            days.append({'date': day, 'sessions': []})
+        days[-1]['sessions'].append({
+            'id': pk,
+            'start': start_time.strftime('%H:%M'),
+            'end': end_time.strftime('%H:%M'),
+            'subject': f'{code} {subject}',
+            'room': room,
+            'teacher': teacher,
+            'class': class_name,
+            'status': state,
+        })
+    return Response({'start': start, 'end': end, 'days': days})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def today_sessions(request):
+    """
+    The caller's sessions for today with QR session status, roster size and how many
+    students have checked in so far, in a single query. Staff may pass ?teacher=
+    """
+    if request.user.is_staff and request.query_params.get('teacher'):
+        try:
+            schedules = Schedule.objects.filter(teacher_id=int(request.query_params['teacher']))
+        except ValueError:
+            return Response({'error': 'teacher must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        schedules = Schedule.objects.filter(teacher__user=request.user)
+
+    roster = StudentProfile.objects.filter(
+        class_obj=OuterRef('class_obj'), status='Active'
+    ).order_by().values('class_obj').annotate(n=Count('id')).values('n')
+    teacher_checkin = TeacherAttendance.objects.filter(
+        schedule=OuterRef('pk')
+    ).order_by('id').values('checkin_time')[:1]
+    now = timezone.now()
+    rows = schedules.filter(date=timezone.localdate()).annotate(
+        checked_in=Count('studentattendance', filter=Q(studentattendance__status__in=['present', 'late'])),
+        late=Count('studentattendance', filter=Q(studentattendance__status='late')),
+        roster=Coalesce(Subquery(roster, output_field=IntegerField()), 0),
+        teacher_checkin=Subquery(teacher_checkin),
+    ).order_by('start_time').values(
+        'id', 'start_time', 'end_time', 'room', 'status', 'class_obj_id', 'class_obj__name',
+        'subject__code', 'subject__name', 'qrcodesession__status', 'qrcodesession__expiration_time',
+        'checked_in', 'late', 'roster', 'teacher_checkin',
+    )
+    data = []
+    for row in rows:
+        qr_status = row['qrcodesession__status']
+        if qr_status == 'active' and row['qrcodesession__expiration_time'] <= now:
+            qr_status = 'expired'  # the scheduler has not caught up yet
+        data.append({
+            'schedule': row['id'],
+            'start': row['start_time'].strftime('%H:%M'),
+            'end': row['end_time'].strftime('%H:%M'),
+            'room': row['room'],
+            'status': row['status'],
+            'class': {'id': row['class_obj_id'], 'name': row['class_obj__name']},
+            'subject': f"{row['subject__code']} {row['subject__name']}",
+            'qr_session': {
+                'status': qr_status,
+                'expires_at': row['qrcodesession__expiration_time'],
+            } if qr_status else None,
+            'teacher_checkin': row['teacher_checkin'],
+            'roster': row['roster'],
+            'checked_in': row['checked_in'],
+            'late': row['late'],
+        })
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def attendance_sheet(request):
+    """
+    Attendance register of a class for one subject: students in rows, sessions in columns.
+    Query params: class, subject (required), semester, start, end,
+    export (csv or xlsx to download instead of JSON)
+    """
+    params = request.query_params
+    export = params.get('export')
+    if export and export not in EXPORT_FORMATS:
+        return Response({'error': f"export must be one of {', '.join(EXPORT_FORMATS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        class_id, subject_id = int(params['class']), int(params['subject'])
+        semester_id = int(params['semester']) if params.get('semester') else None
+        start = parse_date(params.get('start', ''))
+        end = parse_date(params.get('end', ''))
+    except KeyError:
+        return Response({'error': 'class and subject are required'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'error': 'class, subject and semester must be ids; start and end YYYY-MM-DD'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not request.user.is_staff and not Schedule.objects.filter(
+        class_obj_id=class_id, subject_id=subject_id, teacher__user=request.user
+    ).exists():
+        return Response({'error': 'You do not teach this subject to this class'},
+                        status=status.HTTP_403_FORBIDDEN)
+
+    sheet = build_sheet(class_id, subject_id, semester_id, start, end)
+    if export:
+        return export_response(export, sheet.header(), sheet.export_rows(),
+                               f'attendance-class{class_id}-subject{subject_id}', sheet_name='Attendance')
+    return Response({'class': class_id, 'subject': subject_id, **sheet.as_json()})
+
+@require_GET
+def calendar_feed(request, kind, key):
+    """
+    iCalendar feed of a teacher, class or room timetable for calendar apps.
+    Authenticated by the signed ?token= from calendar-links instead of a JWT.
+    """
+    if kind not in calendar_feeds.FEED_KINDS:
+        return HttpResponseNotFound()
+    if not calendar_feeds.check_token(kind, key, request.GET.get('token', '')):
+        return HttpResponseForbidden('Invalid calendar token')
+    name = calendar_feeds.feed_name(kind, key)
+    if name is None:
+        return HttpResponseNotFound()
+
+    body, etag = calendar_feeds.get_feed(kind, key, name)
+    # Weak comparison: the compression middleware sends a compressed body's tag back weakened
+    if etag_matches(request, etag):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="{kind}-{key}.ics"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=300'
+    return response
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_links(request):
+    """
+    Signed feed URLs for the caller's own timetable.
+    Staff may request any feed with ?kind=teacher|class|room&key=...
+    """
+    links = calendar_feeds.feed_links(request.user)
+    kind, key = request.query_params.get('kind'), request.query_params.get('key')
+    if kind or key:
+        if not request.user.is_staff:
+            return Response({'error': 'Only staff can request other feeds'}, status=status.HTTP_403_FORBIDDEN)
+        if kind not in calendar_feeds.FEED_KINDS or not key:
+            return Response({'error': 'kind must be teacher, class or room and key is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if calendar_feeds.feed_name(kind, key) is None:
+            return Response({'error': 'Unknown feed'}, status=status.HTTP_404_NOT_FOUND)
+        links = [(kind, key)]
+
+    data = []
+    for kind, key in links:
+        path = reverse('calendar-feed', kwargs={'kind': kind, 'key': key})
+        token = calendar_feeds.feed_token(kind, key)
+        data.append({'kind': kind, 'key': str(key), 'url': request.build_absolute_uri(f'{path}?token={token}')})
+    return Response(data)
@@ -0,0 +1,149 @@
+"""
+Teaching workload ledger.
+
+TeacherWorkload holds scheduled minutes per teacher, ISO week and semester.
+Schedule signals apply the difference a save or delete makes, so reading
+weekly or semester hours never has to scan Schedule.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Contract, Schedule, TeacherProfile, TeacherWorkload
+
+# Expected weekly teaching hours (minimum, maximum) per contract type
+WEEKLY_HOURS = {
+    'Full-time': (12, 20),
+    'Part-time': (0, 12),
+}
+
+
+def session_minutes(start_time, end_time):
+    if start_time is None or end_time is None:
+        return 0
+    delta = datetime.combine(datetime.min, end_time) - datetime.combine(datetime.min, start_time)
+    return max(0, int(delta.total_seconds() // 60))
+
+
+def contribution(schedule):
+    """The ledger key and minutes a schedule accounts for, or None."""
+    if schedule.teacher_id is None or schedule.date is None:
+        return None
+    iso_year, iso_week, _ = schedule.date.isocalendar()
+    key = (schedule.teacher_id, iso_year, iso_week, schedule.semester_id)
+    return key, session_minutes(schedule.start_time, schedule.end_time)
+
+
+def apply_delta(key, minutes, sessions):
+    if not minutes and not sessions:
+        return
+    teacher_id, iso_year, iso_week, semester_id = key
+    lookup = dict(teacher_id=teacher_id, iso_year=iso_year, iso_week=iso_week, semester_id=semester_id)
+    with transaction.atomic():
+        updated = TeacherWorkload.objects.filter(**lookup).update(
+            minutes=F('minutes') + minutes, sessions=F('sessions') + sessions
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                TeacherWorkload.objects.create(minutes=minutes, sessions=sessions, **lookup)
+        except IntegrityError:
+            # Created concurrently; fall back to incrementing it
+            TeacherWorkload.objects.filter(**lookup).update(
+                minutes=F('minutes') + minutes, sessions=F('sessions') + sessions
+            )
+
+
+def record_change(previous, current):
+    """Move a schedule's contribution from its previous state to its current one."""
+    if previous == current:
+        return
+    if previous is not None:
+        apply_delta(previous[0], -previous[1], -1)
+    if current is not None:
+        apply_delta(current[0], current[1], 1)
+
+
+def rebuild_workload():
+    """Recompute the whole ledger from Schedule; returns the number of ledger rows."""
+    totals = defaultdict(lambda: [0, 0])
+    rows = Schedule.objects.values_list(
+        'teacher_id', 'date', 'semester_id', 'start_time', 'end_time'
+    ).iterator(chunk_size=2000)
+    for teacher_id, day, semester_id, start_time, end_time in rows:
+        iso_year, iso_week, _ = day.isocalendar()
+        total = totals[(teacher_id, iso_year, iso_week, semester_id)]
+        total[0] += session_minutes(start_time, end_time)
+        total[1] += 1
+
+    with transaction.atomic():
+        TeacherWorkload.objects.all().delete()
+        TeacherWorkload.objects.bulk_create([
+            TeacherWorkload(
+                teacher_id=teacher_id, iso_year=iso_year, iso_week=iso_week,
+                semester_id=semester_id, minutes=minutes, sessions=sessions,
+            )
+            for (teacher_id, iso_year, iso_week, semester_id), (minutes, sessions) in totals.items()
+        ], batch_size=1000)
+    return len(totals)
+
+
+def contract_types(on_date, teacher_ids=None):
+    """Contract type per teacher with an active contract; Full-time wins if a teacher holds both."""
+    contracts = Contract.objects.filter(
+        status='Active', contract_start__lte=on_date, contract_end__gte=on_date,
+    )
+    if teacher_ids is not None:
+        contracts = contracts.filter(teacher_id__in=teacher_ids)
+    types = {}
+    for teacher_id, contract_type in contracts.values_list('teacher_id', 'contract_type'):
+        if types.get(teacher_id) != 'Full-time':
+            types[teacher_id] = contract_type
+    return types
+
+
+def workload_report(ledger, weeks, on_date, teacher_ids=None):
+    """
+    Sum ledger rows per teacher and flag loads outside WEEKLY_HOURS scaled by `weeks`.
+    Teachers under contract with nothing scheduled are included with zero hours.
+    """
+    totals = {
+        row['teacher_id']: row
+        for row in ledger.values('teacher_id', 'teacher__full_name').annotate(
+            total_minutes=Sum('minutes'), total_sessions=Sum('sessions')
+        )
+    }
+    types = contract_types(on_date, teacher_ids)
+    idle = set(types) - set(totals)
+    if idle:
+        for teacher_id, full_name in TeacherProfile.objects.filter(
+            id__in=idle, is_active=True
+        ).values_list('id', 'full_name'):
+            totals[teacher_id] = {
+                'teacher_id': teacher_id, 'teacher__full_name': full_name,
+                'total_minutes': 0, 'total_sessions': 0,
+            }
+
+    data = []
+    for row in sorted(totals.values(), key=lambda row: row['teacher__full_name']):
+        contract_type = types.get(row['teacher_id'])
+        hours = round((row['total_minutes'] or 0) / 60, 2)
+        flag = None
+        if contract_type in WEEKLY_HOURS:
+            low, high = (limit * weeks for limit in WEEKLY_HOURS[contract_type])
+            if hours < low:
+                flag = 'under'
+            elif hours > high:
+                flag = 'over'
+        data.append({
+            'teacher': row['teacher_id'],
+            'teacher_name': row['teacher__full_name'],
+            'contract_type': contract_type,
+            'hours': hours,
+            'sessions': row['total_sessions'],
+            'flag': flag,
+        })
+    return data
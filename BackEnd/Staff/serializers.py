@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from core.fieldsets import DynamicFieldsModelSerializer
 from .models import StaffProfile, StaffActivity
 
-class StaffProfileSerializer(serializers.ModelSerializer):
+class StaffProfileSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = StaffProfile
         fields = '__all__'
 
-class StaffActivitySerializer(serializers.ModelSerializer):
+class StaffActivitySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = StaffActivity
         fields = '__all__'
\ No newline at end of file
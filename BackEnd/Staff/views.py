@@ -1,11 +1,12 @@
 from rest_framework import viewsets
+from core.fieldsets import SparseFieldsetMixin
 from .models import StaffProfile, StaffActivity
 from .serializers import StaffProfileSerializer, StaffActivitySerializer
 
-class StaffProfileViewSet(viewsets.ModelViewSet):
+class StaffProfileViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = StaffProfile.objects.all()
     serializer_class = StaffProfileSerializer
 
-class StaffActivityViewSet(viewsets.ModelViewSet):
+class StaffActivityViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = StaffActivity.objects.all()
     serializer_class = StaffActivitySerializer
\ No newline at end of file
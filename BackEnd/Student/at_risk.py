@@ -0,0 +1,154 @@
+"""
+Nightly detection of students at risk over their attendance.
+
+The job streams StudentAttendance in schedule order with iterator() and
+folds every row into a small running state per (student, subject): the
+present/late/absent totals and the current and longest absence streaks.
+A student is flagged in a subject once their attendance rate drops below
+counters.WARNING_RATE or they miss STREAK_THRESHOLD sessions in a row.
+
+Progress is kept as a date watermark in core.JobWatermark. A run only
+reads days after the watermark, and only up to the last day whose
+sessions have all been finalized, so no absent row can appear behind it.
+Run it nightly with `manage.py detect_at_risk`.
+"""
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from core.leases import acquire_lease, release_lease
+from core.models import JobWatermark
+from lecturer.models import Schedule
+from .counters import WARNING_RATE
+from .models import AttendanceRisk, StudentAttendance
+
+JOB_NAME = 'student-at-risk'
+STREAK_THRESHOLD = 3
+# Rates over fewer sessions than this are not flagged
+MIN_SESSIONS = 4
+CHUNK_SIZE = 2000
+LEASE_TTL = timedelta(hours=1)
+
+
+class AtRiskError(Exception):
+    pass
+
+
+class _State:
+    __slots__ = ('present', 'late', 'absent', 'current_streak', 'longest_streak', 'last_date',
+                 'flagged', 'flagged_at')
+
+    def __init__(self, present=0, late=0, absent=0, current_streak=0, longest_streak=0,
+                 last_date=None, flagged=False, flagged_at=None):
+        self.present, self.late, self.absent = present, late, absent
+        self.current_streak, self.longest_streak = current_streak, longest_streak
+        self.last_date, self.flagged, self.flagged_at = last_date, flagged, flagged_at
+
+    def add(self, status, day):
+        if status == 'absent':
+            self.absent += 1
+            self.current_streak += 1
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+        else:
+            setattr(self, status, getattr(self, status) + 1)
+            self.current_streak = 0
+        self.last_date = day
+
+    def reasons(self):
+        reasons = []
+        sessions = self.present + self.late + self.absent
+        if sessions >= MIN_SESSIONS and (self.present + self.late) * 100 < WARNING_RATE * sessions:
+            reasons.append('low_rate')
+        if self.current_streak >= STREAK_THRESHOLD:
+            reasons.append('absence_streak')
+        return reasons
+
+
+def processable_through(today=None):
+    """The last date (before today) up to which every session has been finalized."""
+    limit = (today or timezone.localdate()) - timedelta(days=1)
+    oldest_open = Schedule.objects.filter(
+        date__lte=limit, finalized_at__isnull=True,
+    ).aggregate(day=Min('date'))['day']
+    if oldest_open is not None:
+        limit = min(limit, oldest_open - timedelta(days=1))
+    return limit
+
+
+def detect_at_risk(today=None, rebuild=False, chunk_size=CHUNK_SIZE):
+    """Fold attendance after the watermark into the risk table; returns a summary."""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    if not acquire_lease(JOB_NAME, owner, LEASE_TTL):
+        raise AtRiskError('The at-risk job is already running')
+    try:
+        return _detect(today, rebuild, chunk_size)
+    finally:
+        release_lease(JOB_NAME, owner)
+
+
+def _detect(today, rebuild, chunk_size):
+    watermark, _ = JobWatermark.objects.get_or_create(name=JOB_NAME)
+    start = None if rebuild else watermark.processed_through
+    through = processable_through(today)
+    summary = {'from': start, 'through': through, 'rows': 0, 'updated': 0}
+    if start is not None and through <= start:
+        summary['flagged'] = AttendanceRisk.objects.filter(flagged=True).count()
+        return summary
+
+    states = {}
+    if not rebuild:
+        for student_id, subject_id, *values in AttendanceRisk.objects.values_list(
+            'student_id', 'subject_id', 'present', 'late', 'absent', 'current_streak',
+            'longest_streak', 'last_date', 'flagged', 'flagged_at',
+        ).iterator(chunk_size=chunk_size):
+            states[(student_id, subject_id)] = _State(*values)
+
+    rows = StudentAttendance.objects.filter(schedule__date__lte=through)
+    if start is not None:
+        rows = rows.filter(schedule__date__gt=start)
+    rows = rows.order_by('schedule__date', 'schedule__start_time', 'schedule_id', 'id').values_list(
+        'student_id', 'schedule__subject_id', 'schedule__date', 'status',
+    )
+    touched = set()
+    for student_id, subject_id, day, status in rows.iterator(chunk_size=chunk_size):
+        key = (student_id, subject_id)
+        state = states.get(key)
+        if state is None:
+            state = states[key] = _State()
+        state.add(status, day)
+        touched.add(key)
+        summary['rows'] += 1
+
+    now = timezone.now()
+    risks = []
+    for student_id, subject_id in touched:
+        state = states[(student_id, subject_id)]
+        reasons = state.reasons()
+        risks.append(AttendanceRisk(
+            student_id=student_id, subject_id=subject_id,
+            present=state.present, late=state.late, absent=state.absent,
+            current_streak=state.current_streak, longest_streak=state.longest_streak,
+            last_date=state.last_date, flagged=bool(reasons), reasons=','.join(reasons),
+            flagged_at=(state.flagged_at if state.flagged else now) if reasons else None,
+            updated_at=now,
+        ))
+    with transaction.atomic():
+        if rebuild:
+            AttendanceRisk.objects.all().delete()
+        AttendanceRisk.objects.bulk_create(
+            risks,
+            update_conflicts=True,
+            unique_fields=['student', 'subject'],
+            update_fields=['present', 'late', 'absent', 'current_streak', 'longest_streak',
+                           'last_date', 'flagged', 'reasons', 'flagged_at', 'updated_at'],
+            batch_size=1000,
+        )
+        JobWatermark.objects.filter(pk=watermark.pk).update(processed_through=through, updated_at=now)
+
+    summary['updated'] = len(risks)
+    summary['flagged'] = AttendanceRisk.objects.filter(flagged=True).count()
+    return summary
@@ -0,0 +1,250 @@
+"""
+Group-commit writer for student check-ins.
+
+SQLite only allows one writer at a time, so a classroom of students scanning
+the same QR code within a few seconds used to end in "database is locked".
+Scans are acknowledged as soon as they are queued here; a single background
+thread collects whatever arrived in the last few milliseconds and writes it
+as one upsert inside one transaction.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.005  # seconds to wait for more scans before committing
+MAX_BATCH_SIZE = 500
+MAX_RETRIES = 3
+LATENCY_WINDOW = 1000  # number of recent batches kept for percentiles
+
+
+@dataclass
+class ScanEvent:
+    student_id: int
+    schedule_id: int
+    status: str
+    checkin_time: object
+    teacher_attendance_id: int = None
+    location: str = ''
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+def upsert_attendance(rows):
+    """
+    Insert StudentAttendance rows, keyed by (student, schedule).
+    A row that already exists only has updated_at touched, so the first
+    check-in time and status always win and repeated scans are harmless.
+    Call inside a transaction: the attendance counters are refreshed with it.
+    """
+    from lecturer.live import publish_attendance
+    from .counters import refresh_attendance_counters
+    from .models import StudentAttendance
+
+    created = StudentAttendance.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['student', 'schedule'],
+        update_fields=['updated_at'],
+    )
+    refresh_attendance_counters((row.student_id, row.schedule_id) for row in rows)
+    publish_attendance('student', rows)
+    return created
+
+
+class WriterStats:
+    """Counters and recent latencies for the writer, safe to read from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events_queued = 0
+        self.events_written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self._commit_ms = deque(maxlen=LATENCY_WINDOW)
+        self._queue_ms = deque(maxlen=LATENCY_WINDOW)
+        self._sizes = deque(maxlen=LATENCY_WINDOW)
+
+    def record_queued(self):
+        with self._lock:
+            self.events_queued += 1
+
+    def record_batch(self, size, commit_ms, queue_ms):
+        with self._lock:
+            self.batches += 1
+            self.events_written += size
+            self.last_batch_size = size
+            self.max_batch_size = max(self.max_batch_size, size)
+            self._sizes.append(size)
+            self._commit_ms.append(commit_ms)
+            self._queue_ms.append(queue_ms)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return None
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[index], 3)
+
+    def snapshot(self, pending=0):
+        with self._lock:
+            sizes = list(self._sizes)
+            commit_ms = list(self._commit_ms)
+            queue_ms = list(self._queue_ms)
+            data = {
+                'events_queued': self.events_queued,
+                'events_written': self.events_written,
+                'pending': pending,
+                'batches': self.batches,
+                'errors': self.errors,
+                'last_batch_size': self.last_batch_size,
+                'max_batch_size': self.max_batch_size,
+            }
+        data['avg_batch_size'] = round(sum(sizes) / len(sizes), 2) if sizes else None
+        data['commit_ms'] = {
+            'p50': self._percentile(commit_ms, 50),
+            'p95': self._percentile(commit_ms, 95),
+            'max': round(max(commit_ms), 3) if commit_ms else None,
+        }
+        # Time from a scan being acknowledged to its row being committed.
+        data['write_latency_ms'] = {
+            'p50': self._percentile(queue_ms, 50),
+            'p95': self._percentile(queue_ms, 95),
+            'max': round(max(queue_ms), 3) if queue_ms else None,
+        }
+        return data
+
+
+class AttendanceWriter:
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_batch_size=MAX_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.stats = WriterStats()
+        self._queue = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, student_id, schedule_id, status, checkin_time=None,
+               teacher_attendance_id=None, location=''):
+        """Queue a check-in and return immediately; the row is committed by the flusher."""
+        self._ensure_started()
+        self._queue.put(ScanEvent(
+            student_id=student_id,
+            schedule_id=schedule_id,
+            status=status,
+            checkin_time=checkin_time or timezone.now(),
+            teacher_attendance_id=teacher_attendance_id,
+            location=location,
+        ))
+        self.stats.record_queued()
+
+    def flush(self):
+        """Write everything queued so far on the calling thread."""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='attendance-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _drain(self, block=True):
+        batch = []
+        try:
+            batch.append(self._queue.get(block=block, timeout=1.0 if block else None))
+        except queue.Empty:
+            return batch
+        deadline = time.perf_counter() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception('Dropped %d attendance scans', len(batch))
+            finally:
+                close_old_connections()
+
+    def _write(self, batch):
+        from .models import StudentAttendance
+
+        # Repeat scans of the same code collapse to the earliest one.
+        events = {}
+        for event in batch:
+            key = (event.student_id, event.schedule_id)
+            if key not in events or event.checkin_time < events[key].checkin_time:
+                events[key] = event
+        rows = [
+            StudentAttendance(
+                student_id=event.student_id,
+                schedule_id=event.schedule_id,
+                teacher_attendance_id=event.teacher_attendance_id,
+                checkin_time=event.checkin_time,
+                status=event.status,
+                location=event.location,
+            )
+            for event in events.values()
+        ]
+
+        for attempt in range(1, MAX_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                with self._write_lock, transaction.atomic():
+                    upsert_attendance(rows)
+                break
+            except OperationalError:
+                self.stats.record_error()
+                if attempt == MAX_RETRIES:
+                    raise
+                time.sleep(self.flush_interval * attempt)
+
+        committed = time.perf_counter()
+        oldest = min(event.queued_at for event in batch)
+        self.stats.record_batch(
+            size=len(rows),
+            commit_ms=(committed - started) * 1000,
+            queue_ms=(committed - oldest) * 1000,
+        )
+
+
+attendance_writer = AttendanceWriter()
+atexit.register(attendance_writer.flush)
@@ -0,0 +1,245 @@
+"""
+Attendance analytics on bitsets.
+
+Every finalized session is stored once as three bitsets over its class
+roster: who had a row (enrolled), who attended (present or late) and who
+was late. A student keeps the same bit position in AttendanceRoster for
+the life of the class, so a class's history loads as a packed
+sessions x students matrix and streaks, rates, per-session losses and
+co-absence are answered with NumPy bit and array operations instead of
+row-by-row SQL over StudentAttendance.
+
+Bitmaps are built incrementally from sessions whose finalized_at is set;
+editing attendance of a built session drops its bitmap so the next build
+picks it up again. Requires NumPy.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from lecturer.models import Schedule
+from .models import AttendanceRoster, SessionBitmap, StudentAttendance
+
+BATCH_SIZE = 500
+if np is not None:
+    POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+class BitmapError(Exception):
+    pass
+
+
+def _require_numpy():
+    if np is None:
+        raise BitmapError('NumPy is required for attendance analytics')
+
+
+def _pack(positions, size):
+    bits = np.zeros(size, dtype=bool)
+    bits[positions] = True
+    return np.packbits(bits, bitorder='little').tobytes()
+
+
+def pending_sessions(since=None):
+    """Finalized sessions without a bitmap, optionally only from `since` onwards."""
+    schedules = Schedule.objects.filter(finalized_at__isnull=False, attendance_bitmap__isnull=True)
+    if since is not None:
+        schedules = schedules.filter(date__gte=since)
+    return schedules
+
+
+def build_bitmaps(schedules=None, batch_size=BATCH_SIZE):
+    """Build bitmaps for finalized sessions that have none yet; returns how many were built."""
+    _require_numpy()
+    schedules = pending_sessions() if schedules is None else schedules
+    schedule_ids = list(schedules.order_by('date', 'start_time').values_list('id', flat=True))
+    built = 0
+    for offset in range(0, len(schedule_ids), batch_size):
+        built += _build_batch(schedule_ids[offset:offset + batch_size])
+    return built
+
+
+def _build_batch(schedule_ids):
+    sessions = list(Schedule.objects.filter(id__in=schedule_ids).values_list(
+        'id', 'class_obj_id', 'subject_id', 'date', 'start_time'
+    ).order_by('date', 'start_time'))
+    rows = defaultdict(list)
+    for schedule_id, student_id, status in StudentAttendance.objects.filter(
+        schedule_id__in=schedule_ids
+    ).values_list('schedule_id', 'student_id', 'status'):
+        rows[schedule_id].append((student_id, status))
+
+    with transaction.atomic():
+        class_ids = {session[1] for session in sessions}
+        rosters = {
+            roster.class_obj_id: roster
+            for roster in AttendanceRoster.objects.select_for_update().filter(class_obj_id__in=class_ids)
+        }
+        positions = {}
+        for class_id in class_ids:
+            roster = rosters.get(class_id) or AttendanceRoster(class_obj_id=class_id, student_ids=b'')
+            rosters[class_id] = roster
+            ids = np.frombuffer(bytes(roster.student_ids), dtype='<i8')
+            positions[class_id] = {int(student_id): index for index, student_id in enumerate(ids)}
+
+        bitmaps = []
+        for schedule_id, class_id, subject_id, day, start_time in sessions:
+            slots = positions[class_id]
+            enrolled, attended, late = [], [], []
+            for student_id, status in rows[schedule_id]:
+                index = slots.setdefault(student_id, len(slots))
+                enrolled.append(index)
+                if status in ('present', 'late'):
+                    attended.append(index)
+                if status == 'late':
+                    late.append(index)
+            size = len(slots)
+            bitmaps.append(SessionBitmap(
+                schedule_id=schedule_id, class_obj_id=class_id, subject_id=subject_id,
+                date=day, start_time=start_time, size=size,
+                enrolled=_pack(enrolled, size), attended=_pack(attended, size), late=_pack(late, size),
+            ))
+
+        for class_id, roster in rosters.items():
+            ordered = sorted(positions[class_id], key=positions[class_id].get)
+            roster.student_ids = np.array(ordered, dtype='<i8').tobytes()
+            roster.save()
+        SessionBitmap.objects.bulk_create(bitmaps, ignore_conflicts=True)
+    return len(bitmaps)
+
+
+def rebuild_bitmaps(class_id=None):
+    """Drop and rebuild the bitmaps (and roster) of one class, or of every class."""
+    _require_numpy()
+    bitmaps = SessionBitmap.objects.all()
+    rosters = AttendanceRoster.objects.all()
+    schedules = Schedule.objects.filter(finalized_at__isnull=False)
+    if class_id is not None:
+        bitmaps = bitmaps.filter(class_obj_id=class_id)
+        rosters = rosters.filter(class_obj_id=class_id)
+        schedules = schedules.filter(class_obj_id=class_id)
+    with transaction.atomic():
+        bitmaps.delete()
+        rosters.delete()
+    return build_bitmaps(schedules)
+
+
+@dataclass
+class ClassMatrix:
+    """Packed sessions x students bit matrices of one class (bit j of a row = roster position j)."""
+    student_ids: object  # int64 array, one entry per roster position
+    sessions: list  # dicts with schedule, subject, date, start_time; one per row
+    enrolled: object  # uint8 arrays of shape (sessions, ceil(students / 8))
+    attended: object
+    late: object
+
+    @property
+    def absent(self):
+        return self.enrolled & ~self.attended
+
+    def unpack(self, packed):
+        return np.unpackbits(packed, axis=1, count=len(self.student_ids), bitorder='little').astype(bool)
+
+
+def load_class(class_id, start=None, end=None, subject_id=None):
+    _require_numpy()
+    roster = AttendanceRoster.objects.filter(class_obj_id=class_id).values_list('student_ids', flat=True).first()
+    student_ids = np.frombuffer(bytes(roster or b''), dtype='<i8')
+    width = (len(student_ids) + 7) // 8
+
+    bitmaps = SessionBitmap.objects.filter(class_obj_id=class_id)
+    if start:
+        bitmaps = bitmaps.filter(date__gte=start)
+    if end:
+        bitmaps = bitmaps.filter(date__lte=end)
+    if subject_id:
+        bitmaps = bitmaps.filter(subject_id=subject_id)
+    rows = list(bitmaps.order_by('date', 'start_time').values_list(
+        'schedule_id', 'subject_id', 'date', 'start_time', 'enrolled', 'attended', 'late'
+    ))
+
+    matrices = [np.zeros((len(rows), width), dtype=np.uint8) for _ in range(3)]
+    sessions = []
+    for index, (schedule_id, subject, day, start_time, *bitsets) in enumerate(rows):
+        sessions.append({'schedule': schedule_id, 'subject': subject, 'date': day, 'start_time': start_time})
+        for matrix, bitset in zip(matrices, bitsets):
+            # Older bitmaps are shorter than the roster; missing students read as zero
+            packed = np.frombuffer(bytes(bitset), dtype=np.uint8)
+            matrix[index, :len(packed)] = packed
+    return ClassMatrix(student_ids, sessions, *matrices)
+
+
+def rates(matrix):
+    """Per student: sessions enrolled, attended, late and attendance rate in percent."""
+    enrolled = matrix.unpack(matrix.enrolled).sum(axis=0)
+    attended = matrix.unpack(matrix.attended).sum(axis=0)
+    late = matrix.unpack(matrix.late).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where(enrolled > 0, attended * 100 / np.maximum(enrolled, 1), np.nan)
+    return enrolled, attended, late, rate
+
+
+def absence_streaks(matrix):
+    """
+    Per student: the longest run of consecutive absences and the run still open at the
+    last session. Sessions a student was not enrolled in count as not absent.
+    """
+    absent = matrix.unpack(matrix.absent)
+    if not len(absent):
+        zeros = np.zeros(len(matrix.student_ids), dtype=np.int64)
+        return zeros, zeros
+    total = np.cumsum(absent, axis=0)
+    # Absences counted up to the last session the student attended, carried forward
+    reset = np.maximum.accumulate(np.where(absent, 0, total), axis=0)
+    run = total - reset
+    return run.max(axis=0), run[-1]
+
+
+def session_losses(matrix):
+    """Absent students per session, counted straight from the packed rows."""
+    return POPCOUNT[matrix.absent].sum(axis=1, dtype=np.int64)
+
+
+def absent_in_all(matrix, rows):
+    """Roster positions absent from every given session row (bitwise AND)."""
+    packed = np.bitwise_and.reduce(matrix.absent[rows], axis=0)
+    return np.flatnonzero(np.unpackbits(packed, count=len(matrix.student_ids), bitorder='little'))
+
+
+def absent_in_any(matrix, rows):
+    """Roster positions absent from at least one given session row (bitwise OR)."""
+    packed = np.bitwise_or.reduce(matrix.absent[rows], axis=0)
+    return np.flatnonzero(np.unpackbits(packed, count=len(matrix.student_ids), bitorder='little'))
+
+
+def co_absence(matrix, min_shared=3, top=20):
+    """
+    Pairs of students who miss the same sessions, ranked by Jaccard similarity
+    of their absence sets. Returns a list of (position_a, position_b, shared, jaccard).
+    """
+    absent = matrix.unpack(matrix.absent).astype(np.float32)
+    counts = absent.sum(axis=0)
+    active = np.flatnonzero(counts >= min_shared)
+    if len(active) < 2:
+        return []
+    subset = absent[:, active]
+    shared = subset.T @ subset
+    union = counts[active][:, None] + counts[active][None, :] - shared
+    jaccard = np.where(union > 0, shared / np.maximum(union, 1), 0)
+    upper = np.triu(np.ones_like(shared, dtype=bool), k=1) & (shared >= min_shared)
+    candidates = np.flatnonzero(upper)
+    if not len(candidates):
+        return []
+    scores = jaccard.ravel()[candidates]
+    best = candidates[np.argsort(-scores, kind='stable')[:top]]
+    a, b = np.unravel_index(best, shared.shape)
+    return [
+        (int(active[i]), int(active[j]), int(shared[i, j]), round(float(jaccard[i, j]), 3))
+        for i, j in zip(a, b)
+    ]
@@ -0,0 +1,114 @@
+"""
+Per-student attendance counters.
+
+StudentAttendanceCounter keeps present/late/absent totals per student,
+subject and semester, so dashboards and warning thresholds read one row
+per subject instead of counting StudentAttendance. Every write path calls
+refresh_attendance_counters() inside its own transaction with the
+(student, schedule) pairs it touched; the affected counters are then
+recomputed from the few rows they cover, which stays correct whether an
+upsert inserted a row or left an earlier check-in in place.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from lecturer.models import Schedule
+from .models import StudentAttendance, StudentAttendanceCounter
+
+# Attendance rate (percent) below which a subject is flagged on the dashboard
+WARNING_RATE = 80
+
+
+def refresh_counters(keys):
+    """Recompute the counters for an iterable of (student_id, subject_id, semester_id) keys."""
+    keys = set(keys)
+    if not keys:
+        return
+
+    # Match on the students and subjects and keep the exact keys here: one OR-ed
+    # clause per key overflows SQLite's expression depth on a finalization chunk
+    student_ids = {key[0] for key in keys}
+    subject_ids = {key[1] for key in keys}
+    totals = defaultdict(lambda: {'present': 0, 'late': 0, 'absent': 0})
+    rows = StudentAttendance.objects.filter(
+        student_id__in=student_ids,
+        schedule__subject_id__in=subject_ids,
+    ).values('student_id', 'schedule__subject_id', 'schedule__semester_id', 'status').annotate(n=Count('id'))
+    for row in rows:
+        key = (row['student_id'], row['schedule__subject_id'], row['schedule__semester_id'])
+        if key in keys and row['status'] in ('present', 'late', 'absent'):
+            totals[key][row['status']] += row['n']
+
+    with transaction.atomic():
+        # Delete and re-insert: a NULL semester never conflicts, so an upsert could duplicate it
+        stale = [
+            pk for pk, *key in StudentAttendanceCounter.objects.filter(
+                student_id__in=student_ids, subject_id__in=subject_ids
+            ).values_list('id', 'student_id', 'subject_id', 'semester_id')
+            if tuple(key) in keys
+        ]
+        StudentAttendanceCounter.objects.filter(id__in=stale).delete()
+        StudentAttendanceCounter.objects.bulk_create([
+            StudentAttendanceCounter(student_id=student_id, subject_id=subject_id, semester_id=semester_id, **total)
+            for (student_id, subject_id, semester_id), total in totals.items()
+        ], batch_size=1000)
+
+
+def refresh_attendance_counters(pairs):
+    """Recompute the counters affected by an iterable of (student_id, schedule_id) pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    sessions = {
+        pk: (subject_id, semester_id)
+        for pk, subject_id, semester_id in Schedule.objects.filter(
+            id__in={schedule_id for _, schedule_id in pairs}
+        ).values_list('id', 'subject_id', 'semester_id')
+    }
+    refresh_counters(
+        (student_id, *sessions[schedule_id])
+        for student_id, schedule_id in pairs if schedule_id in sessions
+    )
+
+
+def rebuild_attendance_counters(batch_size=500):
+    """Recompute every counter from StudentAttendance; returns the number of counters written."""
+    with transaction.atomic():
+        StudentAttendanceCounter.objects.all().delete()
+        totals = defaultdict(lambda: {'present': 0, 'late': 0, 'absent': 0})
+        rows = StudentAttendance.objects.values(
+            'student_id', 'schedule__subject_id', 'schedule__semester_id', 'status'
+        ).annotate(n=Count('id')).order_by()
+        for row in rows.iterator(chunk_size=2000):
+            if row['status'] in ('present', 'late', 'absent'):
+                key = (row['student_id'], row['schedule__subject_id'], row['schedule__semester_id'])
+                totals[key][row['status']] += row['n']
+        StudentAttendanceCounter.objects.bulk_create([
+            StudentAttendanceCounter(student_id=student_id, subject_id=subject_id, semester_id=semester_id, **total)
+            for (student_id, subject_id, semester_id), total in totals.items()
+        ], batch_size=batch_size)
+    return len(totals)
+
+
+def attendance_summary(student_id, semester_id=None):
+    """One entry per subject from the counters, flagged when the rate falls below WARNING_RATE."""
+    counters = StudentAttendanceCounter.objects.filter(student_id=student_id).select_related('subject')
+    if semester_id:
+        counters = counters.filter(semester_id=semester_id)
+    data = []
+    for counter in counters.order_by('subject__name', 'semester_id'):
+        rate = counter.attendance_rate
+        data.append({
+            'subject': counter.subject_id,
+            'subject_name': counter.subject.name,
+            'semester': counter.semester_id,
+            'present': counter.present,
+            'late': counter.late,
+            'absent': counter.absent,
+            'sessions': counter.sessions,
+            'attendance_rate': rate,
+            'warning': rate is not None and rate < WARNING_RATE,
+        })
+    return data
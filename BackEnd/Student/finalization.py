@@ -0,0 +1,92 @@
+"""
+Absent rows for students who never scanned into a session.
+
+StudentAttendance.status defaults to 'absent', but that only helps if a row
+exists. Once a Schedule has ended, the class roster minus the students who
+checked in is computed as one anti-join for every session being finalized,
+and the missing rows are inserted with bulk_create in chunks.
+"""
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from lecturer.live import publish_attendance
+from lecturer.models import Schedule, TeacherAttendance
+from .counters import refresh_attendance_counters
+from .models import StudentProfile, StudentAttendance
+
+CHUNK_SIZE = 1000
+
+
+def ended_schedules(now=None, since=None):
+    """
+    Sessions that have ended and have not been finalized yet.
+    Pass `since` to only look back to that date instead of the whole history.
+    """
+    now = timezone.localtime(now or timezone.now())
+    schedules = Schedule.objects.filter(
+        Q(date__lt=now.date()) | Q(date=now.date(), end_time__lte=now.time()),
+        finalized_at__isnull=True,
+    )
+    if since is not None:
+        schedules = schedules.filter(date__gte=since)
+    return schedules
+
+
+def finalize_schedules(schedules, chunk_size=CHUNK_SIZE):
+    """
+    Create absent rows for every active student of each schedule's class
+    who has no attendance row, then mark the schedules as finalized.
+    Returns (schedules finalized, absent rows created).
+    """
+    schedule_ids = list(schedules.values_list('id', flat=True))
+    if not schedule_ids:
+        return 0, 0
+
+    teacher_attendance = {}
+    for schedule_id, attendance_id in TeacherAttendance.objects.filter(
+        schedule_id__in=schedule_ids
+    ).order_by('-id').values_list('schedule_id', 'id'):
+        teacher_attendance[schedule_id] = attendance_id  # earliest row per schedule wins
+
+    missing = (
+        StudentProfile.objects
+        .filter(status='Active', class_obj__schedule__id__in=schedule_ids)
+        .annotate(session_id=F('class_obj__schedule__id'))
+        .filter(~Exists(StudentAttendance.objects.filter(
+            student_id=OuterRef('pk'), schedule_id=OuterRef('session_id')
+        )))
+        .values_list('pk', 'session_id')
+    )
+
+    created = 0
+    chunk = []
+
+    def write(rows):
+        with transaction.atomic():
+            # ignore_conflicts keeps a scan that lands mid-run from failing the chunk
+            StudentAttendance.objects.bulk_create(rows, ignore_conflicts=True)
+            refresh_attendance_counters((row.student_id, row.schedule_id) for row in rows)
+            publish_attendance('student', rows)
+        return len(rows)
+
+    for student_id, schedule_id in missing.iterator(chunk_size=chunk_size):
+        chunk.append(StudentAttendance(
+            student_id=student_id,
+            schedule_id=schedule_id,
+            teacher_attendance_id=teacher_attendance.get(schedule_id),
+            status='absent',
+        ))
+        if len(chunk) >= chunk_size:
+            created += write(chunk)
+            chunk = []
+    if chunk:
+        created += write(chunk)
+
+    finalized = Schedule.objects.filter(id__in=schedule_ids).update(finalized_at=timezone.now())
+    return finalized, created
+
+
+def finalize_day(day, now=None):
+    """Finalize every ended, not yet finalized session on the given date."""
+    return finalize_schedules(ended_schedules(now).filter(date=day))
@@ -0,0 +1,164 @@
+"""
+Grades and credit-weighted GPA.
+
+Scores are stored with their letter and grade points from GRADE_SCALE.
+recompute_gpa() loads the graded enrollments of a set of students once and
+computes every GPA in a single NumPy pass (credits x points summed per
+student with bincount); only students whose GPA actually changed are
+written back. Grade entry passes just the students it touched.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .models import Enrollment, Grade, StudentProfile
+
+# (minimum score, letter, grade points), highest first
+GRADE_SCALE = [
+    (85, 'A', Decimal('4.00')),
+    (80, 'B+', Decimal('3.50')),
+    (70, 'B', Decimal('3.00')),
+    (65, 'C+', Decimal('2.50')),
+    (50, 'C', Decimal('2.00')),
+    (45, 'D', Decimal('1.50')),
+    (40, 'E', Decimal('1.00')),
+    (0, 'F', Decimal('0.00')),
+]
+
+
+def letter_for(score):
+    """(letter, grade points) for a score out of 100."""
+    for minimum, letter, points in GRADE_SCALE:
+        if score >= minimum:
+            return letter, points
+    return GRADE_SCALE[-1][1], GRADE_SCALE[-1][2]
+
+
+def _gpa_values(student_ids, rows):
+    """Map each student to a Decimal GPA, or None if they have no credit-bearing grades."""
+    gpas = dict.fromkeys(student_ids)
+    if not rows:
+        return gpas
+    if np is not None:
+        students = np.array([row[0] for row in rows], dtype=np.int64)
+        credits = np.array([row[1] for row in rows], dtype=np.float64)
+        points = np.array([float(row[2]) for row in rows])
+        keys, inverse = np.unique(students, return_inverse=True)
+        weighted = np.bincount(inverse, weights=credits * points)
+        total = np.bincount(inverse, weights=credits)
+        for student_id, value, weight in zip(keys.tolist(), weighted, total):
+            if weight > 0:
+                gpas[student_id] = Decimal(str(round(value / weight, 2))).quantize(Decimal('0.01'))
+        return gpas
+    totals = {}
+    for student_id, credits, points in rows:
+        value, weight = totals.get(student_id, (Decimal(0), 0))
+        totals[student_id] = (value + credits * points, weight + credits)
+    for student_id, (value, weight) in totals.items():
+        if weight > 0:
+            gpas[student_id] = (value / weight).quantize(Decimal('0.01'))
+    return gpas
+
+
+def recompute_gpa(student_ids):
+    """
+    Recompute the GPA of the given students (ids or a StudentProfile queryset).
+    Returns the number of profiles whose GPA changed.
+    """
+    if hasattr(student_ids, 'values_list'):
+        student_ids = student_ids.values_list('id', flat=True)
+    student_ids = set(student_ids)
+    if not student_ids:
+        return 0
+
+    rows = list(Grade.objects.filter(
+        enrollment__student_id__in=student_ids,
+    ).exclude(enrollment__status='dropped').values_list(
+        'enrollment__student_id', 'enrollment__subject__credits', 'grade_points',
+    ))
+    gpas = _gpa_values(student_ids, rows)
+
+    changed = [
+        StudentProfile(id=student_id, gpa=gpas[student_id])
+        for student_id, current in StudentProfile.objects.filter(id__in=student_ids).values_list('id', 'gpa')
+        if current != gpas[student_id]
+    ]
+    if changed:
+        StudentProfile.objects.bulk_update(changed, ['gpa'], batch_size=1000)
+    return len(changed)
+
+
+def enter_grades(class_id, subject_id, semester_id, entries, user=None):
+    """
+    Record scores for students of a class in one subject and semester.
+    `entries` is a list of {'student', 'score', 'remarks'}; missing enrollments
+    are created. Returns counts plus the entries that were rejected.
+    """
+    roster = set(StudentProfile.objects.filter(class_obj_id=class_id).values_list('id', flat=True))
+    rejected, scores = [], {}
+    for entry in entries:
+        if entry['student'] not in roster:
+            rejected.append({'student': entry['student'], 'error': 'Student is not in this class'})
+        else:
+            scores[entry['student']] = entry
+    if not scores:
+        return {'created': 0, 'updated': 0, 'unchanged': 0, 'gpa_updated': 0, 'rejected': rejected}
+
+    with transaction.atomic():
+        enrollments = dict(Enrollment.objects.filter(
+            student_id__in=scores, subject_id=subject_id, semester_id=semester_id,
+        ).values_list('student_id', 'id'))
+        missing = [student_id for student_id in scores if student_id not in enrollments]
+        if missing:
+            Enrollment.objects.bulk_create([
+                Enrollment(student_id=student_id, subject_id=subject_id, semester_id=semester_id,
+                           class_obj_id=class_id)
+                for student_id in missing
+            ])
+            enrollments.update(Enrollment.objects.filter(
+                student_id__in=missing, subject_id=subject_id, semester_id=semester_id,
+            ).values_list('student_id', 'id'))
+
+        existing = {grade.enrollment_id: grade for grade in Grade.objects.filter(
+            enrollment_id__in=enrollments.values()
+        )}
+        now = timezone.now()
+        new, changed, touched = [], [], set()
+        for student_id, entry in scores.items():
+            score = Decimal(entry['score']).quantize(Decimal('0.01'))
+            letter, points = letter_for(score)
+            remarks = entry.get('remarks', '')
+            grade = existing.get(enrollments[student_id])
+            if grade is None:
+                new.append(Grade(enrollment_id=enrollments[student_id], score=score, letter=letter,
+                                 grade_points=points, graded_by=user, remarks=remarks))
+                touched.add(student_id)
+            elif grade.score != score or grade.remarks != remarks:
+                if grade.grade_points != points:
+                    touched.add(student_id)
+                grade.score, grade.letter, grade.grade_points = score, letter, points
+                grade.remarks, grade.graded_by, grade.updated_at = remarks, user, now
+                changed.append(grade)
+
+        if new:
+            Grade.objects.bulk_create(new, batch_size=1000)
+        if changed:
+            Grade.objects.bulk_update(
+                changed, ['score', 'letter', 'grade_points', 'remarks', 'graded_by', 'updated_at'],
+                batch_size=1000,
+            )
+        gpa_updated = recompute_gpa(touched)
+
+    return {
+        'created': len(new),
+        'updated': len(changed),
+        'unchanged': len(scores) - len(new) - len(changed),
+        'gpa_updated': gpa_updated,
+        'rejected': rejected,
+    }
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.bitmaps import BitmapError, build_bitmaps, rebuild_bitmaps
+
+
+class Command(BaseCommand):
+    help = "Encode finalized sessions as attendance bitmaps for analytics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Drop existing bitmaps and rosters and build them again")
+        parser.add_argument('--class', dest='class_id', type=int,
+                            help="Only rebuild this class (with --rebuild)")
+
+    def handle(self, *args, **options):
+        try:
+            if options['rebuild']:
+                built = rebuild_bitmaps(options['class_id'])
+            else:
+                built = build_bitmaps()
+        except BitmapError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Built {built} session bitmap(s)"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from student.name_sync import check_names
+
+
+class Command(BaseCommand):
+    help = "Find (and with --fix, repair) department/major/class names on StudentProfile that drifted from their FKs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Rewrite the drifted names")
+
+    def handle(self, *args, **options):
+        report = check_names(fix=options['fix'])
+        for column, entry in report.items():
+            line = f"{column}: {entry['drifted']} drifted"
+            if 'fixed' in entry:
+                line += f", {entry['fixed']} fixed"
+            elif entry['sample']:
+                line += f" (e.g. students {', '.join(map(str, entry['sample']))})"
+            self.stdout.write(line)
+        if options['fix'] or not any(entry['drifted'] for entry in report.values()):
+            self.stdout.write(self.style.SUCCESS("Student names are consistent"))
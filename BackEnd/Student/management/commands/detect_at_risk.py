@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.at_risk import AtRiskError, detect_at_risk
+
+
+class Command(BaseCommand):
+    help = "Flag students with low attendance or long absence streaks (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Ignore the watermark and recompute from all attendance")
+
+    def handle(self, *args, **options):
+        try:
+            summary = detect_at_risk(rebuild=options['rebuild'])
+        except AtRiskError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {summary['rows']} attendance row(s) through {summary['through']}: "
+            f"{summary['updated']} student-subject(s) updated, {summary['flagged']} flagged"
+        ))
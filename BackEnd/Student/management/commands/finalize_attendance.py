@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student.finalization import ended_schedules, finalize_day, finalize_schedules
+
+
+class Command(BaseCommand):
+    help = "Create absent attendance rows for students who did not check in to ended sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Only finalize sessions on this day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format")
+            finalized, created = finalize_day(day)
+        else:
+            finalized, created = finalize_schedules(ended_schedules())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Finalized {finalized} session(s), created {created} absent row(s)"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from student.counters import rebuild_attendance_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute per-student, per-subject attendance counters from StudentAttendance"
+
+    def handle(self, *args, **options):
+        count = rebuild_attendance_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} attendance counter(s)"))
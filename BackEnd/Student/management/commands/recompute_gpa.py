@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from student.grades import recompute_gpa
+from student.models import StudentProfile
+
+
+class Command(BaseCommand):
+    help = "Recompute credit-weighted GPAs from grades"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_id', type=int, help="Only students of this class")
+
+    def handle(self, *args, **options):
+        students = StudentProfile.objects.all()
+        if options['class_id']:
+            students = students.filter(class_obj_id=options['class_id'])
+        changed = recompute_gpa(students)
+        self.stdout.write(self.style.SUCCESS(f"Updated the GPA of {changed} student(s)"))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student.models import RolloverRun
+from student.rollover import RolloverError, apply_rollover, plan_rollover, undo_rollover
+
+
+class Command(BaseCommand):
+    help = "Move active students to their next class, study year and academic year (dry run unless --apply)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--map', action='append', default=[], metavar='SOURCE:TARGET',
+                            help="Class id to move from and class id to move to; repeat for each class")
+        parser.add_argument('--academic-year', type=int, help="Target academic year id (default: the next one)")
+        parser.add_argument('--semester', default='1', help="Semester to set (default: 1)")
+        parser.add_argument('--apply', action='store_true', help="Write the changes instead of only reporting them")
+        parser.add_argument('--undo', type=int, metavar='RUN_ID', help="Undo an applied rollover run")
+
+    def handle(self, *args, **options):
+        try:
+            if options['undo']:
+                run = RolloverRun.objects.filter(pk=options['undo']).first()
+                if run is None:
+                    raise CommandError(f"No rollover run {options['undo']}")
+                restored = undo_rollover(run)
+                self.stdout.write(self.style.SUCCESS(f"Restored {restored} student(s) from run {run.pk}"))
+                return
+
+            try:
+                class_map = dict(pair.split(':', 1) for pair in options['map'])
+            except ValueError:
+                raise CommandError("--map must look like SOURCE:TARGET")
+            if options['apply']:
+                run = apply_rollover(class_map, options['academic_year'], options['semester'])
+                self.stdout.write(json.dumps(run.report, indent=2))
+                self.stdout.write(self.style.SUCCESS(
+                    f"Rollover run {run.pk} moved {run.student_count} student(s)"
+                ))
+            else:
+                self.stdout.write(json.dumps(
+                    plan_rollover(class_map, options['academic_year'], options['semester']), indent=2
+                ))
+                self.stdout.write(self.style.WARNING("Dry run: nothing was changed (use --apply)"))
+        except RolloverError as exc:
+            raise CommandError(str(exc))
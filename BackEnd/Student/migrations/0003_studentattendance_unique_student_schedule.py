@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:12
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    # Keep the earliest row for every (student, schedule) pair so the unique
+    # constraint can be created on databases that already hold duplicate scans.
+    StudentAttendance = apps.get_model('student', 'StudentAttendance')
+    duplicates = (
+        StudentAttendance.objects.values('student_id', 'schedule_id')
+        .annotate(keep_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        StudentAttendance.objects.filter(
+            student_id=dup['student_id'], schedule_id=dup['schedule_id']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lecturer', '0002_initial'),
+        ('student', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='studentattendance',
+            unique_together={('student', 'schedule')},
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0005_remove_course_academic_year_and_more'),
+        ('core', '0003_schedulerlock'),
+        ('student', '0003_studentattendance_unique_student_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAttendanceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('semester', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_counters', to='student.studentprofile')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admins.subject')),
+            ],
+            options={
+                'unique_together': {('student', 'subject', 'semester')},
+            },
+        ),
+    ]
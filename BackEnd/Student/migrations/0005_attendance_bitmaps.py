@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0005_remove_course_academic_year_and_more'),
+        ('lecturer', '0010_schedule_timetable_indexes'),
+        ('student', '0004_studentattendancecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRoster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_ids', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_obj', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_roster', to='admins.class')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SessionBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('size', models.PositiveIntegerField()),
+                ('enrolled', models.BinaryField()),
+                ('attended', models.BinaryField()),
+                ('late', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('class_obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admins.class')),
+                ('schedule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmap', to='lecturer.schedule')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admins.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['class_obj', 'date', 'start_time'], name='student_bitmap_class_date_idx')],
+            },
+        ),
+    ]
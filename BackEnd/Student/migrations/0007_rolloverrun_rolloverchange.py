@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0005_remove_course_academic_year_and_more'),
+        ('core', '0003_schedulerlock'),
+        ('student', '0006_enrollment_grade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RolloverRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.CharField(max_length=50)),
+                ('class_map', models.JSONField(default=dict)),
+                ('report', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('undone', 'Undone')], default='applied', max_length=20)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('undone_at', models.DateTimeField(blank=True, null=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.academicyear')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RolloverChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_class_name', models.CharField(blank=True, max_length=100)),
+                ('previous_study_year', models.CharField(blank=True, max_length=50)),
+                ('previous_semester', models.CharField(blank=True, max_length=50)),
+                ('previous_academic_year', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.academicyear')),
+                ('previous_class', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admins.class')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='student.rolloverrun')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student.studentprofile')),
+            ],
+            options={
+                'unique_together': {('run', 'student')},
+            },
+        ),
+    ]
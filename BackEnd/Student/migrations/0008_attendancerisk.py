@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admins', '0005_remove_course_academic_year_and_more'),
+        ('student', '0007_rolloverrun_rolloverchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRisk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('flagged', models.BooleanField(default=False)),
+                ('reasons', models.CharField(blank=True, max_length=100)),
+                ('flagged_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_risks', to='student.studentprofile')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admins.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['flagged', 'subject'], name='student_risk_flagged_idx')],
+                'unique_together': {('student', 'subject')},
+            },
+        ),
+    ]
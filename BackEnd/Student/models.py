@@ -56,3 +56,157 @@ class StudentAttendance(models.Model):
 
     def __str__(self):
         return f"{self.student.full_name} - {self.schedule.date} - {self.status}"
+
+    class Meta:
+        unique_together = ('student', 'schedule')
+
+class StudentAttendanceCounter(models.Model):
+    """Running present/late/absent totals per student, subject and semester."""
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='attendance_counters')
+    subject = models.ForeignKey('admins.Subject', on_delete=models.CASCADE)
+    semester = models.ForeignKey('core.Semester', on_delete=models.CASCADE, null=True, blank=True)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student.full_name} - {self.subject}: {self.present}/{self.late}/{self.absent}"
+
+    @property
+    def sessions(self):
+        return self.present + self.late + self.absent
+
+    @property
+    def attendance_rate(self):
+        """Share of sessions attended (present or late), in percent."""
+        return round((self.present + self.late) * 100 / self.sessions, 1) if self.sessions else None
+
+    class Meta:
+        unique_together = ('student', 'subject', 'semester')
+
+class AttendanceRoster(models.Model):
+    """Bit position of every student seen in a class's attendance; append-only."""
+    class_obj = models.OneToOneField('admins.Class', on_delete=models.CASCADE, related_name='attendance_roster')
+    student_ids = models.BinaryField(default=bytes)  # little-endian int64, position = bit index
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.class_obj} roster ({len(self.student_ids) // 8} students)"
+
+class SessionBitmap(models.Model):
+    """Attendance of one finalized session as bitsets over its class roster."""
+    schedule = models.OneToOneField('lecturer.Schedule', on_delete=models.CASCADE, related_name='attendance_bitmap')
+    class_obj = models.ForeignKey('admins.Class', on_delete=models.CASCADE)
+    subject = models.ForeignKey('admins.Subject', on_delete=models.CASCADE)
+    date = models.DateField()
+    start_time = models.TimeField()
+    size = models.PositiveIntegerField()  # roster length when the bitmap was built
+    enrolled = models.BinaryField()  # students with a row for the session
+    attended = models.BinaryField()  # present or late
+    late = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.class_obj} - {self.date} {self.start_time}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['class_obj', 'date', 'start_time'], name='student_bitmap_class_date_idx'),
+        ]
+
+class Enrollment(models.Model):
+    STATUS_CHOICES = [
+        ('enrolled', 'Enrolled'),
+        ('completed', 'Completed'),
+        ('dropped', 'Dropped'),
+    ]
+
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='enrollments')
+    subject = models.ForeignKey('admins.Subject', on_delete=models.CASCADE)
+    semester = models.ForeignKey('core.Semester', on_delete=models.CASCADE)
+    class_obj = models.ForeignKey('admins.Class', on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='enrolled')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student.full_name} - {self.subject} - {self.semester}"
+
+    class Meta:
+        unique_together = ('student', 'subject', 'semester')
+        indexes = [
+            models.Index(fields=['class_obj', 'subject', 'semester'], name='student_enroll_class_idx'),
+        ]
+
+class Grade(models.Model):
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='grade')
+    score = models.DecimalField(max_digits=5, decimal_places=2)  # 0 - 100
+    letter = models.CharField(max_length=2)
+    grade_points = models.DecimalField(max_digits=3, decimal_places=2)
+    graded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    remarks = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.letter}"
+
+class RolloverRun(models.Model):
+    """An applied academic-year rollover; its changes are the undo log."""
+    STATUS_CHOICES = [
+        ('applied', 'Applied'),
+        ('undone', 'Undone'),
+    ]
+
+    academic_year = models.ForeignKey('core.AcademicYear', on_delete=models.PROTECT)
+    semester = models.CharField(max_length=50)
+    class_map = models.JSONField(default=dict)  # {source class id: target class id}
+    report = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='applied')
+    student_count = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    undone_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Rollover to {self.academic_year} ({self.student_count} students, {self.status})"
+
+class RolloverChange(models.Model):
+    run = models.ForeignKey(RolloverRun, on_delete=models.CASCADE, related_name='changes')
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE)
+    previous_class = models.ForeignKey('admins.Class', on_delete=models.SET_NULL, null=True, related_name='+')
+    previous_class_name = models.CharField(max_length=100, blank=True)
+    previous_academic_year = models.ForeignKey('core.AcademicYear', on_delete=models.SET_NULL, null=True, related_name='+')
+    previous_study_year = models.CharField(max_length=50, blank=True)
+    previous_semester = models.CharField(max_length=50, blank=True)
+
+    def __str__(self):
+        return f"{self.run_id} - {self.student_id}"
+
+    class Meta:
+        unique_together = ('run', 'student')
+
+class AttendanceRisk(models.Model):
+    """Running attendance state per student and subject, maintained by the at-risk job."""
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='attendance_risks')
+    subject = models.ForeignKey('admins.Subject', on_delete=models.CASCADE)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    current_streak = models.PositiveIntegerField(default=0)  # consecutive absences up to last_date
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_date = models.DateField(null=True, blank=True)
+    flagged = models.BooleanField(default=False)
+    reasons = models.CharField(max_length=100, blank=True)  # comma separated: low_rate, absence_streak
+    flagged_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student.full_name} - {self.subject}: {self.reasons or 'ok'}"
+
+    class Meta:
+        unique_together = ('student', 'subject')
+        indexes = [
+            models.Index(fields=['flagged', 'subject'], name='student_risk_flagged_idx'),
+        ]
@@ -0,0 +1,98 @@
+"""
+Denormalized name columns on StudentProfile.
+
+department_name, major_name and class_name copy the names of the
+department, major and class FKs. When one of those is renamed, the copies
+are rewritten in the background with a single correlated UPDATE for that
+entity, so the save that renamed it does not wait on thousands of rows.
+check_names() finds rows that drifted anyway (bulk imports, edits that
+changed only the FK) and can fix them with one UPDATE per column.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from admins.models import Class, Department, Major
+from .models import StudentProfile
+
+logger = logging.getLogger(__name__)
+
+# FK field -> (denormalized column, model the name comes from)
+DENORMALIZED = {
+    'department': ('department_name', Department),
+    'major': ('major_name', Major),
+    'class_obj': ('class_name', Class),
+}
+FIELD_FOR_MODEL = {model: field for field, (_, model) in DENORMALIZED.items()}
+
+_executor = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _source_name(field):
+    column, model = DENORMALIZED[field]
+    return Subquery(model.objects.filter(pk=OuterRef(field)).values('name')[:1])
+
+
+def _drifted(field, queryset=None):
+    column, _ = DENORMALIZED[field]
+    queryset = StudentProfile.objects.all() if queryset is None else queryset
+    return queryset.annotate(expected_name=Coalesce(_source_name(field), F(column))).filter(
+        ~Q(**{column: F('expected_name')})
+    )
+
+
+def sync_names(field, pk):
+    """Rewrite the denormalized name of every student pointing at one department, major or class."""
+    column, _ = DENORMALIZED[field]
+    stale = _drifted(field, StudentProfile.objects.filter(**{field: pk}))
+    return StudentProfile.objects.filter(pk__in=stale.values('pk')).update(**{column: _source_name(field)})
+
+
+def _run(field, pk):
+    with _pending_lock:
+        _pending.discard((field, pk))
+    try:
+        updated = sync_names(field, pk)
+        logger.info('Synced %s of %d students for %s %s', DENORMALIZED[field][0], updated, field, pk)
+    except Exception:
+        logger.exception('Syncing %s names for %s failed', field, pk)
+    finally:
+        close_old_connections()
+
+
+def queue_sync(field, pk):
+    """Schedule sync_names on the background worker; renames queued twice run once."""
+    global _executor
+    with _pending_lock:
+        if (field, pk) in _pending:
+            return None
+        _pending.add((field, pk))
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='name-sync')
+    return _executor.submit(_run, field, pk)
+
+
+def check_names(fix=False):
+    """
+    Count students whose denormalized names differ from their FKs, per column.
+    With fix=True each drifted column is rewritten with one correlated UPDATE.
+    """
+    report = {}
+    for field, (column, _) in DENORMALIZED.items():
+        drifted = _drifted(field)
+        entry = {
+            'drifted': drifted.count(),
+            'sample': list(drifted.values_list('pk', flat=True)[:10]),
+        }
+        if fix and entry['drifted']:
+            entry['fixed'] = StudentProfile.objects.filter(pk__in=drifted.values('pk')).update(
+                **{column: _source_name(field)}
+            )
+        report[column] = entry
+    return report
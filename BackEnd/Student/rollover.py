@@ -0,0 +1,243 @@
+"""
+Academic-year rollover of students.
+
+Active students of each source class move to a target class together with
+the next academic year, their next study_year and the new semester. The
+change is planned first as a diff report (that is all a dry run does);
+applying it snapshots the previous values of every student into
+RolloverChange and moves the students with one UPDATE per chunk and
+study_year value, each chunk in its own transaction. Class.current_students
+of every class involved is recomputed with one correlated UPDATE, and an
+applied run can be undone from its change log the same way.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from admins.models import AuditLog, Class
+from core.models import AcademicYear
+from .models import StudentProfile, RolloverRun, RolloverChange
+
+CHUNK_SIZE = 1000
+
+
+class RolloverError(ValueError):
+    pass
+
+
+def next_study_year(value):
+    """Increment the last number in a study year: 'Year 2' -> 'Year 3', '2' -> '3'."""
+    match = re.search(r'(\d+)(?!.*\d)', value or '')
+    if not match:
+        return value
+    return f"{value[:match.start()]}{int(match.group(1)) + 1}{value[match.end():]}"
+
+
+def next_academic_year():
+    """The academic year starting after the current one (or after today if none is current)."""
+    years = AcademicYear.objects.order_by('start_date')
+    current = AcademicYear.objects.filter(is_current=True).order_by('-start_date').first()
+    after = current.start_date if current else timezone.localdate()
+    return years.filter(start_date__gt=after).first()
+
+
+def _chunks(items, size):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+def _resolve(class_map, academic_year_id):
+    try:
+        class_map = {int(source): int(target) for source, target in class_map.items()}
+    except (TypeError, ValueError, AttributeError):
+        raise RolloverError('classes must map source class ids to target class ids')
+    if not class_map:
+        raise RolloverError('No classes to roll over')
+    if any(source == target for source, target in class_map.items()):
+        raise RolloverError('A class cannot roll over into itself')
+    classes = Class.objects.in_bulk(set(class_map) | set(class_map.values()))
+    unknown = sorted((set(class_map) | set(class_map.values())) - set(classes))
+    if unknown:
+        raise RolloverError(f'Unknown class {unknown[0]}')
+    if academic_year_id:
+        year = AcademicYear.objects.filter(pk=academic_year_id).first()
+        if year is None:
+            raise RolloverError('Unknown academic year')
+    else:
+        year = next_academic_year()
+        if year is None:
+            raise RolloverError('There is no next academic year; create it or pass one explicitly')
+    return class_map, classes, year
+
+
+def _active_counts(class_ids):
+    return dict(StudentProfile.objects.filter(
+        class_obj_id__in=class_ids, status='Active',
+    ).values('class_obj_id').annotate(n=Count('id')).values_list('class_obj_id', 'n'))
+
+
+def plan_rollover(class_map, academic_year_id=None, semester='1'):
+    """Diff report of what a rollover would change, without writing anything."""
+    return _report(*_resolve(class_map, academic_year_id), semester)
+
+
+def _report(class_map, classes, year, semester):
+    groups = defaultdict(lambda: {'students': 0, 'study_year': {}, 'semester': {}, 'academic_year': {}})
+    rows = StudentProfile.objects.filter(status='Active', class_obj_id__in=class_map).values(
+        'class_obj_id', 'study_year', 'semester', 'academic_year__year_name'
+    ).annotate(n=Count('id')).order_by()
+    for row in rows:
+        group = groups[row['class_obj_id']]
+        group['students'] += row['n']
+        for field, old, new in (
+            ('study_year', row['study_year'], next_study_year(row['study_year'])),
+            ('semester', row['semester'], semester),
+            ('academic_year', row['academic_year__year_name'], year.year_name),
+        ):
+            change = group[field].setdefault(old or '', {'to': new, 'students': 0})
+            change['students'] += row['n']
+
+    before = _active_counts(classes)
+    after = dict(before)
+    for source, target in class_map.items():
+        moving = groups[source]['students']
+        after[source] = after.get(source, 0) - moving
+        after[target] = after.get(target, 0) + moving
+
+    return {
+        'academic_year': {'id': year.pk, 'name': year.year_name},
+        'semester': semester,
+        'students': sum(group['students'] for group in groups.values()),
+        'classes': [
+            {
+                'from': source, 'from_name': classes[source].name,
+                'to': target, 'to_name': classes[target].name,
+                **groups[source],
+            }
+            for source, target in class_map.items()
+        ],
+        'class_sizes': [
+            {
+                'class': class_id, 'name': classes[class_id].name,
+                'before': before.get(class_id, 0), 'after': after.get(class_id, 0),
+                'max_students': classes[class_id].max_students,
+                'over_capacity': after.get(class_id, 0) > classes[class_id].max_students,
+            }
+            for class_id in sorted(classes)
+        ],
+    }
+
+
+def refresh_class_sizes(class_ids):
+    """Set Class.current_students to the number of active students, in one UPDATE."""
+    active = StudentProfile.objects.filter(class_obj=OuterRef('pk'), status='Active').order_by().values(
+        'class_obj'
+    ).annotate(n=Count('id')).values('n')
+    return Class.objects.filter(id__in=class_ids).update(
+        current_students=Coalesce(Subquery(active), 0), updated_at=timezone.now()
+    )
+
+
+def apply_rollover(class_map, academic_year_id=None, semester='1', user=None, chunk_size=CHUNK_SIZE):
+    """Run a rollover and record it for undo; returns the RolloverRun."""
+    class_map, classes, year = _resolve(class_map, academic_year_id)
+    report = _report(class_map, classes, year, semester)
+
+    # Snapshot who moves before anything changes, so chained maps (A->B, B->C) move each student once
+    moving = defaultdict(list)
+    for pk, class_id in StudentProfile.objects.filter(
+        status='Active', class_obj_id__in=class_map,
+    ).order_by('id').values_list('id', 'class_obj_id'):
+        moving[class_id].append(pk)
+
+    run = RolloverRun.objects.create(
+        academic_year=year, semester=semester, class_map={str(k): v for k, v in class_map.items()},
+        report=report, created_by=user if user is not None and user.is_authenticated else None,
+    )
+    now = timezone.now()
+    moved = 0
+    for source, target in class_map.items():
+        target_class = classes[target]
+        for chunk in _chunks(moving[source], chunk_size):
+            with transaction.atomic():
+                previous = list(StudentProfile.objects.filter(id__in=chunk).values_list(
+                    'id', 'class_obj_id', 'class_name', 'academic_year_id', 'study_year', 'semester'
+                ))
+                RolloverChange.objects.bulk_create([
+                    RolloverChange(
+                        run=run, student_id=pk, previous_class_id=class_id, previous_class_name=class_name,
+                        previous_academic_year_id=year_id, previous_study_year=study_year,
+                        previous_semester=old_semester,
+                    )
+                    for pk, class_id, class_name, year_id, study_year, old_semester in previous
+                ])
+                by_study_year = defaultdict(list)
+                for pk, _, _, _, study_year, _ in previous:
+                    by_study_year[study_year].append(pk)
+                for study_year, ids in by_study_year.items():
+                    moved += StudentProfile.objects.filter(id__in=ids).update(
+                        class_obj=target_class, class_name=target_class.name, academic_year=year,
+                        study_year=next_study_year(study_year), semester=semester, updated_at=now,
+                    )
+
+    refresh_class_sizes(classes)
+    run.student_count = moved
+    run.save(update_fields=['student_count'])
+    _audit(user, run, f"Rolled {moved} students over to {year.year_name}")
+    return run
+
+
+def undo_rollover(run, user=None, chunk_size=CHUNK_SIZE):
+    """Restore every student of an applied run to the values recorded before it."""
+    if run.status != 'applied':
+        raise RolloverError(f'Rollover is already {run.status}')
+    later = RolloverRun.objects.filter(
+        status='applied', created_at__gt=run.created_at,
+        changes__student_id__in=run.changes.values('student_id'),
+    )
+    if later.exists():
+        raise RolloverError('A later rollover moved the same students; undo it first')
+
+    now = timezone.now()
+    class_ids = set(int(source) for source in run.class_map) | set(run.class_map.values())
+    changes = list(run.changes.order_by('id').values_list(
+        'student_id', 'previous_class_id', 'previous_class_name', 'previous_academic_year_id',
+        'previous_study_year', 'previous_semester',
+    ))
+    restored = 0
+    for chunk in _chunks(changes, chunk_size):
+        groups = defaultdict(list)
+        for student_id, *previous in chunk:
+            groups[tuple(previous)].append(student_id)
+        with transaction.atomic():
+            for (class_id, class_name, year_id, study_year, semester), ids in groups.items():
+                fields = dict(
+                    class_name=class_name, academic_year_id=year_id, study_year=study_year,
+                    semester=semester, updated_at=now,
+                )
+                if class_id is not None:  # the old class may have been deleted since
+                    fields['class_obj_id'] = class_id
+                    class_ids.add(class_id)
+                restored += StudentProfile.objects.filter(id__in=ids).update(**fields)
+
+    refresh_class_sizes(class_ids)
+    RolloverRun.objects.filter(pk=run.pk).update(status='undone', undone_at=now)
+    run.status, run.undone_at = 'undone', now
+    _audit(user, run, f"Restored {restored} students")
+    return restored
+
+
+def _audit(user, run, details):
+    if user is None or not user.is_authenticated:
+        return  # run from the command line
+    AuditLog.objects.create(
+        user=user,
+        action='update',
+        model_name='RolloverRun',
+        object_id=str(run.pk),
+        details=details,
+    )
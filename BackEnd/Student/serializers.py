@@ -1,12 +1,60 @@
 from rest_framework import serializers
-from .models import StudentProfile, StudentAttendance
+from core.fieldsets import DynamicFieldsModelSerializer
+from admins.models import Class, Subject
+from core.models import Semester
+from .models import StudentProfile, StudentAttendance, Enrollment, Grade
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = StudentProfile
         fields = '__all__'
+        expandable_fields = {
+            'department': 'admins.serializers.DepartmentSerializer',
+            'major': 'admins.serializers.MajorSerializer',
+            'class_obj': 'admins.serializers.ClassSerializer',
+        }
 
-class StudentAttendanceSerializer(serializers.ModelSerializer):
+class StudentAttendanceSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = StudentAttendance
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        expandable_fields = {
+            'student': 'student.serializers.StudentProfileSerializer',
+            'schedule': 'lecturer.serializers.ScheduleSerializer',
+            'teacher_attendance': 'lecturer.serializers.TeacherAttendanceSerializer',
+        }
+
+class EnrollmentSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Enrollment
+        fields = '__all__'
+        expandable_fields = {
+            'student': 'student.serializers.StudentProfileSerializer',
+            'subject': 'admins.serializers.SubjectSerializer',
+            'class_obj': 'admins.serializers.ClassSerializer',
+        }
+
+class GradeSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Grade
+        fields = '__all__'
+        read_only_fields = ['letter', 'grade_points', 'graded_by']
+        expandable_fields = {
+            'enrollment': 'student.serializers.EnrollmentSerializer',
+        }
+
+    def validate_score(self, value):
+        if not 0 <= value <= 100:
+            raise serializers.ValidationError('Score must be between 0 and 100')
+        return value
+
+class GradeEntrySerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    score = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100)
+    remarks = serializers.CharField(required=False, allow_blank=True, default='')
+
+class BulkGradeSerializer(serializers.Serializer):
+    class_obj = serializers.PrimaryKeyRelatedField(queryset=Class.objects.all())
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all())
+    semester = serializers.PrimaryKeyRelatedField(queryset=Semester.objects.all())
+    grades = GradeEntrySerializer(many=True, allow_empty=False)
@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .counters import refresh_attendance_counters
+from admins.models import Class, Department, Major
+from lecturer.live import publish_attendance
+from .grades import recompute_gpa
+from .name_sync import FIELD_FOR_MODEL, queue_sync
+from .models import StudentAttendance, SessionBitmap, Enrollment, Grade
+
+
+@receiver(pre_save, sender=StudentAttendance)
+def remember_attendance_key(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = StudentAttendance.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'schedule_id'
+        ).first()
+    instance._previous_key = previous
+
+
+@receiver(post_save, sender=StudentAttendance)
+@receiver(post_delete, sender=StudentAttendance)
+def update_attendance_counters(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pairs = {(instance.student_id, instance.schedule_id)}
+    if getattr(instance, '_previous_key', None):
+        pairs.add(instance._previous_key)
+    with transaction.atomic():
+        refresh_attendance_counters(pairs)
+        # Built bitmaps of these sessions are stale; the next build recreates them
+        SessionBitmap.objects.filter(schedule_id__in={schedule_id for _, schedule_id in pairs}).delete()
+    if kwargs.get('signal') is post_save:
+        publish_attendance('student', [instance])
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def update_gpa_for_grade(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    student_id = Enrollment.objects.filter(pk=instance.enrollment_id).values_list('student_id', flat=True).first()
+    if student_id is not None:
+        recompute_gpa([student_id])
+
+
+@receiver(post_save, sender=Enrollment)
+def update_gpa_for_enrollment(sender, instance, raw=False, created=False, **kwargs):
+    # A dropped enrollment stops counting; nothing to do for a new one without a grade
+    if not raw and not created:
+        recompute_gpa([instance.student_id])
+
+
+@receiver(pre_save, sender=Department)
+@receiver(pre_save, sender=Major)
+@receiver(pre_save, sender=Class)
+def remember_name(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    instance._previous_name = previous
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Major)
+@receiver(post_save, sender=Class)
+def sync_renamed(sender, instance, raw=False, created=False, **kwargs):
+    previous = getattr(instance, '_previous_name', None)
+    if raw or created or previous is None or previous == instance.name:
+        return
+    field, pk = FIELD_FOR_MODEL[sender], instance.pk
+    transaction.on_commit(lambda: queue_sync(field, pk))
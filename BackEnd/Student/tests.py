@@ -1,3 +1,434 @@
-from django.test import TestCase
+import io
+import os
+import time as clock
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admins.models import Class, Subject
+from core.exports import EXPORT_FORMATS
+from core.models import AcademicYear
+from core.testing import make_campus, make_schedule, make_semester, make_students, make_user
+from lecturer.models import Schedule
+from . import at_risk, bitmaps, name_sync
+from .attendance_writer import AttendanceWriter, attendance_writer
+from .finalization import ended_schedules, finalize_schedules
+from .models import AttendanceRisk, Grade, StudentAttendance, StudentAttendanceCounter, StudentProfile
+
+
+def no_writer_thread():
+    """Keep scans queued until the test flushes them on its own thread."""
+    return mock.patch.object(AttendanceWriter, '_ensure_started')
+
+
+class AttendanceWriterTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3)
+
+    def test_flush_writes_queued_scans_in_one_batch(self):
+        writer = AttendanceWriter()
+        with no_writer_thread():
+            for student in self.campus.students:
+                writer.submit(student.id, self.campus.schedule.id, 'present')
+        self.assertEqual(writer.pending(), 3)
+        writer.flush()
+        self.assertEqual(StudentAttendance.objects.count(), 3)
+        stats = writer.stats.snapshot()
+        self.assertEqual((stats['batches'], stats['events_written']), (1, 3))
+
+    def test_repeat_scans_keep_the_first_checkin(self):
+        writer = AttendanceWriter()
+        student, schedule = self.campus.students[0], self.campus.schedule
+        first = timezone.now()
+        with no_writer_thread():
+            writer.submit(student.id, schedule.id, 'late', checkin_time=first + timedelta(minutes=5))
+            writer.submit(student.id, schedule.id, 'present', checkin_time=first)
+            writer.flush()
+            writer.submit(student.id, schedule.id, 'late', checkin_time=first + timedelta(minutes=30))
+            writer.flush()
+        row = StudentAttendance.objects.get()
+        self.assertEqual((row.status, row.checkin_time), ('present', first))
+
+    def test_scan_qr_queues_checkin(self):
+        client = APIClient()
+        client.force_authenticate(self.campus.students[0].user)
+        with no_writer_thread():
+            response = client.post('/api/student/scan-qr/', {'token': self.campus.session.token}, format='json')
+            attendance_writer.flush()
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(StudentAttendance.objects.filter(student=self.campus.students[0]).exists())
+
+    def test_scan_qr_rejects_expired_session(self):
+        self.campus.session.expiration_time = timezone.now() - timedelta(seconds=1)
+        self.campus.session.save()
+        client = APIClient()
+        client.force_authenticate(self.campus.students[0].user)
+        response = client.post('/api/student/scan-qr/', {'token': self.campus.session.token}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class FinalizationTests(TestCase):
+    def test_absent_rows_for_students_who_did_not_scan(self):
+        campus = make_campus(students=4, day=timezone.localdate() - timedelta(days=1))
+        scanned, inactive = campus.students[0], campus.students[1]
+        inactive.status = 'Suspended'
+        inactive.save()
+        StudentAttendance.objects.create(student=scanned, schedule=campus.schedule, status='present')
+
+        self.assertEqual(finalize_schedules(ended_schedules()), (1, 2))
+        self.assertEqual(
+            set(StudentAttendance.objects.filter(status='absent').values_list('student_id', flat=True)),
+            {student.id for student in campus.students[2:]},
+        )
+        self.assertIsNotNone(Schedule.objects.get().finalized_at)
+        self.assertEqual(finalize_schedules(ended_schedules()), (0, 0))
+
+    def test_sessions_still_running_are_left_alone(self):
+        make_campus(students=2, day=timezone.localdate() + timedelta(days=1))
+        self.assertEqual(finalize_schedules(ended_schedules()), (0, 0))
+        self.assertFalse(StudentAttendance.objects.exists())
+
+    def test_more_than_a_chunk_of_absent_rows(self):
+        # One session whose 1100 absent rows exceed SQLite's 1000-term expression limit
+        campus = make_campus(students=0, day=timezone.localdate() - timedelta(days=1))
+        make_students(campus.class_obj, 1100)
+        self.assertEqual(finalize_schedules(ended_schedules()), (1, 1100))
+        self.assertEqual(StudentAttendanceCounter.objects.filter(absent=1).count(), 1100)
+
+
+class AttendanceCounterTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3, day=timezone.localdate() - timedelta(days=1))
+        self.students = self.campus.students
+
+    def counts(self):
+        return {
+            counter.student_id: (counter.present, counter.late, counter.absent)
+            for counter in StudentAttendanceCounter.objects.all()
+        }
+
+    def test_counters_follow_every_write_path(self):
+        writer = AttendanceWriter()
+        with no_writer_thread():
+            writer.submit(self.students[0].id, self.campus.schedule.id, 'late')
+            writer.flush()
+        finalize_schedules(ended_schedules())
+        self.assertEqual(self.counts(), {
+            self.students[0].id: (0, 1, 0), self.students[1].id: (0, 0, 1), self.students[2].id: (0, 0, 1),
+        })
+        row = StudentAttendance.objects.get(student=self.students[1])
+        row.status = 'present'
+        row.save()
+        self.assertEqual(self.counts()[self.students[1].id], (1, 0, 0))
+        row.delete()
+        self.assertNotIn(self.students[1].id, self.counts())
+
+        StudentAttendanceCounter.objects.all().delete()
+        call_command('rebuild_attendance_counters', stdout=open(os.devnull, 'w'))
+        self.assertEqual(len(self.counts()), 2)
+
+    def test_counters_move_with_the_schedule_subject(self):
+        StudentAttendance.objects.create(student=self.students[0], schedule=self.campus.schedule, status='present')
+        other = Subject.objects.create(name='Databases', code='DB9', department=self.campus.department,
+                                       semester_offered='1')
+        self.campus.schedule.subject = other
+        self.campus.schedule.save()
+        self.assertEqual(list(StudentAttendanceCounter.objects.values_list('subject_id', 'present')), [(other.id, 1)])
+
+    def test_summary_flags_low_attendance(self):
+        StudentAttendance.objects.create(student=self.students[0], schedule=self.campus.schedule, status='absent')
+        client = APIClient()
+        client.force_authenticate(self.students[0].user)
+        subject = client.get('/api/student/attendance-summary/').data[0]
+        self.assertEqual((subject['absent'], subject['attendance_rate'], subject['warning']), (1, 0, True))
+
+
+@skipIf(bitmaps.np is None, 'attendance bitmaps need NumPy')
+class AttendanceBitmapTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=4, day=date(2026, 10, 1))
+        self.sessions = [self.campus.schedule] + [
+            make_schedule(self.campus.teacher, self.campus.subject, self.campus.class_obj,
+                          date(2026, 10, 1) + timedelta(days=offset))
+            for offset in range(1, 6)
+        ]
+        # 0 attends everything, 1 misses the last three, 2 and 3 miss sessions 0, 2 and 4 together
+        attended = {0: range(6), 1: [0, 1, 2], 2: [1, 3, 5], 3: [1, 3, 5]}
+        for index, sessions in attended.items():
+            for session in sessions:
+                StudentAttendance.objects.create(
+                    student=self.campus.students[index], schedule=self.sessions[session], status='present',
+                )
+        finalize_schedules(ended_schedules())
+        self.assertEqual(bitmaps.build_bitmaps(), 6)
+
+    def test_streaks_losses_and_co_absence(self):
+        matrix = bitmaps.load_class(self.campus.class_obj.id)
+        position = {int(pk): index for index, pk in enumerate(matrix.student_ids)}
+        students = [position[student.id] for student in self.campus.students]
+        longest, current = bitmaps.absence_streaks(matrix)
+        self.assertEqual((int(longest[students[1]]), int(current[students[1]])), (3, 3))
+        self.assertEqual(int(longest[students[2]]), 1)
+        self.assertEqual(list(bitmaps.session_losses(matrix)), [2, 0, 2, 1, 3, 1])
+        self.assertEqual(bitmaps.co_absence(matrix, min_shared=2), [
+            (min(students[2:]), max(students[2:]), 3, 1.0),
+        ])
+
+    def test_edited_sessions_are_rebuilt(self):
+        row = StudentAttendance.objects.get(student=self.campus.students[0], schedule=self.sessions[0])
+        row.status = 'absent'
+        row.save()
+        self.assertEqual(bitmaps.build_bitmaps(), 1)
+        self.assertEqual(bitmaps.session_losses(bitmaps.load_class(self.campus.class_obj.id))[0], 3)
+
+    def test_analytics_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.campus.teacher.user)
+        url = f'/api/student/analytics/class/{self.campus.class_obj.id}/'
+        response = client.get(url, {'min_streak': 2})
+        self.assertEqual([row['id'] for row in response.data['streaks']], [self.campus.students[1].id])
+        self.assertEqual(client.get(url, {'subject': 'algo'}).status_code, 400)
+
+
+class GradeTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3)
+        self.semester = make_semester()
+        self.students = self.campus.students
+        self.client = APIClient()
+        self.client.force_authenticate(self.campus.teacher.user)
+
+    def enter(self, subject, grades):
+        return self.client.post('/api/student/grades/bulk/', {
+            'class_obj': self.campus.class_obj.id, 'subject': subject.id, 'semester': self.semester.id,
+            'grades': grades,
+        }, format='json')
+
+    def gpa(self, student):
+        return StudentProfile.objects.get(pk=student.pk).gpa
+
+    def test_bulk_entry_grades_and_recomputes_gpa(self):
+        grades = [
+            {'student': self.students[0].id, 'score': 90},
+            {'student': self.students[1].id, 'score': 72.5},
+            {'student': 0, 'score': 50},
+        ]
+        response = self.enter(self.campus.subject, grades)
+        self.assertEqual((response.data['created'], len(response.data['rejected'])), (2, 1))
+        self.assertEqual((self.gpa(self.students[0]), self.gpa(self.students[1])), (Decimal('4.00'), Decimal('3.00')))
+        self.assertEqual(self.enter(self.campus.subject, grades).data['unchanged'], 2)
+
+        # Credit-weighted: (4.00 x 3 + 2.00 x 1) / 4
+        databases = Subject.objects.create(name='Databases', code='DB2', department=self.campus.department,
+                                           semester_offered='1', credits=1)
+        self.assertEqual(self.enter(databases, grades[:1]).status_code, 403)  # not this teacher's subject
+        self.client.force_authenticate(make_user(is_staff=True, is_superuser=True))
+        self.enter(databases, [{'student': self.students[0].id, 'score': 55}])
+        self.assertEqual(self.gpa(self.students[0]), Decimal('3.50'))
+
+        Grade.objects.get(enrollment__student=self.students[1]).delete()
+        self.assertIsNone(self.gpa(self.students[1]))
+
+
+class RolloverTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3)
+        current = AcademicYear.objects.create(
+            year_name='2026-2027', start_date=date(2026, 9, 1), end_date=date(2027, 8, 31), is_current=True,
+        )
+        self.next_year = AcademicYear.objects.create(
+            year_name='2027-2028', start_date=date(2027, 9, 1), end_date=date(2028, 8, 31),
+        )
+        self.second_year = Class.objects.create(
+            name='CS-Y2', major=self.campus.major, academic_year='2027', semester='1', shift='morning',
+        )
+        StudentProfile.objects.update(study_year='Year 1', semester='2', academic_year=current)
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True, is_superuser=True))
+        self.body = {'classes': {str(self.campus.class_obj.id): self.second_year.id}}
+
+    def placement(self):
+        return sorted(StudentProfile.objects.values_list('class_obj_id', 'study_year', 'academic_year_id'))
+
+    def test_dry_run_apply_and_undo(self):
+        before = self.placement()
+        response = self.client.post('/api/student/rollover/', self.body, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.placement(), before)
+
+        response = self.client.post('/api/student/rollover/', {**self.body, 'dry_run': False}, format='json')
+        self.assertEqual(self.placement(), [(self.second_year.id, 'Year 2', self.next_year.id)] * 3)
+        self.assertEqual(Class.objects.get(pk=self.second_year.pk).current_students, 3)
+
+        undo = f"/api/student/rollover/{response.data['run']}/undo/"
+        self.assertEqual(self.client.post(undo).status_code, 200)
+        self.assertEqual(self.placement(), before)
+        self.assertEqual(self.client.post(undo).status_code, 400)
+
+    def test_rejects_bad_class_maps(self):
+        for classes in ({'x': 1}, {str(self.campus.class_obj.id): self.campus.class_obj.id}, {'999': 998}):
+            response = self.client.post('/api/student/rollover/', {'classes': classes}, format='json')
+            self.assertEqual(response.status_code, 400, classes)
+
+
+class NameSyncTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3)
+        StudentProfile.objects.update(
+            department_name=self.campus.department.name, major_name=self.campus.major.name,
+            class_name=self.campus.class_obj.name,
+        )
+
+    def test_rename_queues_one_sync_after_commit(self):
+        class_obj = self.campus.class_obj
+        with mock.patch('student.signals.queue_sync') as queue_sync, \
+                self.captureOnCommitCallbacks(execute=True):
+            class_obj.name = 'CS-A'
+            class_obj.save()
+            class_obj.academic_year = '2027'
+            class_obj.save()
+        queue_sync.assert_called_once_with('class_obj', class_obj.pk)
+        self.assertEqual(name_sync.sync_names('class_obj', class_obj.pk), 3)
+        self.assertEqual(set(StudentProfile.objects.values_list('class_name', flat=True)), {'CS-A'})
+
+    def test_check_names_reports_and_fixes_drift(self):
+        StudentProfile.objects.filter(pk=self.campus.students[0].pk).update(major_name='Old name')
+        report = name_sync.check_names()
+        self.assertEqual(report['major_name'], {'drifted': 1, 'sample': [self.campus.students[0].pk]})
+        self.assertEqual(report['class_name']['drifted'], 0)
+        self.assertEqual(name_sync.check_names(fix=True)['major_name']['fixed'], 1)
+        self.assertEqual(name_sync.check_names()['major_name']['drifted'], 0)
+
+
+class AtRiskTests(TestCase):
+    def setUp(self):
+        self.today = date(2026, 10, 12)
+        self.campus = make_campus(students=2, day=self.today - timedelta(days=5))
+        c = self.campus
+        schedules = [c.schedule] + [
+            make_schedule(c.teacher, c.subject, c.class_obj, self.today - timedelta(days=n)) for n in (4, 3, 2, 1)
+        ]
+        # The first student misses the last three sessions, the second attends all of them
+        for index, schedule in enumerate(schedules):
+            StudentAttendance.objects.create(
+                student=c.students[0], schedule=schedule, status='present' if index < 2 else 'absent',
+            )
+            StudentAttendance.objects.create(student=c.students[1], schedule=schedule, status='present')
+        Schedule.objects.update(finalized_at=timezone.now())
+
+    def test_detect_flags_streaks_and_resumes_from_watermark(self):
+        summary = at_risk.detect_at_risk(today=self.today)
+        self.assertEqual((summary['rows'], summary['updated'], summary['flagged']), (10, 2, 1))
+        risk = AttendanceRisk.objects.get(flagged=True)
+        self.assertEqual(risk.student, self.campus.students[0])
+        self.assertEqual((risk.present, risk.absent, risk.current_streak), (2, 3, 3))
+        self.assertEqual(risk.reasons, 'low_rate,absence_streak')
+        self.assertEqual(at_risk.detect_at_risk(today=self.today)['rows'], 0)
+
+    def test_unfinalized_day_holds_back_the_watermark(self):
+        Schedule.objects.filter(date=self.today - timedelta(days=2)).update(finalized_at=None)
+        self.assertEqual(at_risk.processable_through(self.today), self.today - timedelta(days=3))
+        self.assertEqual(at_risk.detect_at_risk(today=self.today)['rows'], 6)
+
+    def test_list_filters_and_rejects_bad_params(self):
+        at_risk.detect_at_risk(today=self.today)
+        client = APIClient()
+        client.force_authenticate(make_user(is_staff=True))
+        response = client.get('/api/student/at-risk/', {'class': self.campus.class_obj.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['student'] for row in response.data], [self.campus.students[0].pk])
+        self.assertEqual(response.data[0]['attendance_rate'], 40.0)
+        self.assertEqual(client.get('/api/student/at-risk/', {'subject': self.campus.subject.pk + 1}).data, [])
+        self.assertEqual(client.get('/api/student/at-risk/', {'class': 'abc'}).status_code, 400)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.campus = make_campus(students=1)
+        self.student = self.campus.students[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def test_served_in_three_queries_and_cached(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/student/me/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['profile']['id'], self.student.pk)
+        self.assertEqual([row['attendance'] for row in response.data['today']], [None])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/student/me/dashboard/').data, response.data)
+
+    def test_check_in_made_elsewhere_is_not_served_stale(self):
+        self.client.get('/api/student/me/dashboard/')
+        with no_writer_thread():
+            attendance_writer.submit(self.student.pk, self.campus.schedule.pk, 'present')
+            attendance_writer.flush()
+        data = self.client.get('/api/student/me/dashboard/').data
+        self.assertEqual([row['attendance'] for row in data['today']], ['present'])
+        self.assertEqual(data['attendance']['present'], 1)
+        self.assertEqual(len(data['recent_checkins']), 1)
+
+        self.campus.subject.name = 'Data Structures'
+        self.campus.subject.save()
+        data = self.client.get('/api/student/me/dashboard/').data
+        self.assertTrue(data['today'][0]['subject'].endswith('Data Structures'))
+
+    def test_user_without_profile(self):
+        self.client.force_authenticate(make_user())
+        self.assertEqual(self.client.get('/api/student/me/dashboard/').status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=3)
+        make_campus(students=2)
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True))
+
+    def export(self, path, **params):
+        return self.client.get(f'/api/student/{path}/export/', params)
+
+    def test_students_csv_is_filtered_and_streamed_in_one_query(self):
+        response = self.export('student-profiles', **{'class': self.campus.class_obj.pk})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="students.csv"')
+        with self.assertNumQueries(1):
+            lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['ID', 'National ID', 'Full name'])
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]],
+                         [student.pk for student in self.campus.students])
+
+    def test_attendance_xlsx(self):
+        StudentAttendance.objects.create(student=self.campus.students[0], schedule=self.campus.schedule,
+                                         status='present')
+        response = self.export('student-attendances', export='xlsx', start=self.campus.schedule.date.isoformat())
+        self.assertEqual(response['Content-Type'], EXPORT_FORMATS['xlsx'])
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row '), 2)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.export('student-profiles', export='pdf').status_code, 400)
+        self.assertEqual(self.export('student-profiles', department='CS').status_code, 400)
+        self.assertEqual(self.export('student-attendances', start='yesterday').status_code, 400)
+        self.client.force_authenticate(self.campus.students[0].user)
+        self.assertEqual(self.export('student-profiles').status_code, 403)
+
+
+class AttendanceWriterThreadTests(TransactionTestCase):
+    def test_background_thread_commits_scans(self):
+        campus = make_campus(students=4)
+        writer = AttendanceWriter()
+        for student in campus.students:
+            writer.submit(student.id, campus.schedule.id, 'present')
+        deadline = clock.monotonic() + 5
+        while writer.stats.snapshot()['events_written'] < 4 and clock.monotonic() < deadline:
+            clock.sleep(0.01)
+        self.assertEqual(StudentAttendance.objects.count(), 4)
@@ -5,7 +5,17 @@ from . import views
 router = DefaultRouter()
 router.register(r'student-profiles', views.StudentProfileViewSet)
 router.register(r'student-attendances', views.StudentAttendanceViewSet)
+router.register(r'enrollments', views.EnrollmentViewSet)
+router.register(r'grades', views.GradeViewSet)
 
 urlpatterns = [
+    path('me/dashboard/', views.my_dashboard, name='student-dashboard'),
+    path('scan-qr/', views.scan_qr, name='student-scan-qr'),
+    path('attendance-summary/', views.attendance_summary, name='attendance-summary'),
+    path('analytics/class/<int:class_id>/', views.class_attendance_analytics, name='class-attendance-analytics'),
+    path('at-risk/', views.at_risk_students, name='at-risk-students'),
+    path('rollover/', views.rollover, name='student-rollover'),
+    path('rollover/<int:pk>/undo/', views.rollover_undo, name='student-rollover-undo'),
+    path('attendance-writer/stats/', views.attendance_writer_stats, name='attendance-writer-stats'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
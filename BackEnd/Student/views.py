@@ -1,11 +1,454 @@
-from rest_framework import viewsets
-from .models import StudentProfile, StudentAttendance
-from .serializers import StudentProfileSerializer, StudentAttendanceSerializer
+import hashlib
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
+from django.core.cache import cache
+from django.db.models import DateTimeField, F, IntegerField, Max, OuterRef, Subquery, Sum, Count
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes, renderer_classes
+from rest_framework.response import Response
+from core.exports import ExportMixin, filter_date_range, filter_ids
+from core.renderers import CHECKIN_PARSERS, CHECKIN_RENDERERS
+from core.fieldsets import SparseFieldsetMixin
+from lecturer.models import QRCodeSession, Schedule, TeacherAttendance
+from . import bitmaps
+from .attendance_writer import attendance_writer
+from .counters import WARNING_RATE, attendance_summary as summarize_attendance
+from .grades import enter_grades, letter_for
+from .rollover import RolloverError, apply_rollover, plan_rollover, undo_rollover
+from .models import (
+    StudentProfile, StudentAttendance, StudentAttendanceCounter, Enrollment, Grade, RolloverRun, AttendanceRisk
+)
+from .serializers import (
+    StudentProfileSerializer, StudentAttendanceSerializer, EnrollmentSerializer, GradeSerializer,
+    BulkGradeSerializer
+)
+
+class StudentProfileViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = StudentProfile.objects.all()
     serializer_class = StudentProfileSerializer
+    export_filename = 'students'
+    export_columns = (
+        ('ID', 'id'), ('National ID', 'national_id'), ('Full name', 'full_name'), ('Gender', 'gender'),
+        ('Date of birth', 'date_of_birth'), ('Email', 'email'), ('Phone', 'phone'),
+        ('Department', 'department__name'), ('Major', 'major__name'), ('Class', 'class_obj__name'),
+        ('Academic year', 'academic_year__year_name'), ('Study year', 'study_year'), ('Semester', 'semester'),
+        ('Status', 'status'), ('GPA', 'gpa'), ('Enrollment date', 'enrollment_date'),
+        ('Parent name', 'parent_name'), ('Parent phone', 'parent_phone'),
+    )
+
+    def get_export_queryset(self):
+        students = filter_ids(self.get_queryset(), self.request.query_params, {
+            'class': 'class_obj_id', 'major': 'major_id', 'department': 'department_id',
+        })
+        if self.request.query_params.get('status'):
+            students = students.filter(status=self.request.query_params['status'])
+        return students
 
-class StudentAttendanceViewSet(viewsets.ModelViewSet):
+class StudentAttendanceViewSet(ExportMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = StudentAttendance.objects.all()
     serializer_class = StudentAttendanceSerializer
+    export_filename = 'student-attendance'
+    export_columns = (
+        ('ID', 'id'), ('Date', 'schedule__date'), ('Start', 'schedule__start_time'),
+        ('Schedule', 'schedule_id'), ('Class', 'schedule__class_obj__name'),
+        ('Subject', 'schedule__subject__code'), ('Student ID', 'student_id'),
+        ('National ID', 'student__national_id'), ('Student', 'student__full_name'), ('Status', 'status'),
+        ('Check-in', 'checkin_time'), ('Check-out', 'checkout_time'), ('Location', 'location'),
+    )
+
+    def get_export_queryset(self):
+        attendance = filter_date_range(self.get_queryset(), self.request.query_params, 'schedule__date')
+        return filter_ids(attendance, self.request.query_params, {'class': 'schedule__class_obj_id'})
+
+class EnrollmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Enrollment.objects.all()
+    serializer_class = EnrollmentSerializer
+
+class GradeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Grade.objects.all()
+    serializer_class = GradeSerializer
+
+    def perform_create(self, serializer):
+        letter, points = letter_for(serializer.validated_data['score'])
+        serializer.save(letter=letter, grade_points=points, graded_by=self.request.user)
+
+    def perform_update(self, serializer):
+        score = serializer.validated_data.get('score', serializer.instance.score)
+        letter, points = letter_for(score)
+        serializer.save(letter=letter, grade_points=points, graded_by=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Enter the scores of a class for one subject and semester.
+        Body: {"class_obj", "subject", "semester", "grades": [{"student", "score", "remarks"}]}
+        """
+        serializer = BulkGradeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if not request.user.is_staff and not Schedule.objects.filter(
+            class_obj=data['class_obj'], subject=data['subject'], teacher__user=request.user
+        ).exists():
+            return Response({'error': 'You do not teach this subject to this class'},
+                            status=status.HTTP_403_FORBIDDEN)
+        result = enter_grades(data['class_obj'].pk, data['subject'].pk, data['semester'].pk, data['grades'],
+                              user=request.user)
+        return Response(result)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes(CHECKIN_RENDERERS)
+@parser_classes(CHECKIN_PARSERS)
+def scan_qr(request):
+    """
+    Record a student check-in from a scanned QR token.
+    The scan is queued for the group-commit writer and acknowledged with 202.
+    """
+    token = request.data.get('token')
+    if not token:
+        return Response({'error': 'token is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    student = StudentProfile.objects.filter(user=request.user).values('id', 'class_obj_id').first()
+    if not student:
+        return Response({'error': 'Only students can check in'}, status=status.HTTP_403_FORBIDDEN)
+
+    now = timezone.now()
+    session = QRCodeSession.objects.select_related('schedule').filter(token=token).first()
+    if not session or session.status != 'active' or session.expiration_time <= now:
+        return Response({'error': 'Invalid or expired QR code'}, status=status.HTTP_400_BAD_REQUEST)
+
+    schedule = session.schedule
+    if schedule.class_obj_id != student['class_obj_id']:
+        return Response({'error': 'This session is not for your class'}, status=status.HTTP_403_FORBIDDEN)
+
+    attendance_status = schedule.checkin_status(now)
+    teacher_attendance_id = TeacherAttendance.objects.filter(
+        schedule_id=schedule.id
+    ).values_list('id', flat=True).first()
+
+    attendance_writer.submit(
+        student_id=student['id'],
+        schedule_id=schedule.id,
+        status=attendance_status,
+        checkin_time=now,
+        teacher_attendance_id=teacher_attendance_id,
+        location=request.data.get('location', ''),
+    )
+    return Response(
+        {'message': 'Check-in recorded', 'status': attendance_status},
+        status=status.HTTP_202_ACCEPTED
+    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def attendance_writer_stats(request):
+    """
+    Batch size and write latency metrics for the check-in writer
+    """
+    return Response(attendance_writer.stats.snapshot(pending=attendance_writer.pending()))
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def attendance_summary(request):
+    """
+    Present/late/absent totals and attendance rate per subject for the
+    calling student, read from the attendance counters.
+    Query params: semester; staff may also pass student
+    """
+    if request.user.is_staff and request.query_params.get('student'):
+        student_id = request.query_params['student']
+    else:
+        student_id = StudentProfile.objects.filter(user=request.user).values_list('id', flat=True).first()
+        if student_id is None:
+            return Response({'error': 'No student profile for this user'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(summarize_attendance(student_id, request.query_params.get('semester')))
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def class_attendance_analytics(request, class_id):
+    """
+    Absence streaks, attendance rates, the sessions that lost the most students
+    and co-absent pairs for a class, computed on the attendance bitmaps.
+    Query params: start, end, subject, min_streak (default 3), top (default 20),
+    absent_in (comma separated schedule ids: students absent from all of them)
+    """
+    if not request.user.is_staff and not Schedule.objects.filter(
+        class_obj_id=class_id, teacher__user=request.user
+    ).exists():
+        return Response({'error': 'You do not teach this class'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        start = parse_date(request.query_params.get('start', ''))
+        end = parse_date(request.query_params.get('end', ''))
+        min_streak = int(request.query_params.get('min_streak', 3))
+        top = min(int(request.query_params.get('top', 20)), 200)
+        absent_in = [int(pk) for pk in request.query_params.get('absent_in', '').split(',') if pk.strip()]
+        subject_id = int(request.query_params.get('subject') or 0) or None
+    except ValueError:
+        return Response({'error': 'Invalid query parameter'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        matrix = bitmaps.load_class(class_id, start, end, subject_id)
+    except bitmaps.BitmapError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    student_ids = [int(pk) for pk in matrix.student_ids]
+    enrolled, attended, late, rate = bitmaps.rates(matrix)
+    longest, current = bitmaps.absence_streaks(matrix)
+    losses = bitmaps.session_losses(matrix)
+    pairs = bitmaps.co_absence(matrix, top=top)
+
+    picked = {index for index in range(len(student_ids)) if current[index] >= min_streak}
+    picked.update(index for pair in pairs for index in pair[:2])
+    rows = {schedule['schedule']: index for index, schedule in enumerate(matrix.sessions)}
+    common = []
+    if absent_in:
+        missing = [pk for pk in absent_in if pk not in rows]
+        if missing:
+            return Response({'error': f'No finalized session {missing[0]} for this class'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        common = [int(index) for index in bitmaps.absent_in_all(matrix, [rows[pk] for pk in absent_in])]
+        picked.update(common)
+    names = dict(StudentProfile.objects.filter(
+        id__in=[student_ids[index] for index in picked]
+    ).values_list('id', 'full_name'))
+
+    def student(index):
+        return {'id': student_ids[index], 'name': names.get(student_ids[index])}
+
+    streaks = sorted(
+        ({**student(index), 'current_streak': int(current[index]), 'longest_streak': int(longest[index])}
+         for index in picked if current[index] >= min_streak),
+        key=lambda row: -row['current_streak'],
+    )
+    ranked = sorted(range(len(student_ids)), key=lambda index: rate[index] if enrolled[index] else 101)
+    return Response({
+        'students': len(student_ids),
+        'sessions': len(matrix.sessions),
+        'streaks': streaks,
+        'lowest_rates': [
+            {'id': student_ids[index], 'sessions': int(enrolled[index]), 'attended': int(attended[index]),
+             'late': int(late[index]), 'attendance_rate': round(float(rate[index]), 1)}
+            for index in ranked[:top] if enrolled[index]
+        ],
+        'sessions_lost': [
+            {**matrix.sessions[index], 'absent': int(losses[index])}
+            for index in sorted(range(len(losses)), key=lambda index: -losses[index])[:top]
+        ],
+        'co_absence': [
+            {'students': [student(a), student(b)], 'shared_absences': shared, 'jaccard': jaccard}
+            for a, b, shared, jaccard in pairs
+        ],
+        'absent_in_all': [student(index) for index in common],
+    })
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def rollover(request):
+    """
+    Move active students of each class to the next class, study year and academic year.
+    Body: {"classes": {"<source class id>": <target class id>}, "academic_year" (default: next),
+           "semester" (default "1"), "dry_run" (default true)}
+    A dry run only returns the diff report; otherwise the run id is returned for undo.
+    """
+    classes = request.data.get('classes') or {}
+    academic_year = request.data.get('academic_year')
+    semester = str(request.data.get('semester', '1'))
+    dry_run = request.data.get('dry_run', True) not in (False, 'false', '0', 0)
+    try:
+        if dry_run:
+            return Response({'dry_run': True, 'report': plan_rollover(classes, academic_year, semester)})
+        run = apply_rollover(classes, academic_year, semester, user=request.user)
+    except RolloverError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {'dry_run': False, 'run': run.pk, 'students': run.student_count, 'report': run.report},
+        status=status.HTTP_201_CREATED
+    )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def rollover_undo(request, pk):
+    """Restore the students of an applied rollover run from its undo log"""
+    run = RolloverRun.objects.filter(pk=pk).first()
+    if run is None:
+        return Response({'error': 'Rollover run not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        restored = undo_rollover(run, user=request.user)
+    except RolloverError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'run': run.pk, 'status': run.status, 'restored': restored})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def at_risk_students(request):
+    """
+    Students flagged by the nightly at-risk job, worst streak first.
+    Query params: subject, class, reason (low_rate or absence_streak)
+    """
+    try:
+        subject_id = int(request.query_params.get('subject') or 0) or None
+        class_id = int(request.query_params.get('class') or 0) or None
+    except ValueError:
+        return Response({'error': 'subject and class must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    risks = AttendanceRisk.objects.filter(flagged=True)
+    if subject_id:
+        risks = risks.filter(subject_id=subject_id)
+    if class_id:
+        risks = risks.filter(student__class_obj_id=class_id)
+    if request.query_params.get('reason'):
+        risks = risks.filter(reasons__contains=request.query_params['reason'])
+    rows = risks.order_by('-current_streak', 'student__full_name').values(
+        'student_id', 'student__full_name', 'student__class_obj__name', 'subject_id', 'subject__name',
+        'present', 'late', 'absent', 'current_streak', 'longest_streak', 'last_date', 'reasons', 'flagged_at',
+    )
+    data = []
+    for row in rows:
+        sessions = row['present'] + row['late'] + row['absent']
+        data.append({
+            'student': row['student_id'],
+            'student_name': row['student__full_name'],
+            'class_name': row['student__class_obj__name'],
+            'subject': row['subject_id'],
+            'subject_name': row['subject__name'],
+            'sessions': sessions,
+            'absent': row['absent'],
+            'attendance_rate': round((row['present'] + row['late']) * 100 / sessions, 1) if sessions else None,
+            'current_streak': row['current_streak'],
+            'longest_streak': row['longest_streak'],
+            'last_date': row['last_date'],
+            'reasons': row['reasons'].split(','),
+            'flagged_at': row['flagged_at'],
+        })
+    return Response(data)
+
+DASHBOARD_CACHE_SECONDS = 30
+RECENT_CHECKINS = 10
+
+def _counter_total(expression):
+    counters = StudentAttendanceCounter.objects.filter(student=OuterRef('pk')).order_by().values('student')
+    return Coalesce(Subquery(counters.annotate(total=expression).values('total'), output_field=IntegerField()), 0)
+
+def _aggregate(queryset, group, expression, output_field):
+    rows = queryset.order_by().values(group).annotate(value=expression).values('value')
+    return Subquery(rows, output_field=output_field)
+
+def _version_annotations(today):
+    """
+    The count and latest updated_at of the student's attendance (the counters
+    follow from it) and of today's sessions with their subjects and teachers.
+    """
+    attendance = StudentAttendance.objects.filter(student=OuterRef('pk'))
+    sessions = Schedule.objects.filter(class_obj=OuterRef('class_obj'), date=today)
+    return {
+        'attendance_rows': _aggregate(attendance, 'student', Count('id'), IntegerField()),
+        'attendance_at': _aggregate(attendance, 'student', Max('updated_at'), DateTimeField()),
+        'session_rows': _aggregate(sessions, 'class_obj', Count('id'), IntegerField()),
+        'sessions_at': _aggregate(sessions, 'class_obj', Max('updated_at'), DateTimeField()),
+        'subjects_at': _aggregate(sessions, 'class_obj', Max('subject__updated_at'), DateTimeField()),
+        'teachers_at': _aggregate(sessions, 'class_obj', Max('teacher__updated_at'), DateTimeField()),
+    }
+
+def _dashboard_version(student, today):
+    """A digest of everything the dashboard shows: the profile, the rows it joins and _version_annotations."""
+    stamp = (
+        today, student.pk, student.updated_at, student.class_obj.updated_at, student.major.updated_at,
+        student.department.updated_at, student.academic_year.year_name if student.academic_year else None,
+        student.attendance_rows, student.attendance_at, student.session_rows, student.sessions_at,
+        student.subjects_at, student.teachers_at,
+    )
+    return hashlib.md5('|'.join(map(str, stamp)).encode()).hexdigest()
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def my_dashboard(request):
+    """
+    Profile, today's sessions, attendance totals and recent check-ins of the
+    calling student in three queries, cached briefly per user. The profile
+    query also reads a version that goes into the cache key, so a check-in or
+    a schedule change shows up at once whichever worker handled it, and a
+    cache hit costs that one query.
+    """
+    today = timezone.localdate()
+    below = StudentAttendanceCounter.objects.filter(student=OuterRef('pk')).alias(
+        gap=(F('present') + F('late')) * 100 - WARNING_RATE * (F('present') + F('late') + F('absent')),
+    ).filter(gap__lt=0).order_by().values('student').annotate(n=Count('id')).values('n')
+    student = StudentProfile.objects.select_related(
+        'class_obj', 'major', 'department', 'academic_year'
+    ).annotate(
+        total_present=_counter_total(Sum('present')),
+        total_late=_counter_total(Sum('late')),
+        total_absent=_counter_total(Sum('absent')),
+        subjects_below=Coalesce(Subquery(below, output_field=IntegerField()), 0),
+        **_version_annotations(today),
+    ).filter(user=request.user).first()
+    if student is None:
+        return Response({'error': 'No student profile for this user'}, status=status.HTTP_404_NOT_FOUND)
+    cache_key = f'student-dashboard:{request.user.pk}:{_dashboard_version(student, today)}'
+    data = cache.get(cache_key)
+    if data is not None:
+        return Response(data)
+
+    my_status = StudentAttendance.objects.filter(student=student, schedule=OuterRef('pk')).values('status')[:1]
+    sessions = Schedule.objects.filter(class_obj_id=student.class_obj_id, date=today).annotate(
+        my_status=Subquery(my_status),
+    ).order_by('start_time').values(
+        'id', 'start_time', 'end_time', 'room', 'status', 'my_status',
+        'subject__code', 'subject__name', 'teacher__full_name',
+    )
+    recent = StudentAttendance.objects.filter(student=student).exclude(status='absent').order_by(
+        '-schedule__date', '-schedule__start_time'
+    ).values(
+        'schedule_id', 'schedule__date', 'schedule__subject__name', 'status', 'checkin_time',
+    )[:RECENT_CHECKINS]
+
+    attended = student.total_present + student.total_late
+    total = attended + student.total_absent
+    data = {
+        'profile': {
+            'id': student.pk,
+            'full_name': student.full_name,
+            'photo': request.build_absolute_uri(student.photo.url) if student.photo else None,
+            'class': {'id': student.class_obj_id, 'name': student.class_obj.name},
+            'major': student.major.name,
+            'department': student.department.name,
+            'academic_year': student.academic_year.year_name if student.academic_year else None,
+            'study_year': student.study_year,
+            'semester': student.semester,
+            'gpa': student.gpa,
+            'status': student.status,
+        },
+        'today': [
+            {
+                'schedule': row['id'],
+                'start': row['start_time'].strftime('%H:%M'),
+                'end': row['end_time'].strftime('%H:%M'),
+                'subject': f"{row['subject__code']} {row['subject__name']}",
+                'teacher': row['teacher__full_name'],
+                'room': row['room'],
+                'status': row['status'],
+                'attendance': row['my_status'],
+            }
+            for row in sessions
+        ],
+        'attendance': {
+            'present': student.total_present,
+            'late': student.total_late,
+            'absent': student.total_absent,
+            'attendance_rate': round(attended * 100 / total, 1) if total else None,
+            'subjects_below_threshold': student.subjects_below,
+        },
+        'recent_checkins': [
+            {
+                'schedule': row['schedule_id'],
+                'date': row['schedule__date'],
+                'subject': row['schedule__subject__name'],
+                'status': row['status'],
+                'checkin_time': row['checkin_time'],
+            }
+            for row in recent
+        ],
+    }
+    cache.set(cache_key, data, DASHBOARD_CACHE_SECONDS)
+    return Response(data)
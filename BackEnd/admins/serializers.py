@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.fieldsets import DynamicFieldsModelSerializer
 from .models import Department, Major, Class, Subject, SystemSettings, AuditLog, Course
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(DynamicFieldsModelSerializer):
     head_of_department_name = serializers.CharField(source='head_of_department.user.username', read_only=True)
 
     class Meta:
@@ -10,40 +11,51 @@ class DepartmentSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class MajorSerializer(serializers.ModelSerializer):
+class MajorSerializer(DynamicFieldsModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     department_head_name = serializers.CharField(source='department_head.user.username', read_only=True)
 
     class Meta:
         model = Major
         fields = '__all__'
+        expandable_fields = {
+            'department': 'admins.serializers.DepartmentSerializer',
+        }
 
 
-class ClassSerializer(serializers.ModelSerializer):
+class ClassSerializer(DynamicFieldsModelSerializer):
     major_name = serializers.CharField(source='major.name', read_only=True)
     class_teacher_name = serializers.CharField(source='class_teacher.user.username', read_only=True)
 
     class Meta:
         model = Class
         fields = '__all__'
+        expandable_fields = {
+            'major': 'admins.serializers.MajorSerializer',
+            'class_teacher': 'lecturer.serializers.TeacherProfileSerializer',
+        }
 
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(DynamicFieldsModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     majors_names = serializers.StringRelatedField(source='majors', many=True, read_only=True)
 
     class Meta:
         model = Subject
         fields = '__all__'
+        expandable_fields = {
+            'department': 'admins.serializers.DepartmentSerializer',
+            'major': 'admins.serializers.MajorSerializer',
+        }
 
 
-class SystemSettingsSerializer(serializers.ModelSerializer):
+class SystemSettingsSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = SystemSettings
         fields = '__all__'
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsModelSerializer):
     title = serializers.CharField(source='name')
     credits = serializers.IntegerField(source='credit')
     department_id = serializers.CharField(source='major.department.id', read_only=True)
@@ -55,6 +67,9 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id', 'code', 'title', 'description', 'credits', 'department_id', 'major', 'major_name', 'major_code', 'department_code', 'semester', 'is_active', 'status', 'created_at', 'updated_at']
+        expandable_fields = {
+            'major': 'admins.serializers.MajorSerializer',
+        }
 
     def get_status(self, obj):
         return 'active' if obj.is_active else 'inactive'
@@ -75,7 +90,7 @@ class CourseSerializer(serializers.ModelSerializer):
         return []  # Placeholder
 
 
-class AuditLogSerializer(serializers.ModelSerializer):
+class AuditLogSerializer(DynamicFieldsModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
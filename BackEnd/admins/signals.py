@@ -0,0 +1,13 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Subject
+
+
+@receiver(m2m_changed, sender=Subject.prerequisites.through)
+def touch_subject_prerequisites(sender, instance, action, **kwargs):
+    # Many-to-many changes leave updated_at alone; touching one subject is
+    # enough to move the ETag of the subject list and details
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        Subject.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
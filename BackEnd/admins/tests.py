@@ -1,3 +1,111 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from core.testing import make_campus, make_user
+from .models import Class, Subject
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=0)
+        self.campus.class_obj.class_teacher = self.campus.teacher
+        self.campus.class_obj.save()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True, is_superuser=True))
+
+    def get(self, path, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(f'/api/admin/{path}/', **headers)
+
+    def test_matching_etag_gets_304_without_loading_rows(self):
+        response = self.get('classes')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        # One aggregate per table: classes, majors, teachers, users
+        with self.assertNumQueries(4):
+            self.assertEqual(self.get('classes', etag).status_code, 304)
+        self.assertEqual(self.get('classes', etag[2:]).status_code, 304)
+        self.assertEqual(self.get(f'classes/{self.campus.class_obj.pk}', etag).status_code, 200)
+
+    def test_every_table_behind_a_rendered_name_moves_the_etag(self):
+        etags = {path: self.get(path)['ETag'] for path in ('classes', 'majors', 'subjects')}
+        self.campus.major.name = 'Software Engineering'
+        self.campus.major.save()
+        for path, etag in etags.items():
+            self.assertEqual(self.get(path, etag).status_code, 200, path)
+
+        etag = self.get('classes')['ETag']
+        self.campus.teacher.user.username = 'renamed'
+        self.campus.teacher.user.save()
+        response = self.get('classes', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['class_teacher_name'], 'renamed')
+
+    def test_prerequisite_changes_move_the_subject_etag(self):
+        other = Subject.objects.create(name='Logic', code='LG1', department=self.campus.department,
+                                       semester_offered='1')
+        etag = self.get('subjects')['ETag']
+        self.campus.subject.prerequisites.add(other)
+        self.assertEqual(self.get('subjects', etag).status_code, 200)
+
+    def test_permission_is_checked_before_the_etag(self):
+        etag = self.get('departments')['ETag']
+        self.client.force_authenticate(make_user())
+        self.assertEqual(self.get('departments', etag).status_code, 403)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.campus = make_campus(students=0)
+        for n in range(3):
+            Class.objects.create(name=f'CS-{n}', major=self.campus.major, academic_year='2026', semester='1',
+                                 shift='morning')
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True, is_superuser=True))
+
+    @staticmethod
+    def selects(queries, table):
+        # Leaves out the ETag aggregates
+        return [query['sql'] for query in queries
+                if f'FROM "{table}"' in query['sql'] and 'MAX(' not in query['sql']]
+
+    def test_fields_narrow_the_columns_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/admin/classes/', {'fields': 'id,name'})
+        self.assertEqual(set(response.data[0]), {'id', 'name'})
+        select, = self.selects(queries, 'admins_class')
+        self.assertIn('"admins_class"."name"', select)
+        self.assertNotIn('"admins_class"."room_number"', select)
+
+    def test_expanded_relations_are_joined(self):
+        params = {'fields': 'id,major.name,major.department', 'expand': 'major,major.department'}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/admin/classes/', params)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response.data[0]['major'], {
+            'name': self.campus.major.name,
+            'department': response.data[0]['major']['department'],
+        })
+        self.assertEqual(response.data[0]['major']['department']['code'], self.campus.department.code)
+        select, = self.selects(queries, 'admins_class')
+        self.assertIn('JOIN "admins_department"', select)
+        self.assertEqual(self.selects(queries, 'admins_major'), [])
+
+    def test_expanded_tables_move_the_etag(self):
+        params = {'expand': 'major.department'}
+        etag = self.client.get('/api/admin/classes/', params)['ETag']
+        self.assertEqual(self.client.get('/api/admin/classes/', params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.campus.department.name = 'Informatics'
+        self.campus.department.save()
+        response = self.client.get('/api/admin/classes/', params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['major']['department']['name'], 'Informatics')
+
+    def test_writes_ignore_the_fieldset(self):
+        response = self.client.post('/api/admin/departments/?fields=id',
+                                    {'name': 'Law', 'code': 'LAW'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['code'], 'LAW')
@@ -7,6 +7,10 @@ from django.utils.decorators import method_decorator
 from django.db.models import Count, Q
 from django.db.models.functions import TruncMonth
 from datetime import datetime, timedelta
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetMixin
+from lecturer.models import TeacherProfile
+from users.models import StaffProfile, User
 from .models import Department, Major, Class, Course, Subject, SystemSettings, AuditLog
 from .serializers import (
     DepartmentSerializer, MajorSerializer, ClassSerializer,
@@ -14,10 +18,11 @@ from .serializers import (
 )
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (StaffProfile, User)
 
     @method_decorator(permission_required('admins.view_department', raise_exception=True))
     def list(self, request, *args, **kwargs):
@@ -36,10 +41,11 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class MajorViewSet(viewsets.ModelViewSet):
+class MajorViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Major.objects.all()
     serializer_class = MajorSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (Department, TeacherProfile, User)
 
     @method_decorator(permission_required('admins.view_major', raise_exception=True))
     def list(self, request, *args, **kwargs):
@@ -58,10 +64,11 @@ class MajorViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class ClassViewSet(viewsets.ModelViewSet):
+class ClassViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Class.objects.all()
     serializer_class = ClassSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (Major, TeacherProfile, User)
 
     @method_decorator(permission_required('admins.view_class', raise_exception=True))
     def list(self, request, *args, **kwargs):
@@ -80,10 +87,11 @@ class ClassViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (Major, Department)
 
     @method_decorator(permission_required('admins.view_subject', raise_exception=True))
     def list(self, request, *args, **kwargs):
@@ -102,10 +110,11 @@ class CourseViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = (Department, Major)
 
     @method_decorator(permission_required('admins.view_subject', raise_exception=True))
     def list(self, request, *args, **kwargs):
@@ -124,7 +133,7 @@ class SubjectViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class SystemSettingsViewSet(viewsets.ModelViewSet):
+class SystemSettingsViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = SystemSettings.objects.all()
     serializer_class = SystemSettingsSerializer
     permission_classes = [IsAuthenticated]
@@ -146,7 +155,7 @@ class SystemSettingsViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all().order_by('-timestamp')
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,92 @@
+"""
+Conditional GET for slow-changing reference data.
+
+A viewset's validator is built from MAX(updated_at) and COUNT(*) of its own
+table and of every table its serializer reads names from, one small
+aggregate per table: `etag_models` plus the tables the serializer traces
+from the fields it renders (read_models() in core.fieldsets), so tables
+embedded with ?expand= count too. A change, insert or delete in any of
+them moves the ETag. When one of those tables has no updated_at the
+response is served without an ETag. The request path and query string are part of it, since
+they pick the page and filters. A client sending a matching If-None-Match
+gets 304 Not Modified before anything is loaded or serialized.
+
+Writes that bypass updated_at (queryset.update() without it, many-to-many
+changes) must touch updated_at themselves for clients to see them.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .fieldsets import DynamicFieldsModelSerializer
+
+
+def collection_stamp(models):
+    """(max updated_at, row count) of each model, as one string."""
+    parts = []
+    for model in models:
+        stamp = model._default_manager.order_by().aggregate(last=Max('updated_at'), rows=Count('pk'))
+        last = stamp['last'].isoformat() if stamp['last'] else ''
+        parts.append(f"{model._meta.label}:{last}:{stamp['rows']}")
+    return '|'.join(parts)
+
+
+def _has_updated_at(model):
+    return any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match holds `etag`, compared weakly as RFC 9110 asks for GET."""
+    candidates = parse_etags(request.headers.get('If-None-Match', ''))
+    return '*' in candidates or _opaque(etag) in {_opaque(candidate) for candidate in candidates}
+
+
+class ConditionalGetMixin:
+    """
+    ETag and 304 support for list and retrieve. Put it before the DRF viewset
+    class so permission checks in the subclass's own list/retrieve run first.
+    """
+    etag_models = ()
+
+    def get_etag(self, request):
+        """The ETag of this response, or None when its tables cannot be versioned."""
+        models = {self.get_queryset().model, *self.etag_models}
+        serializer = self.get_serializer()
+        if isinstance(serializer, DynamicFieldsModelSerializer):
+            models |= serializer.read_models()
+        if not all(_has_updated_at(model) for model in models):
+            return None
+        models = sorted(models, key=lambda model: model._meta.label)
+        digest = hashlib.md5(
+            f"{request.get_full_path()}|{collection_stamp(models)}".encode()
+        ).hexdigest()
+        # Weak: compression middleware may re-encode the body
+        return 'W/' + quote_etag(digest)
+
+    def _conditional(self, request, render):
+        etag = self.get_etag(request)
+        if etag is None:
+            return render()
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(
+            request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
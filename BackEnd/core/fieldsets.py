@@ -0,0 +1,127 @@
+"""
+Sparse fieldsets and opt-in expansion for list and detail endpoints.
+
+    ?fields=id,full_name,department      only these fields
+    ?expand=department                   embed the department instead of its id
+    ?fields=id,schedule.date&expand=schedule,schedule.subject
+
+Serializers built on DynamicFieldsModelSerializer read both parameters on
+GET (writes always see every field). Relations that may be expanded are
+named in Meta.expandable_fields as dotted serializer paths, so apps do not
+have to import each other's serializers. SparseFieldsetMixin narrows the
+viewset's queryset to match: .only() on the columns behind the selected
+fields and select_related() for expanded relations. When a selected field
+cannot be traced to a column (a method field, a source of '*'), the columns
+are left alone rather than risk a query per row. read_models() names the
+other tables a response shows, for validators such as core.conditional.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+
+def _split(value):
+    """'a,b.c,b.d' -> {'a': set(), 'b': {'c', 'd'}}"""
+    tree = {}
+    for item in (value or '').split(','):
+        head, _, rest = item.strip().partition('.')
+        if head:
+            tree.setdefault(head, set())
+            if rest:
+                tree[head].add(rest)
+    return tree
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and expand is None and request is not None and request.method == 'GET':
+            fields = request.query_params.get('fields')
+            expand = request.query_params.get('expand')
+        self._requested = _split(fields) if fields else None
+        self._expand = _split(expand)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name, nested_expand in self._expand.items():
+            if name not in expandable or name not in fields:
+                continue
+            nested_fields = self._requested.get(name) if self._requested else None
+            serializer_class = import_string(expandable[name])
+            fields[name] = serializer_class(
+                source=fields[name].source, read_only=True,
+                fields=','.join(nested_fields) if nested_fields else '',
+                expand=','.join(nested_expand),
+            )
+        if self._requested is not None:
+            fields = {name: field for name, field in fields.items() if name in self._requested}
+        return fields
+
+    def narrow_queryset(self, queryset):
+        """Apply only()/select_related() for the fields this serializer will render."""
+        columns, related = self._plan()
+        if related:
+            queryset = queryset.select_related(*related)
+        if columns is not None and self._requested is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def read_models(self):
+        """
+        Models besides Meta.model whose rows the rendered fields show: the tables
+        along dotted sources ('major.department.name'), related objects rendered
+        as strings, and expanded relations with everything they show in turn.
+        """
+        models = set()
+        for field in self.fields.values():
+            nested = isinstance(field, DynamicFieldsModelSerializer)
+            shown = nested or isinstance(getattr(field, 'child_relation', field), serializers.StringRelatedField)
+            model = self.Meta.model
+            for attr in field.source_attrs if shown else field.source_attrs[:-1]:
+                try:
+                    model_field = model._meta.get_field(attr)
+                except FieldDoesNotExist:
+                    break
+                if not model_field.is_relation:
+                    break
+                model = model_field.related_model
+                models.add(model)
+            if nested:
+                models |= field.read_models()
+        return models
+
+    def _plan(self, prefix=''):
+        """(own columns, or None if some field cannot be traced to one; related paths to join)"""
+        opts = self.Meta.model._meta
+        columns, related = {opts.pk.name}, []
+        for field in self.fields.values():
+            try:
+                model_field = opts.get_field(field.source_attrs[0]) if field.source_attrs else None
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or not (model_field.concrete or model_field.many_to_many):
+                columns = None
+                continue
+            if isinstance(field, DynamicFieldsModelSerializer) and (
+                model_field.many_to_one or model_field.one_to_one
+            ):
+                path = prefix + model_field.name
+                related.append(path)
+                related.extend(field._plan(f'{path}__')[1])
+            if columns is not None and model_field.concrete:
+                columns.add(model_field.name)
+        return columns, related
+
+
+class SparseFieldsetMixin:
+    """Narrow list and retrieve querysets to the fields and expansions requested."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve') and self.request.method == 'GET':
+            serializer = self.get_serializer()
+            if isinstance(serializer, DynamicFieldsModelSerializer):
+                queryset = serializer.narrow_queryset(queryset)
+        return queryset
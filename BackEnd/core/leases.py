@@ -0,0 +1,43 @@
+"""
+Leader election over a row in SchedulerLock.
+
+A worker holds a named lease until expires_at. Acquiring or renewing it is a
+single conditional UPDATE, so when several workers race, the database lets
+exactly one of them win. A crashed leader's lease simply runs out, so a
+leader whose work can outlast the TTL renews it as it goes and stops once
+renew_lease() fails: another worker may have taken over.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SchedulerLock
+
+
+def acquire_lease(name, owner, ttl):
+    """Take or renew the lease `name` for `owner`; returns True if `owner` now holds it."""
+    now = timezone.now()
+    if not SchedulerLock.objects.filter(name=name).exists():
+        try:
+            with transaction.atomic():
+                SchedulerLock.objects.create(name=name)
+        except IntegrityError:
+            pass  # another worker created it first
+    updated = SchedulerLock.objects.filter(name=name).filter(
+        Q(owner=owner) | Q(expires_at__isnull=True) | Q(expires_at__lte=now)
+    ).update(owner=owner, expires_at=now + ttl, updated_at=now)
+    return updated == 1
+
+
+def renew_lease(name, owner, ttl):
+    """Extend a lease `owner` still holds; returns False if it has passed to someone else."""
+    now = timezone.now()
+    return SchedulerLock.objects.filter(name=name, owner=owner).update(
+        expires_at=now + ttl, updated_at=now
+    ) == 1
+
+
+def release_lease(name, owner):
+    SchedulerLock.objects.filter(name=name, owner=owner).update(
+        owner='', expires_at=None, updated_at=timezone.now()
+    )
@@ -0,0 +1,92 @@
+import io
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.utils.text import compress_string
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import middleware, renderers
+
+
+def sample_rows(count):
+    """Rows shaped like serialized StudentAttendance/StudentProfile list items."""
+    start = datetime(2026, 9, 1, 7, 30, tzinfo=timezone.utc)
+    return [
+        {
+            'id': i,
+            'student': {'id': i % 900, 'full_name': f'Student {i % 900}', 'national_id': f'N{i % 900:06d}'},
+            'schedule': i // 40,
+            'status': ('present', 'late', 'absent')[i % 3],
+            'checkin_time': (start + timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+            'checkout_time': None,
+            'location': 'Building A, room 204',
+            'gpa': '3.25',
+            'remarks': 'Checked in with the classroom QR code' if i % 5 == 0 else '',
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare JSON/MessagePack encoders and gzip/brotli compression on a list payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help="Items in the payload (default 5000)")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per case (default 20)")
+
+    def _time(self, func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000, result
+
+    def _report(self, name, ms, size=None, baseline=None):
+        line = f"{name:<28}{ms:>9.2f} ms"
+        if size is not None:
+            line += f"{size:>12,} bytes"
+        if baseline:
+            line += f"{baseline / ms:>8.1f}x"
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        data, repeat = sample_rows(options['rows']), options['repeat']
+        self.stdout.write(f"{options['rows']} rows, best of {repeat} runs\n")
+
+        self.stdout.write("Encoding")
+        stock_ms, body = self._time(lambda: JSONRenderer().render(data), repeat)
+        self._report('stdlib json (DRF)', stock_ms, len(body))
+        if renderers.orjson is None:
+            self.stdout.write("orjson is not installed; FastJSONRenderer falls back to stdlib json")
+        else:
+            fast_ms, fast_body = self._time(lambda: renderers.FastJSONRenderer().render(data), repeat)
+            self._report('orjson (FastJSONRenderer)', fast_ms, len(fast_body), stock_ms)
+            if fast_body != body:
+                self.stdout.write(self.style.WARNING("FastJSONRenderer output differs from JSONRenderer"))
+        if renderers.msgpack is None:
+            self.stdout.write("msgpack is not installed; skipping MessagePack")
+        else:
+            pack_ms, packed = self._time(lambda: renderers.MessagePackRenderer().render(data), repeat)
+            self._report('msgpack', pack_ms, len(packed), stock_ms)
+
+        self.stdout.write("\nDecoding")
+        parse_ms, _ = self._time(lambda: JSONParser().parse(io.BytesIO(body)), repeat)
+        self._report('stdlib json (DRF)', parse_ms)
+        if renderers.orjson is not None:
+            fast_ms, _ = self._time(lambda: renderers.FastJSONParser().parse(io.BytesIO(body)), repeat)
+            self._report('orjson (FastJSONParser)', fast_ms, baseline=parse_ms)
+
+        self.stdout.write("\nCompression of the JSON body")
+        self.stdout.write(f"{'none':<28}{'':>12}{len(body):>12,} bytes")
+        gzip_ms, gzipped = self._time(
+            lambda: compress_string(body, max_random_bytes=middleware.GZIP_MAX_RANDOM_BYTES), repeat)
+        self._report('gzip (compress_string)', gzip_ms, len(gzipped))
+        if middleware.brotli is None:
+            self.stdout.write("brotli is not installed; responses are compressed with gzip only")
+        else:
+            br_ms, brotlied = self._time(
+                lambda: middleware.brotli.compress(body, quality=middleware.BROTLI_QUALITY), repeat)
+            self._report(f'brotli quality {middleware.BROTLI_QUALITY}', br_ms, len(brotlied))
@@ -0,0 +1,135 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+Brotli is preferred when the brotli package is installed and the client
+accepts it, gzip otherwise. Bodies under COMPRESSION_MIN_SIZE bytes are
+sent as they are, as are already-compressed formats (images, zip-based
+XLSX downloads). Streaming responses such as the CSV exports are compressed
+chunk by chunk. Replaces django.middleware.gzip.GZipMiddleware, which only
+speaks gzip.
+
+Like GZipMiddleware, gzip output carries up to GZIP_MAX_RANDOM_BYTES of
+random padding in its header against BREACH-style length attacks. Brotli
+has no such field, so views whose responses hold credentials (the JWT
+login and refresh endpoints, device keys) are marked with
+@compression_exempt and are never compressed.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+GZIP_MAX_RANDOM_BYTES = 100  # as GZipMiddleware.max_random_bytes
+BROTLI_QUALITY = 5  # the higher levels cost far more CPU than they save in bytes for JSON
+INCOMPRESSIBLE_TYPES = ('image/', 'video/', 'audio/', 'application/zip', 'application/gzip',
+                        'application/vnd.openxmlformats', 'application/pdf')
+_coding = _lazy_re_compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def accepted_encodings(header):
+    """Encodings with a non-zero quality in an Accept-Encoding header, best first."""
+    weighted, refused = [], set()
+    for position, part in enumerate(header.split(',')):
+        match = _coding.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            weighted.append((-quality, position, match.group(1).lower()))
+        else:
+            refused.add(match.group(1).lower())
+    codings = [coding for _, _, coding in sorted(weighted)]
+    # A wildcard stands for whatever was not named explicitly
+    return [coding for coding in codings if coding != '*'] + (
+        [coding for coding in ('br', 'gzip') if coding not in refused and coding not in codings]
+        if '*' in codings else []
+    )
+
+
+def choose_encoding(header):
+    for coding in accepted_encodings(header):
+        if coding == 'br' and brotli is not None:
+            return 'br'
+        if coding == 'gzip':
+            return 'gzip'
+    return None
+
+
+def compression_exempt(view_func):
+    """Never compress this view's responses; for bodies that carry secrets."""
+    @wraps(view_func)
+    def wrapped_view(*args, **kwargs):
+        return view_func(*args, **kwargs)
+    wrapped_view.compression_exempt = True
+    return wrapped_view
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return compress_string(data, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    yield from compress_sequence(chunks, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'compression_exempt', False):
+            request._compression_exempt = True
+
+    def process_response(self, request, response):
+        if getattr(request, '_compression_exempt', False):
+            return response
+        if response.has_header('Content-Encoding') or response.status_code == 304:
+            return response
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith(INCOMPRESSIBLE_TYPES):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response  # nothing streams asynchronously through Django here
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+            if len(response.content) < min_size:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The body is no longer byte-for-byte the one a strong ETag described
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -110,3 +110,38 @@ class Room(models.Model):
     class Meta:
         verbose_name = "Room"
         verbose_name_plural = "Rooms"
+
+
+# ----------------------------
+# 6. Scheduler Lock
+# ----------------------------
+class SchedulerLock(models.Model):
+    """Lease row used to elect a single leader among background workers."""
+    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} held by {self.owner or 'nobody'}"
+
+    class Meta:
+        verbose_name = "Scheduler Lock"
+        verbose_name_plural = "Scheduler Locks"
+
+
+# ----------------------------
+# 7. Job Watermark
+# ----------------------------
+class JobWatermark(models.Model):
+    """How far an incremental background job has processed, so its next run resumes there."""
+    name = models.CharField(max_length=100, unique=True)
+    processed_through = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} through {self.processed_through or 'nothing'}"
+
+    class Meta:
+        verbose_name = "Job Watermark"
+        verbose_name_plural = "Job Watermarks"
@@ -0,0 +1,83 @@
+"""
+In-process publish/subscribe for streaming endpoints.
+
+Publishers are ordinary (synchronous) Django code; subscribers are asyncio
+tasks of the ASGI server. Each subscription owns a bounded asyncio.Queue on
+its event loop and events are handed over with call_soon_threadsafe, so a
+publisher never blocks. When a slow subscriber's queue is full the oldest
+event is dropped and counted, which keeps memory bounded per watcher.
+
+The broker does not cross process boundaries: a subscriber only sees events
+published by the process it is connected to. Writes handled by another web
+worker, a management command or the scheduler reach no one, so the
+streaming endpoints are only complete when one ASGI process serves both the
+streams and the writes that publish to them.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+QUEUE_SIZE = 256
+
+
+class Subscription:
+    def __init__(self, broker, topics, loop, maxsize):
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _deliver(self, event):
+        # Runs on the subscriber's loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def take_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = defaultdict(set)
+
+    def subscribe(self, topics, maxsize=QUEUE_SIZE):
+        """Subscribe the running event loop to some topics; call from a coroutine."""
+        subscription = Subscription(self, topics, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def has_subscribers(self, prefix=''):
+        with self._lock:
+            return any(topic.startswith(prefix) for topic in self._topics)
+
+    def publish(self, topic, event):
+        """Hand an event to every subscriber of `topic`; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                subscription.close()  # its loop has shut down
+
+
+broker = Broker()
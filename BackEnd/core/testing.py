@@ -0,0 +1,122 @@
+"""
+Fixtures shared by the apps' test suites.
+
+make_campus() builds the smallest graph most attendance tests need: one
+department, major, class and subject, a teacher, a few students in the
+class and one schedule with an active QR session.
+"""
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from admins.models import Class, Department, Major, Subject
+from core.models import AcademicYear, Semester
+from lecturer.models import QRCodeSession, Schedule, TeacherProfile
+from student.models import StudentProfile
+
+_counter = 0
+
+
+def _next():
+    global _counter
+    _counter += 1
+    return _counter
+
+
+def make_user(username=None, **extra):
+    username = username or f'user{_next()}'
+    extra.setdefault('email', f'{username}@example.com')
+    # No password: hashing one costs more than the rest of a test, and tests authenticate directly
+    return get_user_model().objects.create_user(username, **extra)
+
+
+def make_teacher(department, major, **extra):
+    user = make_user()
+    fields = dict(
+        user=user, full_name=f'Teacher {user.pk}', gender='male', date_of_birth=date(1980, 1, 1),
+        nationality='KH', place_of_birth='Phnom Penh', degree='PhD', institution='RUPP', phone='012',
+        email=user.email, experience='10 years', photo='photo.jpg', cv='cv.pdf', certificate='cert.pdf',
+        department=department, major=major, hire_date=date(2020, 1, 1), address='Street 1',
+        emergency_contact='012',
+    )
+    fields.update(extra)
+    return TeacherProfile.objects.create(**fields)
+
+
+def make_student(class_obj, **extra):
+    user = make_user()
+    n = user.pk
+    fields = dict(
+        user=user, full_name=f'Student {n}', gender='female', date_of_birth=date(2005, 1, 1),
+        national_id=f'N{n}', phone='012', email=user.email, address='Street 1',
+        department=class_obj.major.department, major=class_obj.major, class_obj=class_obj,
+        status='Active', parent_name='Parent', parent_phone='012', enrollment_date=date(2024, 1, 1),
+    )
+    fields.update(extra)
+    return StudentProfile.objects.create(**fields)
+
+
+def make_students(class_obj, count):
+    """Many students at once; bulk inserts skip the profile signals."""
+    User = get_user_model()
+    first = _next()
+    users = User.objects.bulk_create([
+        User(username=f'bulk{first}-{i}', email=f'bulk{first}-{i}@example.com') for i in range(count)
+    ])
+    return StudentProfile.objects.bulk_create([
+        StudentProfile(
+            user=user, full_name=f'Student {user.pk}', gender='female', date_of_birth=date(2005, 1, 1),
+            national_id=f'N{user.pk}', phone='012', email=user.email, address='Street 1',
+            department=class_obj.major.department, major=class_obj.major, class_obj=class_obj,
+            status='Active', parent_name='Parent', parent_phone='012', enrollment_date=date(2024, 1, 1),
+        )
+        for user in users
+    ])
+
+
+def make_schedule(teacher, subject, class_obj, day, start=time(8, 0), end=time(10, 0), **extra):
+    fields = dict(
+        teacher=teacher, subject=subject, class_obj=class_obj, room='R1', date=day,
+        start_time=start, end_time=end, qr_code_token=f'sched{_next()}', shift='Morning',
+        status='Planned',
+    )
+    fields.update(extra)
+    return Schedule.objects.create(**fields)
+
+
+def make_semester(year=2026, name='Semester 1', start=None, end=None):
+    academic_year, _ = AcademicYear.objects.get_or_create(
+        year_name=f'{year}-{year + 1}',
+        defaults={'start_date': date(year, 9, 1), 'end_date': date(year + 1, 8, 31)},
+    )
+    return Semester.objects.create(
+        academic_year=academic_year, name=name,
+        start_date=start or date(year, 9, 1), end_date=end or date(year + 1, 1, 31),
+    )
+
+
+def make_campus(students=5, day=None):
+    n = _next()
+    day = day or timezone.localdate()
+    department = Department.objects.create(name=f'Computing {n}', code=f'CS{n}')
+    major = Major.objects.create(
+        name=f'Computer Science {n}', code=f'CSC{n}', department=department, degree_type='BSc'
+    )
+    class_obj = Class.objects.create(
+        name=f'CS{n}', major=major, academic_year='2026', semester='1', shift='morning'
+    )
+    subject = Subject.objects.create(
+        name=f'Algorithms {n}', code=f'AL{n}', department=department, semester_offered='1'
+    )
+    teacher = make_teacher(department, major)
+    schedule = make_schedule(teacher, subject, class_obj, day)
+    session = QRCodeSession.objects.create(
+        schedule=schedule, token=f'qr{n}', expiration_time=timezone.now() + timedelta(hours=1)
+    )
+    return SimpleNamespace(
+        department=department, major=major, class_obj=class_obj, subject=subject,
+        teacher=teacher, students=[make_student(class_obj) for _ in range(students)],
+        schedule=schedule, session=session,
+    )
@@ -1,3 +1,176 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import threading
+import zipfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from .exports import stream_csv, stream_xlsx
+from .middleware import CompressionMiddleware, accepted_encodings, choose_encoding
+from .pubsub import Broker
+from .renderers import FastJSONRenderer
+from .testing import make_user
+
+
+class StreamingExportTests(SimpleTestCase):
+    rows = [(1, 'Sok, Dara', date(2026, 9, 1), Decimal('3.50'), None, ['Mon', 'Wed'])]
+
+    def test_csv(self):
+        content = b''.join(stream_csv(['ID', 'Name', 'Date', 'GPA', 'Note', 'Days'], iter(self.rows)))
+        self.assertTrue(content.startswith(b'\xef\xbb\xbf'))
+        self.assertEqual(content.decode('utf-8-sig').splitlines(), [
+            'ID,Name,Date,GPA,Note,Days', '1,"Sok, Dara",2026-09-01,3.50,,"Mon, Wed"',
+        ])
+
+    def test_xlsx_is_written_in_chunks(self):
+        rows = self.rows + [(n, f'Student {n}\x07 & co', None, n / 2, True, []) for n in range(2, 6)]
+        chunks = list(stream_xlsx(['ID', 'Name', 'Date', 'GPA', 'Flag', 'Days'], iter(rows),
+                                  sheet_name='Students: 2026', rows_per_chunk=2))
+        self.assertGreater(len(chunks), 3)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertIn('name="Students  2026"', workbook.read('xl/workbook.xml').decode())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row '), 6)
+        self.assertIn('<c r="B6" t="inlineStr"><is><t xml:space="preserve">Student 5 &amp; co</t></is></c>', sheet)
+        self.assertIn('<c r="D2"><v>3.50</v></c>', sheet)
+        self.assertIn('<c r="E3" t="b"><v>1</v></c>', sheet)
+
+
+class CompressionTests(SimpleTestCase):
+    body = json.dumps([{'id': n, 'name': f'Student {n}'} for n in range(200)]).encode()
+
+    def respond(self, response, accept='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        self.assertEqual(accepted_encodings('gzip;q=0.5, br, deflate;q=0'), ['br', 'gzip'])
+        self.assertEqual(accepted_encodings('*;q=0.1, gzip;q=0'), ['br'])
+        self.assertEqual(accepted_encodings('identity, bogus;q=x'), ['identity'])
+        self.assertEqual(choose_encoding('deflate, gzip;q=0.2'), 'gzip')
+        self.assertIsNone(choose_encoding('identity'))
+
+    def test_gzip_with_random_padding(self):
+        sizes = set()
+        for _ in range(20):
+            response = self.respond(HttpResponse(self.body, content_type='application/json'), accept='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(gzip.decompress(response.content), self.body)
+            self.assertEqual(int(response['Content-Length']), len(response.content))
+            sizes.add(len(response.content))
+        # The padding makes the length of identical bodies vary
+        self.assertGreater(len(sizes), 1)
+
+    def test_left_alone(self):
+        cases = [
+            (HttpResponse(self.body, content_type='application/json'), 'identity'),
+            (HttpResponse(b'{"ok": true}', content_type='application/json'), 'gzip'),
+            (HttpResponse(self.body, content_type='application/vnd.openxmlformats-officedocument'), 'gzip'),
+            (HttpResponse(status=304), 'gzip'),
+        ]
+        for response, accept in cases:
+            self.assertFalse(self.respond(response, accept).has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        chunks = [self.body[i:i + 500] for i in range(0, len(self.body), 500)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='text/csv'), accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+
+    def test_strong_etag_is_weakened(self):
+        response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.respond(response, accept='gzip')['ETag'], 'W/"abc"')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class CompressionExemptTests(TestCase):
+    def test_token_responses_are_never_compressed(self):
+        user = make_user()
+        user.set_password('secret-pass')
+        user.save()
+        response = self.client.post('/api/users/login/', {'username': user.username, 'password': 'secret-pass'},
+                                    content_type='application/json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.client.post('/api/users/token/refresh/', {'refresh': response.json()['refresh']},
+                                    content_type='application/json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.client.post('/api/users/login/', {'username': user.username, 'password': 'wrong'},
+                                    content_type='application/json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_bytes_as_the_stock_renderer(self):
+        data = {
+            'when': datetime(2026, 9, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'day': date(2026, 9, 1), 'gpa': Decimal('3.50'), 'big': 2 ** 70,
+            'text': 'line\u2028break \u00e9', 1: [None, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class BenchmarkRenderersTests(SimpleTestCase):
+    def test_runs_on_a_small_payload(self):
+        out = io.StringIO()
+        call_command('benchmark_renderers', rows=20, repeat=1, stdout=out)
+        self.assertIn('gzip (compress_string)', out.getvalue())
+
+
+class BrokerTests(SimpleTestCase):
+    def test_full_queue_drops_the_oldest_event(self):
+        broker = Broker()
+
+        async def watch():
+            subscription = broker.subscribe(['schedule:1'], maxsize=2)
+            for n in range(3):
+                broker.publish('schedule:1', n)
+            broker.publish('schedule:2', 'elsewhere')
+            await asyncio.sleep(0)
+            events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            return events, subscription.take_dropped(), subscription.take_dropped()
+
+        self.assertEqual(asyncio.run(watch()), ([1, 2], 1, 0))
+
+    def test_publish_from_another_thread(self):
+        broker = Broker()
+
+        async def watch():
+            subscription = broker.subscribe(['department:3'])
+            publisher = threading.Thread(target=broker.publish, args=('department:3', 'hello'))
+            publisher.start()
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=5)
+            publisher.join()
+            subscription.close()
+            return event
+
+        self.assertEqual(asyncio.run(watch()), 'hello')
+        self.assertFalse(broker.has_subscribers())
+
+    def test_subscription_of_a_closed_loop_is_dropped(self):
+        broker = Broker()
+
+        async def watch():
+            broker.subscribe(['schedule:1', 'department:2'])
+
+        asyncio.run(watch())
+        self.assertTrue(broker.has_subscribers('department:'))
+        broker.publish('schedule:1', 'late event')
+        self.assertFalse(broker.has_subscribers())
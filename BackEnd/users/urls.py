@@ -1,11 +1,12 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenBlacklistView
+from core.middleware import compression_exempt
 from . import views
 
 urlpatterns = [
-    path('login/', views.LoginView.as_view(), name='login'),
+    path('login/', compression_exempt(views.LoginView.as_view()), name='login'),
     path('logout/', views.LogoutView.as_view(), name='logout'),
-    path('token/refresh/', views.CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', compression_exempt(views.CustomTokenRefreshView.as_view()), name='token_refresh'),
     path('token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
     path('users/', views.UserListView.as_view(), name='user-list'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user-detail'),